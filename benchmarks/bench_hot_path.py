@@ -0,0 +1,10 @@
+"""Benchmarks of the order hot path and decorator overhead.
+
+Same as `pizza bench`, e.g. save a baseline and compare with it later:
+    python benchmarks/bench_hot_path.py --output benchmarks/baseline.json
+    python benchmarks/bench_hot_path.py --baseline benchmarks/baseline.json
+"""
+from pizza.cli import bench_cmd
+
+if __name__ == "__main__":
+    bench_cmd()
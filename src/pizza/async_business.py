@@ -0,0 +1,126 @@
+"""Asyncio version of business logic of order and delivery.
+
+Defines AsyncClient and AsyncRestaurant. They share stock semantics
+with Client and Restaurant, but heavy tasks are coroutines,
+so thousands of orders can wait for their latency in one event loop.
+Only orders of one pizza are async, entry points of Restaurant and Client
+for bulk orders, the kitchen and the warm inventory raise TypeError.
+"""
+import asyncio
+from collections.abc import Callable
+from typing import Any, NoReturn
+
+from pizza import deadlines
+from pizza.business import (
+    Client,
+    Restaurant,
+    params_for_heavy_tasks_client,
+    params_for_heavy_tasks_restaurant,
+)
+from pizza.decorators import trace_heavy_tasks
+from pizza.order_book import OrderStatus
+from pizza.pizza_menu import Pizza, pizza_menu
+
+
+def _not_async(name: str, instead: str) -> Callable[..., NoReturn]:
+    """Return method that rejects a sync entry point of an async class.
+
+    Inherited sync methods would call heavy tasks, which are coroutines
+    here, without awaiting them.
+    """
+
+    def method(self: Any, *_: Any, **__: Any) -> NoReturn:
+        msg = f"{type(self).__name__}.{name} is sync, use await {instead} instead"
+        raise TypeError(msg)
+
+    method.__name__ = name
+    return method
+
+
+@trace_heavy_tasks(params_for_heavy_tasks_restaurant)
+class AsyncRestaurant(Restaurant):
+    """Restaurant whose baking and delivery don't block the event loop."""
+
+    process_orders = _not_async("process_orders", "process_order")
+    submit_order = _not_async("submit_order", "process_order")
+    submit_orders = _not_async("submit_orders", "process_order")
+    prebake = _not_async("prebake", "process_order")
+
+    async def _bake(self, pizza: Pizza) -> Pizza:  # type: ignore[override]
+        """Bake pizza and return it. See Restaurant._bake."""
+        if not pizza.is_baked:
+            pizza.bake()
+        return pizza
+
+    async def process_order(  # type: ignore[override]
+        self,
+        pizza_name,
+        client: "AsyncClient",
+        *,
+        is_delivery: bool = False,
+        size: str = "L",
+    ) -> None:
+        """Process order of food by a client and optionally deliver it"""
+        pizza = self.menu[pizza_name](size=size)
+        deadlines.check()  # latency checks it too, but it can be disabled
+        pizza = await self._bake(pizza)
+        deadlines.check()
+        if is_delivery:
+            self._add_to_stock(client, pizza, OrderStatus.OUT_FOR_DELIVERY)
+            await self._deliver(client)
+        else:
+            self._add_to_stock(client, pizza, OrderStatus.AWAITING_PICKUP)
+
+    async def _deliver(self, client: "AsyncClient") -> None:  # type: ignore[override]
+        """Deliver food to a client and put it in his _stock."""
+        client.add_to_stock(self._retrieve_from_stock(client))
+
+
+@trace_heavy_tasks(params_for_heavy_tasks_client)
+class AsyncClient(Client):
+    """Client who orders food from the AsyncRestaurant."""
+
+    __slots__ = ()
+
+    restaurant: AsyncRestaurant
+
+    make_orders = _not_async("make_orders", "make_order")
+
+    async def make_order(  # type: ignore[override]
+        self,
+        pizza_name: str,
+        *,
+        size: str = "L",
+    ) -> None:
+        """Make an order for food in a restaurant. And get that food.
+
+        If is_delivery=True then wait for delivery
+        If is_delivery=False then pick up by yourself.
+        """
+        await self.restaurant.process_order(
+            pizza_name,
+            self,
+            is_delivery=self.is_delivery,
+            size=size,
+        )
+        if not self.is_delivery:
+            food = await self._pickup()
+            self.add_to_stock(food)
+
+    async def _pickup(self) -> list[Pizza]:  # type: ignore[override]
+        """Pickup all ordered food from a restaurant."""
+        return self.restaurant.give_food(self)
+
+
+async def _main() -> None:
+    restaurant = AsyncRestaurant(pizza_menu)
+    clients = [
+        AsyncClient(restaurant=restaurant, is_delivery=bool(i % 2), name=f"C{i}")
+        for i in range(3)
+    ]
+    await asyncio.gather(*(client.make_order("Pepperoni") for client in clients))
+    print([client.get_stock() for client in clients])
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,163 @@
+"""Benchmarks of the order hot path and of decorator overhead.
+
+Every benchmark measures nanoseconds per operation (best of several repeats).
+Results are saved as JSON and compared with a baseline to catch regressions.
+Synthetic latency is disabled while benchmarks run, *.off benchmarks
+run without any tracing layers.
+"""
+import contextlib
+import json
+import os
+import platform
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from pizza.business import Client, Restaurant
+from pizza.decorators import (
+    LogTimeDecorator,
+    TracingConfig,
+    add_latency,
+    trace_heavy_tasks,
+    use_tracing,
+)
+from pizza.pizza_menu import Pepperoni, pizza_menu
+from pizza.spinner import add_spinner
+
+BenchResults = dict[str, float]  # benchmark name -> ns per operation
+
+
+class _Plain:
+    """Class with a trivial method to measure pure overhead of decorators."""
+
+    def work(self) -> int:
+        """Do nothing useful."""
+        return 1
+
+
+def _decorated(decorator: Callable) -> Callable[[], object]:
+    """Return bound trivial method wrapped by decorator."""
+
+    class Decorated(_Plain):
+        work = decorator(_Plain.work)
+
+    return Decorated().work
+
+
+_traced = trace_heavy_tasks(
+    {"work": {"log_time_msg": "{:.2f}", "start_msg": "", "end_msg": ""}},
+)(_Plain)
+
+
+def _process_order() -> Callable[[], object]:
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant=restaurant, is_delivery=True)
+    return lambda: restaurant.process_order("Pepperoni", client, is_delivery=True)
+
+
+def _pizza_eq() -> Callable[[], object]:
+    pizza1, pizza2 = Pepperoni(), Pepperoni()
+    return lambda: pizza1 == pizza2
+
+
+# benchmark name -> factory of a function to call many times
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {
+    "process_order": _process_order,
+    "process_order.off": _process_order,
+    "layer.none": lambda: _Plain().work,
+    "layer.latency": lambda: _decorated(add_latency),
+    "layer.spinner": lambda: _decorated(add_spinner("", "")),
+    "layer.timer": lambda: _decorated(
+        LogTimeDecorator("{:.2f}", is_return_time=False),
+    ),
+    "layer.all": lambda: _traced().work,
+    "layer.off": lambda: _traced().work,
+    "menu.getitem": lambda: lambda: pizza_menu["pepperoni"],
+    "menu.contains": lambda: lambda: "pepperoni" in pizza_menu,
+    "pizza.eq": _pizza_eq,
+}
+
+
+def _tracing_for(name: str) -> TracingConfig:
+    """Tracing of a benchmark: no layers for *.off, else all but latency."""
+    if name.endswith(".off"):
+        return TracingConfig.off()
+    return TracingConfig(latency=False, spinner=True, timer=True)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    """Swallow decorative output."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(fn: Callable[[], object], *, number: int, repeat: int = 5) -> float:
+    """Return best time of a call of fn in nanoseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def run_benchmarks(
+    *,
+    number: int = 10_000,
+    names: list[str] | None = None,
+) -> BenchResults:
+    """Run benchmarks (all by default) and return ns per operation."""
+    results = {}
+    with _quiet():
+        for name in names or BENCHMARKS:
+            with use_tracing(_tracing_for(name)):
+                results[name] = measure(BENCHMARKS[name](), number=number)
+    return results
+
+
+def save_results(results: BenchResults, path: Path) -> None:
+    """Save results as JSON with info about the machine."""
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results_ns": results,
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def load_results(path: Path) -> BenchResults:
+    """Load results saved by save_results."""
+    return json.loads(path.read_text())["results_ns"]
+
+
+def compare(
+    results: BenchResults,
+    baseline: BenchResults,
+    tolerance: float = 0.2,
+) -> dict[str, float]:
+    """Find benchmarks slower than baseline by more than tolerance.
+
+    Returns:
+        dict with key=benchmark name, value=ratio of new time to baseline time.
+    """
+    return {
+        name: results[name] / baseline[name]
+        for name in results.keys() & baseline.keys()
+        if results[name] > baseline[name] * (1 + tolerance)
+    }
+
+
+def format_results(
+    results: BenchResults,
+    baseline: BenchResults | None = None,
+) -> str:
+    """Return table of results, with change against baseline if provided."""
+    lines = []
+    for name, ns in results.items():
+        line = f"{name:<16} {ns:>12,.0f} ns/op {1e9 / ns:>14,.0f} op/s"
+        if baseline and name in baseline:
+            line += f" {ns / baseline[name] - 1:>+8.1%}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -2,9 +2,16 @@
 
 Defines Client and Restaurant
 """
-from collections import defaultdict
+import functools
+import threading
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, NamedTuple
 
+from pizza import deadlines
+from pizza.deadlines import DeadlineExceeded
 from pizza.decorators import MsgForParam, trace_heavy_tasks
+from pizza.idempotency import IdempotencyCache
+from pizza.order_book import Order, OrderBook, OrderStatus
 from pizza.pizza_menu import (
     LowerKeyMenu,
     Pepperoni,
@@ -12,16 +19,113 @@ from pizza.pizza_menu import (
     pizza_menu,
 )
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from pizza.deadlines import HedgePolicy
+    from pizza.dispatch import DeliveryDispatcher
+    from pizza.kitchen import Kitchen
+    from pizza.scheduling import Priority
+    from pizza.storage import StockStore
+    from pizza.warm_inventory import WarmInventory
+
+OrderItem = tuple[str, str]  # pizza name and size
+ClientKey = tuple[str, str]  # normalized name and phone number
+
+
+def client_key(name: str, phone_number: str) -> ClientKey:
+    """Normalize personal info of a client into a key that identifies him.
+
+    Case and extra whitespace of a name and everything but digits
+    of a phone number are ignored: "Pavel " and "+1 337" is "pavel" and "1337".
+    """
+    digits = "".join(char for char in phone_number if char.isdigit())
+    return " ".join(name.casefold().split()), digits
+
+
+class _Delivery(NamedTuple):
+    """Stop of a delivery trip: orders of one order of a client."""
+
+    client: "Client"
+    order_ids: tuple[int, ...]
+
+
+# names of pizzas a heavy task works with, to label its metrics
+def _baked_pizza_type(_: "Restaurant", pizza: Pizza) -> set[str]:
+    return {pizza.name}
+
+
+def _ordered_pizza_types(stock: OrderBook, order_ids: Iterable[int]) -> set[str]:
+    names = set()
+    for order_id in order_ids:
+        try:
+            names.add(stock.get(order_id).pizza.name)
+        except KeyError:  # closed meanwhile
+            continue
+    return names
+
+
+def _delivered_pizza_types(
+    restaurant: "Restaurant",
+    client: "Client",
+    order_ids: Iterable[int] | None = None,
+) -> set[str]:
+    stock = restaurant.get_stock()
+    if order_ids is None:
+        return {pizza.name for pizza in stock.pizzas(client.key)}
+    return _ordered_pizza_types(stock, order_ids)
+
+
+def _trip_pizza_types(
+    restaurant: "Restaurant",
+    deliveries: list[_Delivery],
+) -> set[str]:
+    stock = restaurant.get_stock()
+    return _ordered_pizza_types(
+        stock,
+        (order_id for delivery in deliveries for order_id in delivery.order_ids),
+    )
+
+
+def _picked_up_pizza_types(
+    client: "Client",
+    order_ids: Iterable[int] | None = None,
+) -> set[str]:
+    return _delivered_pizza_types(client.restaurant, client, order_ids)
+
+
+class _PlacedOrders:
+    """Orders opened in the stock by one order, to close them if it is cancelled.
+
+    Bakes finishing after cancellation don't open orders.
+    """
+
+    __slots__ = ("is_cancelled", "lock", "orders")
+
+    def __init__(self) -> None:
+        self.is_cancelled = False
+        self.orders: list[Order] = []
+        self.lock = threading.Lock()
+
+
 params_for_heavy_tasks_restaurant = {
     "_bake": MsgForParam(
         log_time_msg="Baking took {:.2f} seconds",
         start_msg="Baking",
         end_msg="👩‍🍳 Baked",
+        pizza_types=_baked_pizza_type,
     ),
     "_deliver": MsgForParam(
         log_time_msg="Delivery took {:.2f} seconds",
         start_msg="Delivering",
         end_msg="🚲 Delivered",
+        pizza_types=_delivered_pizza_types,
+    ),
+    "_deliver_trip": MsgForParam(
+        log_time_msg="Delivery trip took {:.2f} seconds",
+        start_msg="Delivering to several clients",
+        end_msg="🚚 Delivered",
+        pizza_types=_trip_pizza_types,
     ),
 }
 
@@ -30,6 +134,7 @@ params_for_heavy_tasks_client = {
         log_time_msg="Picking up took {:.2f} seconds",
         start_msg="Picking up",
         end_msg="🏎️  Picked up",
+        pizza_types=_picked_up_pizza_types,
     ),
 }
 
@@ -40,19 +145,78 @@ class Restaurant:
 
     Attributes:
         menu: available food to clients
-        _stock: _stock of the restaurant with food waiting for pickup,
-            where key - Client, value - list of Pizza.
+        kitchen: optional pools of ovens and couriers that process orders,
+            if None, orders are processed on the caller's thread.
+        dispatcher: optional dispatcher that batches deliveries of
+            different clients into trips, if None, every order is a trip.
+        store: optional storage of open orders and order history,
+            open orders are restored from it at startup.
+        idempotency: cache of results of orders by idempotency key,
+            so retried orders are not baked twice
+        warm_inventory: optional pizzas baked ahead of time, orders take
+            them instead of waiting for baking, see prebake.
+        hedging: optional policy to send a second courier when a delivery
+            is slower than usual, used without a dispatcher.
+        clients: registry of clients of the restaurant
+        _stock: order book of the restaurant with baked food
+            waiting for pickup or delivery.
     """
 
-    def __init__(self, menu: LowerKeyMenu) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        menu: LowerKeyMenu,
+        *,
+        kitchen: "Kitchen | None" = None,
+        dispatcher: "DeliveryDispatcher | None" = None,
+        store: "StockStore | None" = None,
+        idempotency: IdempotencyCache | None = None,
+        warm_inventory: "WarmInventory | None" = None,
+        hedging: "HedgePolicy | None" = None,
+    ) -> None:
         """Initialization of restaurant with the menu.
 
         menu: available food to clients
-        _stock: _stock of the restaurant with food waiting for pickup,
-            where key - Client, value - list of Pizza.
+        kitchen: optional pools of ovens and couriers that process orders
+        dispatcher: optional dispatcher that batches deliveries into trips
+        store: optional storage of orders to restore open orders from
+        idempotency: cache of orders by idempotency key, a new one by default
+        warm_inventory: optional inventory of pizzas baked ahead of time
+        hedging: optional policy of hedged deliveries
+        _stock: order book of the restaurant with baked food
+            waiting for pickup or delivery.
         """
         self.menu = menu
-        self._stock: defaultdict[Client, list[Pizza]] = defaultdict(list)
+        self.kitchen = kitchen
+        self.dispatcher = dispatcher
+        if dispatcher is not None:
+            dispatcher.bind(self._deliver_trip)
+        self.store = store
+        self.idempotency = idempotency or IdempotencyCache()
+        self.warm_inventory = warm_inventory
+        self.hedging = hedging
+        self.clients = ClientRegistry(self)
+        self._stock = OrderBook()
+        if store is not None:
+            self._restore(store)
+
+    def _restore(self, store: "StockStore") -> None:
+        """Put open orders from store back to the stock.
+
+        Raises:
+            KeyError: if pizza of an open order is not on the menu.
+        """
+        self._stock = OrderBook(first_id=store.last_order_id() + 1)
+        for stored in store.open_orders():
+            pizza = self.menu[stored.pizza_name](size=stored.size)
+            pizza.bake()
+            self._stock.restore(
+                Order(
+                    stored.order_id,
+                    (stored.client_name, stored.client_phone),
+                    pizza,
+                    OrderStatus(stored.status),
+                ),
+            )
 
     def _bake(self, pizza: Pizza) -> Pizza:
         """Bake pizza and return it.
@@ -64,23 +228,50 @@ class Restaurant:
             pizza.bake()
         return pizza
 
-    def _add_to_stock(self, client: "Client", item: Pizza) -> None:
-        """Add baked food to a _stock (list) where key=client who ordered it."""
-        self._stock[client].append(item)
-
-    def _retrieve_from_stock(self, client: "Client") -> list[Pizza]:
-        """Take all food from _stock for this client."""
-        items = self._stock[client]
-        del self._stock[client]
-        return items
+    def _add_to_stock(
+        self,
+        client: "Client",
+        item: Pizza,
+        status: OrderStatus = OrderStatus.BAKED,
+    ) -> Order:
+        """Open order in the _stock for baked food of a client who ordered it."""
+        order = self._stock.add(client.key, item, status)
+        if self.store is not None:
+            self.store.add(order)
+        return order
+
+    def _retrieve_from_stock(
+        self,
+        client: "Client",
+        order_ids: Iterable[int] | None = None,
+    ) -> list[Pizza]:
+        """Take food of orders from _stock and close them.
 
-    def get_stock(self) -> defaultdict["Client", list[Pizza]]:
-        """Get stock of baked food for customers"""
+        All orders of the client by default. Orders that are closed
+        already, e.g. by another courier, are skipped.
+        """
+        if order_ids is None:
+            orders = self._stock.pop_client(client.key)
+        else:
+            orders = self._stock.pop_orders(order_ids)
+        if self.store is not None and orders:
+            self.store.close_orders(order.order_id for order in orders)
+        return [order.pizza for order in orders]
+
+    def get_stock(self) -> OrderBook:
+        """Get order book of baked food for customers"""
         return self._stock
 
-    def give_food(self, client: "Client") -> list[Pizza]:
-        """Give food to client who wants to pick up by himself."""
-        return self._retrieve_from_stock(client)
+    def give_food(
+        self,
+        client: "Client",
+        order_ids: Iterable[int] | None = None,
+    ) -> list[Pizza]:
+        """Give food to client who wants to pick up by himself.
+
+        Only food of order_ids if given, else all food of the client.
+        """
+        return self._retrieve_from_stock(client, order_ids)
 
     def process_order(
         self,
@@ -88,17 +279,325 @@ class Restaurant:
         client: "Client",
         *,
         is_delivery: bool = False,
+        size: str = "L",
+        idempotency_key: str | None = None,
     ) -> None:
         """Process order of food by a client and optionally deliver it"""
-        pizza = self.menu[pizza_name]()
-        pizza = self._bake(pizza)
-        self._add_to_stock(client, pizza)
+        self.process_orders(
+            [(pizza_name, size)],
+            client,
+            is_delivery=is_delivery,
+            idempotency_key=idempotency_key,
+        )
+
+    def process_orders(
+        self,
+        items: list[OrderItem],
+        client: "Client",
+        *,
+        is_delivery: bool = False,
+        idempotency_key: str | None = None,
+        priority: "Priority | None" = None,
+    ) -> list[Order]:
+        """Process order of several items at once and optionally deliver them.
+
+        All items are validated before baking, baked in parallel
+        and delivered in a single trip. Only orders opened for these items
+        are delivered, so concurrent orders of the same client
+        don't take each other's food.
+        If restaurant has a kitchen, the order goes through its queue
+        with priority and this call waits for the order to be done.
+        Orders of the client with the same idempotency_key are processed once,
+        duplicates wait for the original and return without baking.
+        If the deadline of the caller (see pizza.deadlines) comes first,
+        the order is cancelled: its pizzas are removed from the stock,
+        so they are neither delivered nor picked up.
+
+        Returns:
+            orders opened for the items, delivered ones are closed.
+
+        Raises:
+            KeyError: if pizza is not on the menu.
+            ValueError: if size is not available or there are no items.
+            DeadlineExceeded: if the order isn't done by the deadline.
+        """
+        if idempotency_key is not None:
+            return self.idempotency.run(
+                (client.key, idempotency_key),
+                functools.partial(
+                    self.process_orders,
+                    items,
+                    client,
+                    is_delivery=is_delivery,
+                    priority=priority,
+                ),
+            )
+        placed = _PlacedOrders()
+        try:
+            if self.kitchen is not None:
+                deadlines.wait_result(
+                    self._submit_to_kitchen(
+                        self.kitchen,
+                        items,
+                        client,
+                        is_delivery=is_delivery,
+                        priority=priority,
+                        placed=placed,
+                    ),
+                )
+            else:
+                self._process_locally(
+                    items,
+                    client,
+                    is_delivery=is_delivery,
+                    placed=placed,
+                )
+        except DeadlineExceeded:
+            self._cancel(placed)
+            raise
+        return placed.orders
+
+    def _process_locally(
+        self,
+        items: list[OrderItem],
+        client: "Client",
+        *,
+        is_delivery: bool,
+        placed: _PlacedOrders,
+    ) -> None:
+        """Bake items on the caller's thread or in ovens of a bulk order."""
+        pizzas = self._make_pizzas(items)
+        if len(pizzas) == 1:
+            self._bake_to_stock(
+                pizzas[0],
+                client,
+                is_delivery=is_delivery,
+                placed=placed,
+            )
+        else:
+            from concurrent.futures import ThreadPoolExecutor  # only for bulk orders
+
+            with ThreadPoolExecutor(len(pizzas), thread_name_prefix="oven") as ovens:
+                bakes = [
+                    ovens.submit(
+                        deadlines.bind(
+                            functools.partial(
+                                self._bake_to_stock,
+                                pizza,
+                                client,
+                                is_delivery=is_delivery,
+                                placed=placed,
+                            ),
+                        ),
+                    )
+                    for pizza in pizzas
+                ]
+                for bake in bakes:
+                    bake.result()
         if is_delivery:
-            self._deliver(client)
+            self._dispatch_delivery(client, placed)
+
+    def _cancel(self, placed: _PlacedOrders) -> None:
+        """Close orders opened by a cancelled order, stop its bakes opening more.
+
+        Orders already delivered or picked up are closed by then.
+        """
+        with placed.lock:
+            placed.is_cancelled = True
+        self.close_orders(placed.orders)
+
+    def close_orders(self, orders: Iterable[Order]) -> None:
+        """Close orders that won't be collected, skip the ones closed already."""
+        closed = []
+        for order in orders:
+            try:
+                self._stock.remove(order.order_id)
+            except KeyError:
+                continue
+            closed.append(order.order_id)
+        if self.store is not None and closed:
+            self.store.close_orders(closed)
+
+    def submit_order(
+        self,
+        pizza_name,
+        client: "Client",
+        *,
+        is_delivery: bool = False,
+        size: str = "L",
+    ) -> "Future":
+        """Submit order to the kitchen and return future of its completion.
+
+        See submit_orders.
+        """
+        return self.submit_orders(
+            [(pizza_name, size)],
+            client,
+            is_delivery=is_delivery,
+        )
+
+    def submit_orders(
+        self,
+        items: list[OrderItem],
+        client: "Client",
+        *,
+        is_delivery: bool = False,
+        priority: "Priority | None" = None,
+    ) -> "Future":
+        """Submit order of several items to the kitchen as one order.
+
+        Without a kitchen the order is processed immediately
+        and a finished future is returned. Priority is DELIVERY or PICKUP
+        by default, see Kitchen.submit_batch.
+
+        Raises:
+            KeyError: if pizza is not on the menu.
+            ValueError: if size is not available or there are no items.
+            KitchenOverloadedError: if the kitchen rejects the order.
+        """
+        if self.kitchen is None:
+            from concurrent.futures import Future
+
+            future: Future = Future()
+            self.process_orders(items, client, is_delivery=is_delivery)
+            future.set_result(None)
+            return future
+        return self._submit_to_kitchen(
+            self.kitchen,
+            items,
+            client,
+            is_delivery=is_delivery,
+            priority=priority,
+        )
+
+    def _submit_to_kitchen(  # noqa: PLR0913
+        self,
+        kitchen: "Kitchen",
+        items: list[OrderItem],
+        client: "Client",
+        *,
+        is_delivery: bool,
+        priority: "Priority | None",
+        placed: _PlacedOrders | None = None,
+    ) -> "Future":
+        """Submit order to the kitchen with the deadline of the caller.
+
+        Work of the order keeps the deadline in kitchen threads
+        and the kitchen schedules it by the deadline.
+        """
+        pizzas = self._make_pizzas(items)
+        if placed is None:
+            placed = _PlacedOrders()
+        deliver = functools.partial(self._dispatch_delivery, client, placed)
+        return kitchen.submit_batch(
+            [
+                deadlines.bind(
+                    functools.partial(
+                        self._bake_to_stock,
+                        p,
+                        client,
+                        is_delivery=is_delivery,
+                        placed=placed,
+                    ),
+                )
+                for p in pizzas
+            ],
+            deadlines.bind(deliver) if is_delivery else None,
+            priority=priority,
+            deadline=deadlines.current(),
+        )
+
+    def _make_pizzas(self, items: list[OrderItem]) -> list[Pizza]:
+        """Make pizzas from the menu, so the whole order is valid before baking."""
+        if not items:
+            msg = "Order should contain at least one pizza"
+            raise ValueError(msg)
+        return [self.menu[pizza_name](size=size) for pizza_name, size in items]
+
+    def _bake_to_stock(
+        self,
+        pizza: Pizza,
+        client: "Client",
+        *,
+        is_delivery: bool,
+        placed: _PlacedOrders | None = None,
+    ) -> Order | None:
+        """Bake pizza and put it in the stock, waiting for pickup or delivery.
+
+        A pizza from the warm inventory is used if there is one.
+        The opened order is added to placed, if its order is already
+        cancelled, the pizza is not put in the stock and None is returned.
+        """
+        status = OrderStatus.BAKED if is_delivery else OrderStatus.AWAITING_PICKUP
+        baked = None
+        if self.warm_inventory is not None:
+            baked = self.warm_inventory.take(pizza)
+        if baked is None:
+            deadlines.check()  # latency checks it too, but it can be disabled
+            baked = self._bake(pizza)
+        if placed is None:
+            return self._add_to_stock(client, baked, status)
+        with placed.lock:
+            if placed.is_cancelled:
+                return None
+            order = self._add_to_stock(client, baked, status)
+            placed.orders.append(order)
+        return order
+
+    def prebake(self) -> int:
+        """Bake pizzas of the expected demand for the warm inventory.
+
+        Pizzas are baked by ovens of the kitchen if there is one,
+        so baking ahead doesn't add an oven.
+
+        Returns:
+            number of baked pizzas, 0 if there is no warm inventory.
+        """
+        if self.warm_inventory is None:
+            return 0
+        kitchen = self.kitchen
+
+        def bake(pizza_name: str, size: str) -> Pizza:
+            baking = functools.partial(self._bake, self.menu[pizza_name](size=size))
+            if kitchen is None:
+                return baking()
+            return kitchen.bake_ahead(baking).result()
+
+        return self.warm_inventory.refill(bake)
 
-    def _deliver(self, client: "Client") -> None:
-        """Deliver food to a client and put it in his _stock."""
-        client.add_to_stock(self._retrieve_from_stock(client))
+    def _dispatch_delivery(self, client: "Client", placed: _PlacedOrders) -> None:
+        """Deliver placed orders by a separate trip or wait for a shared trip.
+
+        A separate trip is hedged by a second courier if there is a policy,
+        the courier who comes second finds nothing to deliver.
+        """
+        deadlines.check()
+        status = OrderStatus.OUT_FOR_DELIVERY
+        order_ids = tuple(order.order_id for order in placed.orders)
+        self._stock.set_status(order_ids, status)
+        if self.store is not None:
+            self.store.set_status(order_ids, status)
+        if self.dispatcher is not None:
+            deadlines.wait_result(
+                self.dispatcher.request_delivery(_Delivery(client, order_ids)),
+            )
+        elif self.hedging is not None:
+            self.hedging.run(functools.partial(self._deliver, client, order_ids))
+        else:
+            self._deliver(client, order_ids)
+
+    def _deliver(
+        self,
+        client: "Client",
+        order_ids: Iterable[int] | None = None,
+    ) -> None:
+        """Deliver food of orders (all of the client by default) to his _stock."""
+        client.add_to_stock(self._retrieve_from_stock(client, order_ids))
+
+    def _deliver_trip(self, deliveries: list[_Delivery]) -> None:
+        """Deliver orders of several clients in one trip."""
+        for client, order_ids in deliveries:
+            client.add_to_stock(self._retrieve_from_stock(client, order_ids))
 
 
 @trace_heavy_tasks(params_for_heavy_tasks_client)
@@ -106,16 +605,28 @@ class Client:
     """Client who orders food from the restaurant.
 
     Each client linked to the restaurant
-    Client has personal info: name and phone_number that identify him
+    Client has personal info: name and phone_number that identify him.
+    Clients with the same normalized personal info (see client_key) are equal,
+    use ClientRegistry to have one object per client.
 
     Attributes:
         restaurant
         is_delivery
         name
         phone_number
+        key: normalized name and phone number, fixed at creation
        _stock: list which contains and collects food items for this client.
     """
 
+    __slots__ = (
+        "_stock",
+        "is_delivery",
+        "key",
+        "name",
+        "phone_number",
+        "restaurant",
+    )
+
     def __init__(
         self,
         restaurant: Restaurant,
@@ -137,11 +648,18 @@ class Client:
         self.phone_number = phone_number
         self.restaurant = restaurant
         self.is_delivery = is_delivery
+        self.key = client_key(name, phone_number)
         self._stock: list[Pizza] = []
 
+    def __eq__(self, other: object) -> bool:
+        """Clients with the same personal info are the same client."""
+        if not isinstance(other, Client):
+            return NotImplemented
+        return self.key == other.key
+
     def __hash__(self):
         """Uniquely identify a client."""
-        return hash((self.name, self.phone_number))
+        return hash(self.key)
 
     def get_stock(self) -> list[Pizza]:
         """Get pizza stock of client"""
@@ -152,20 +670,177 @@ class Client:
         for item in items:
             self._stock.append(item)
 
-    def make_order(self, pizza_name: str) -> None:
+    def make_order(
+        self,
+        pizza_name: str,
+        *,
+        size: str = "L",
+        idempotency_key: str | None = None,
+        timeout: float | None = None,
+    ) -> None:
         """Make an order for food in a restaurant. And get that food.
 
         If is_delivery=True then wait for delivery
         If is_delivery=False then pick up by yourself.
+        See make_orders for idempotency_key and timeout.
+        """
+        self.make_orders(
+            [(pizza_name, size)],
+            idempotency_key=idempotency_key,
+            timeout=timeout,
+        )
+
+    def make_orders(
+        self,
+        items: list[OrderItem],
+        *,
+        idempotency_key: str | None = None,
+        priority: "Priority | None" = None,
+        timeout: float | None = None,
+        is_delivery: bool | None = None,
+    ) -> list[Pizza]:
+        """Make one order of several items and get them all at once.
+
+        Items are pairs of pizza name and size.
+        Food is delivered or picked up once for the whole order,
+        as is_delivery says, or as the client prefers if it is None.
+        A retry with the same idempotency_key doesn't order food again,
+        keys of different clients don't collide.
+        Priority is used by a scheduled kitchen, e.g. EXPRESS for deliveries
+        that can't wait.
+        If the order isn't delivered or picked up in timeout seconds,
+        it is cancelled and its orders in the restaurant are closed.
+
+        Returns:
+            food of this order, it is also added to the stock of the client.
+
+        Raises:
+            DeadlineExceeded: if the order takes longer than timeout.
+        """
+        if timeout is not None:
+            with deadlines.deadline(timeout):
+                return self.make_orders(
+                    items,
+                    idempotency_key=idempotency_key,
+                    priority=priority,
+                    is_delivery=is_delivery,
+                )
+        if idempotency_key is not None:
+            return self.restaurant.idempotency.run(
+                (self.key, idempotency_key),
+                functools.partial(
+                    self.make_orders,
+                    items,
+                    priority=priority,
+                    is_delivery=is_delivery,
+                ),
+            )
+        if is_delivery is None:
+            is_delivery = self.is_delivery
+        orders = self.restaurant.process_orders(
+            items,
+            self,
+            is_delivery=is_delivery,
+            priority=priority,
+        )
+        if is_delivery:
+            return [order.pizza for order in orders]
+        try:
+            deadlines.check()
+            food = self._pickup([order.order_id for order in orders])
+        except DeadlineExceeded:
+            self.restaurant.close_orders(orders)
+            raise
+        self.add_to_stock(food)
+        return food
+
+    def _pickup(self, order_ids: Iterable[int] | None = None) -> list[Pizza]:
+        """Pickup food of orders (all ordered food by default) from a restaurant."""
+        return self.restaurant.give_food(self, order_ids)
+
+
+class ClientRegistry:
+    """Clients of a restaurant interned by their normalized key.
+
+    There is one Client object per key, so lookups are O(1)
+    and the same person always gets the same client and the same stock.
+    """
+
+    def __init__(self, restaurant: Restaurant) -> None:
+        """Initialize empty registry of clients of the restaurant."""
+        self.restaurant = restaurant
+        self._clients: dict[ClientKey, Client] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of registered clients."""
+        return len(self._clients)
+
+    def __contains__(self, key: ClientKey) -> bool:
+        """Check if client with normalized key is registered."""
+        return key in self._clients
+
+    def lookup(self, name: str, phone_number: str) -> Client | None:
+        """Return registered client with this personal info if exists."""
+        return self._clients.get(client_key(name, phone_number))
+
+    def intern(self, client: Client) -> Client:
+        """Register client if it is new, return the registered equal client."""
+        try:
+            return self._clients[client.key]
+        except KeyError:
+            with self._lock:
+                return self._clients.setdefault(client.key, client)
+
+    def get_or_create(
+        self,
+        name: str,
+        phone_number: str,
+        *,
+        is_delivery: bool = False,
+    ) -> Client:
+        """Return registered client or register a new one.
+
+        is_delivery is used only for a new client.
         """
-        self.restaurant.process_order(pizza_name, self, is_delivery=self.is_delivery)
-        if not self.is_delivery:
-            food = self._pickup()
-            self.add_to_stock(food)
+        client = self.lookup(name, phone_number)
+        if client is None:
+            client = self.intern(
+                Client(
+                    self.restaurant,
+                    is_delivery=is_delivery,
+                    name=name,
+                    phone_number=phone_number,
+                ),
+            )
+        return client
+
+    def bulk_import(
+        self,
+        records: Iterable[tuple[str, str]],
+        *,
+        is_delivery: bool = False,
+    ) -> int:
+        """Register clients from pairs of name and phone number.
 
-    def _pickup(self) -> list[Pizza]:
-        """Pickup all ordered food from a restaurant."""
-        return self.restaurant.give_food(self)
+        Returns:
+            number of new clients, known ones are skipped.
+        """
+        new = {}
+        for name, phone_number in records:
+            key = client_key(name, phone_number)
+            if key not in self._clients and key not in new:
+                new[key] = Client(
+                    self.restaurant,
+                    is_delivery=is_delivery,
+                    name=name,
+                    phone_number=phone_number,
+                )
+        with self._lock:
+            n_before = len(self._clients)
+            for key, client in new.items():
+                self._clients.setdefault(key, client)
+            return len(self._clients) - n_before
 
 
 if __name__ == "__main__":
@@ -182,4 +857,4 @@ if __name__ == "__main__":
     print(Restaurant.__wrapped__.__mro__)  # type: ignore
 
     client = Client(restaurant=restaurant, is_delivery=True)
-    print(vars(client))
+    print(client.key)
@@ -1,43 +1,576 @@
-"""Module with CLI for ordering pizza."""
+"""Module with CLI for ordering pizza.
+
+Modules of the package are imported by the commands that use them,
+so e.g. `pizza menu` doesn't load business logic, threads and decorators.
+Paths of options stay strings until they are used, even pathlib
+is a noticeable part of startup time.
+
+The rest of the package follows the same rule to keep startup fast:
+modules that only some paths use are imported inside the functions
+that need them, modules only needed for annotations are imported
+under TYPE_CHECKING.
+"""
 import os
 import sys
+import time
+from typing import TYPE_CHECKING, TextIO
 
 import click
 
-from pizza.business import Client, Restaurant
-from pizza.pizza_menu import full_menu_str, pizza_menu, validate_pizza
+if TYPE_CHECKING:
+    from pathlib import Path
 
-os.environ["LATENCY_ENABLED"] = "1"  # enable latency only in cli mode
+    from pizza.pizza_menu import LowerKeyMenu
+    from pizza.profiling import Profiler
+    from pizza.server import ServeClient
+    from pizza.storage import SQLiteStore
 
 
 @click.group()
-def cli() -> None:
+@click.option(
+    "--metrics",
+    type=click.Path(dir_okay=False),
+    help="Save metrics of heavy tasks at exit: JSON if *.json, else Prometheus.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Profile the command and print time of heavy tasks to stderr.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help="Save collapsed stacks of the profile for flamegraph tools.",
+)
+@click.option(
+    "--db",
+    type=click.Path(dir_okay=False),
+    help="Keep orders in this SQLite database, so they survive restarts.",
+)
+@click.option(
+    "--menu",
+    "menu_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Use menu from a TOML or JSON file instead of the default one.",
+)
+@click.pass_context
+def cli(  # noqa: PLR0913
+    ctx: click.Context,
+    *,
+    metrics: str | None,
+    profile: bool,
+    profile_output: str | None,
+    db: str | None,
+    menu_path: str | None,
+) -> None:
     """Look at the menu and order your favourite pizzas.
     Deliver or pick up - you choose!
     """
+    ctx.ensure_object(dict)
+    ctx.obj["db"] = _as_path(db)
+    ctx.obj["menu_path"] = _as_path(menu_path)
+    if metrics is not None:
+        ctx.call_on_close(lambda: _write_metrics(metrics))
+    if profile or profile_output is not None:
+        from pizza.profiling import Profiler
+
+        profiler = Profiler()
+        output = _as_path(profile_output)
+        ctx.call_on_close(lambda: _finish_profile(profiler, output))
+        profiler.start()
+
+
+def _as_path(path: str | None) -> "Path | None":
+    """Convert path of an option to Path, None stays None."""
+    if path is None:
+        return None
+    from pathlib import Path
+
+    return Path(path)
+
+
+def _default_socket_path() -> str:
+    """Return socket path from PIZZA_SERVE_SOCKET or a path in the temp dir.
+
+    Empty PIZZA_SERVE_SOCKET means the daemon is not used.
+    """
+    path = os.environ.get("PIZZA_SERVE_SOCKET")
+    if path is None:
+        import tempfile
+
+        return os.path.join(tempfile.gettempdir(), f"pizza-{os.getuid()}.sock")
+    return path
+
+
+def _get_menu(ctx: click.Context) -> "LowerKeyMenu":
+    """Return menu from --menu file or the default one."""
+    if ctx.obj["menu_path"] is None:
+        from pizza.pizza_menu import pizza_menu
+
+        return pizza_menu
+    from pizza.menu_loader import load_menu
+
+    try:
+        return load_menu(ctx.obj["menu_path"])
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--menu") from exc
+
+
+def _write_metrics(path: str) -> None:
+    """Save metrics of heavy tasks."""
+    from pathlib import Path
+
+    from pizza.metrics import REGISTRY
+
+    REGISTRY.write(Path(path))
+
+
+def _finish_profile(profiler: "Profiler", output: "Path | None") -> None:
+    """Stop profiler, print report and save collapsed stacks if requested."""
+    profiler.stop()
+    click.echo(profiler.report(), err=True)
+    if output is not None:
+        profiler.write_collapsed(output)
 
 
 @cli.command()
-def menu() -> None:
+@click.option("--page", default=1, help="Page of the menu to show.")
+@click.option("--per-page", type=int, default=None, help="Pizzas on a page.")
+@click.pass_context
+def menu(ctx: click.Context, *, page: int, per_page: int | None) -> None:
     """Print available food."""
-    print(full_menu_str)
+    from pizza.pizza_menu import render_menu
+
+    try:
+        print(render_menu(_get_menu(ctx), page=page, per_page=per_page))
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
 
 
 @cli.command()
 @click.option("--delivery", default=False, is_flag=True)
-@click.option("--size", default="L")
-@click.argument("pizza", nargs=1)
-def order(pizza: str, *, delivery: bool, size: str) -> None:
-    """Order a pizza from the menu. Choose pizza name and size."""
-    is_success, message = validate_pizza(pizza_name=pizza, size=size)
-    if not is_success:
-        print(message)
+@click.option("--size", default="L", help="Size for pizzas without :SIZE.")
+@click.option(
+    "--from-file",
+    type=click.File("r"),
+    help="Read orders from JSON lines (- for stdin), print results as JSON lines.",
+)
+@click.option(
+    "--idempotency-key",
+    help=(
+        "Key of the order for pizza serve, a retry with the same key "
+        "is not baked again. Needs a running daemon."
+    ),
+)
+@click.option(
+    "--workers",
+    default=1,
+    help="Processes with restaurant shards for --from-file.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    help="Cancel the order if it isn't done in this many seconds.",
+)
+@click.argument("pizzas", nargs=-1)
+@click.pass_context
+def order(  # noqa: PLR0913
+    ctx: click.Context,
+    pizzas: tuple[str, ...],
+    *,
+    delivery: bool,
+    size: str,
+    from_file: TextIO | None,
+    workers: int,
+    idempotency_key: str | None,
+    timeout: float | None,
+) -> None:
+    """Order pizzas from the menu. Choose pizza name and size.
+
+    Every pizza is NAME or NAME:SIZE, e.g. pizza order Pepperoni Margherita:XL.
+    All pizzas are baked together and delivered or picked up at once.
+    With --timeout an order that takes longer is cancelled.
+    With --from-file every line is an order, --delivery and --size
+    are defaults for lines without them. Clients are split between
+    --workers restaurants in separate processes.
+    """
+    if bool(pizzas) == (from_file is not None):
+        msg = "Give either pizzas or --from-file"
+        raise click.UsageError(msg)
+    if from_file is not None:
+        _order_from_file(
+            ctx,
+            from_file,
+            is_delivery=delivery,
+            size=size,
+            workers=workers,
+        )
+        return
+
+    from pizza.pizza_menu import parse_pizza_spec
+
+    items = [parse_pizza_spec(spec, size) for spec in pizzas]
+    socket_path = _default_socket_path()
+    if (
+        ctx.obj["menu_path"] is None
+        and ctx.obj["db"] is None
+        and socket_path
+        and os.path.exists(socket_path)  # don't load the client without a daemon
+    ):
+        from pizza.server import ServeClient
+
+        daemon = ServeClient.connect(socket_path)
+        if daemon is not None:
+            with daemon:
+                _order_from_daemon(
+                    daemon,
+                    items,
+                    is_delivery=delivery,
+                    idempotency_key=idempotency_key,
+                    timeout=timeout,
+                )
+            return
+    if idempotency_key is not None:  # a new process remembers no orders
+        msg = "--idempotency-key needs a running pizza serve"
+        raise click.UsageError(msg)
+
+    from pizza.business import Client, Restaurant
+    from pizza.deadlines import DeadlineExceeded
+    from pizza.pizza_menu import validate_pizza
+
+    _configure_tracing(ctx)
+    food_menu = _get_menu(ctx)
+    messages = []
+    for pizza_name, pizza_size in items:
+        is_success, message = validate_pizza(
+            pizza_name=pizza_name,
+            size=pizza_size,
+            menu=food_menu,
+        )
+        if not is_success:
+            print(message)
+            sys.exit()
+        messages.append(message)
+
+    restaurant = Restaurant(food_menu, store=_get_store(ctx))
+    client = restaurant.clients.intern(
+        Client(restaurant=restaurant, is_delivery=delivery),
+    )
+    print("You want to order", ", ".join(messages))
+    try:
+        client.make_orders(items, timeout=timeout)
+    except DeadlineExceeded:
+        print(f"Order took longer than {timeout} seconds and was cancelled")
+        sys.exit()
+
+
+def _configure_tracing(ctx: click.Context, **layers: bool) -> None:
+    """Trace heavy tasks as environment variables say until the command ends.
+
+    Latency is on in cli mode, unless LATENCY_ENABLED=0. The environment
+    is read once, layers are overridden by keyword arguments.
+    """
+    import dataclasses
+
+    from pizza.decorators import TracingConfig, set_tracing
+
+    os.environ.setdefault("LATENCY_ENABLED", "1")  # also for worker processes
+    config = dataclasses.replace(TracingConfig.from_env(), **layers)
+    previous = set_tracing(config)
+    ctx.call_on_close(lambda: set_tracing(previous))
+
+
+def _get_store(ctx: click.Context) -> "SQLiteStore | None":
+    """Open --db store closed with the context, None if it isn't set."""
+    if ctx.obj["db"] is None:
+        return None
+    from pizza.storage import SQLiteStore
+
+    store = SQLiteStore(ctx.obj["db"])
+    ctx.call_on_close(store.close)
+    return store
+
+
+def _order_from_file(
+    ctx: click.Context,
+    file: TextIO,
+    *,
+    is_delivery: bool,
+    size: str,
+    workers: int,
+) -> None:
+    """Stream orders from file and print a JSON line per order.
+
+    Heavy tasks run without spinner and timer, so stdout has only results,
+    and a summary is printed to stderr.
+    """
+    from pizza.ingest import ingest_orders
+
+    _configure_tracing(ctx, spinner=False, timer=False)
+    if workers > 1:
+        if ctx.obj["db"] is not None:
+            msg = "--db can't be used with several --workers"
+            raise click.UsageError(msg)
+        from pizza.cluster import RestaurantCluster
+
+        restaurant = RestaurantCluster(workers, menu_path=ctx.obj["menu_path"])
+        ctx.call_on_close(restaurant.close)
+    else:
+        from pizza.business import Restaurant
+
+        restaurant = Restaurant(  # type: ignore[assignment]
+            _get_menu(ctx),
+            store=_get_store(ctx),
+        )
+    start = time.perf_counter()
+    n_ok, n_failed = ingest_orders(
+        file,
+        restaurant,
+        sys.stdout,
+        is_delivery=is_delivery,
+        size=size,
+    )
+    seconds = time.perf_counter() - start
+    click.echo(
+        f"Processed {n_ok + n_failed} orders in {seconds:.2f} seconds, "
+        f"{n_failed} failed",
+        err=True,
+    )
+
+
+def _order_from_daemon(
+    daemon: "ServeClient",
+    items: list[tuple[str, str]],
+    *,
+    is_delivery: bool,
+    idempotency_key: str | None,
+    timeout: float | None,
+) -> None:
+    """Order through pizza serve and print the result."""
+    response = daemon.order(
+        items,
+        is_delivery=is_delivery,
+        idempotency_key=idempotency_key,
+        timeout=timeout,
+    )
+    if not response["ok"]:
+        print(response["error"])
         sys.exit()
+    print("You want to order", response["order"])
+    action = "Delivered" if is_delivery else "Picked up"
+    print(
+        f"{action} {len(response['pizzas'])} pizzas by pizza serve "
+        f"in {response['seconds']:.2f} seconds",
+    )
+
+
+@cli.command()
+@click.option("--socket", "socket_path", help="Unix socket to listen on.")
+@click.option("--ovens", default=4, help="Number of ovens of the restaurant.")
+@click.option("--couriers", default=4, help="Number of couriers.")
+@click.option(
+    "--warm",
+    default=0,
+    help="Capacity of the inventory of pizzas baked ahead of time, 0 is off.",
+)
+@click.option(
+    "--scheduled",
+    is_flag=True,
+    default=False,
+    help="Take the most urgent orders first by priority and deadline.",
+)
+@click.option(
+    "--hedge",
+    type=click.FloatRange(0, 1, min_open=True, max_open=True),
+    help="Send a second courier after this quantile of delivery time, e.g. 0.95.",
+)
+@click.pass_context
+def serve(  # noqa: PLR0913
+    ctx: click.Context,
+    *,
+    socket_path: str | None,
+    ovens: int,
+    couriers: int,
+    warm: int,
+    scheduled: bool,
+    hedge: float | None,
+) -> None:
+    """Run a daemon with one restaurant for all `pizza order` calls.
+
+    Orders of different calls share the kitchen and the stock,
+    and every order costs one round-trip instead of a new process.
+    With --warm, popular pizzas are baked ahead of time every second.
+    With --hedge, slow deliveries get a second courier, the first one wins.
+    """
+    import signal
+    import threading
+
+    from pizza.business import Restaurant
+    from pizza.kitchen import Kitchen
+    from pizza.server import OrderServer, restaurant_stats
+
+    _configure_tracing(ctx)
+    socket_path = socket_path or _default_socket_path()
+    if not socket_path:
+        msg = "Set --socket or PIZZA_SERVE_SOCKET"
+        raise click.UsageError(msg)
+    kitchen = Kitchen(n_ovens=ovens, n_couriers=couriers, scheduled=scheduled)
+    warm_inventory = None
+    if warm > 0:
+        from pizza.warm_inventory import WarmInventory
+
+        warm_inventory = WarmInventory(capacity=warm)
+    hedging = None
+    if hedge is not None:
+        from pizza.deadlines import HedgePolicy
+
+        hedging = HedgePolicy(quantile=hedge)
+    restaurant = Restaurant(
+        _get_menu(ctx),
+        kitchen=kitchen,
+        store=_get_store(ctx),
+        warm_inventory=warm_inventory,
+        hedging=hedging,
+    )
+    try:
+        server = OrderServer(socket_path, restaurant)
+    except RuntimeError as exc:
+        raise click.UsageError(str(exc)) from exc
+    click.echo(f"Serving orders on {socket_path}", err=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # clean up on kill
+    stopped = threading.Event()
+    if warm_inventory is not None:
+
+        def prebake_forever() -> None:
+            while not stopped.wait(1.0):
+                restaurant.prebake()
+
+        threading.Thread(target=prebake_forever, name="prebake", daemon=True).start()
+    with server, kitchen:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            click.echo("Stopped", err=True)
+        finally:
+            stopped.set()
+            click.echo(f"Stats: {restaurant_stats(restaurant)}", err=True)
+
+
+def parse_mix(mix: tuple[str, ...]) -> dict[str, float]:
+    """Parse weights of pizzas NAME=WEIGHT into a dict."""
+    weights = {}
+    for spec in mix:
+        pizza_name, sep, weight = spec.rpartition("=")
+        if not sep:
+            msg = f"{spec!r} should look like NAME=WEIGHT"
+            raise click.BadParameter(msg, param_hint="--mix")
+        try:
+            value = float(weight)
+        except ValueError as exc:
+            msg = f"weight of {pizza_name!r} should be a number"
+            raise click.BadParameter(msg, param_hint="--mix") from exc
+        if not 0 <= value < float("inf"):  # also rejects nan
+            msg = f"weight of {pizza_name!r} should be a finite number >= 0"
+            raise click.BadParameter(msg, param_hint="--mix")
+        weights[pizza_name] = value
+    return weights
+
+
+@cli.command(name="simulate")
+@click.option("--orders", "n_orders", default=10_000, help="Number of orders.")
+@click.option("--rate", default=30.0, help="Mean number of orders per minute.")
+@click.option(
+    "--mix",
+    multiple=True,
+    help="Pizza weight as NAME=WEIGHT, can be repeated. All equal by default.",
+)
+@click.option("--delivery-ratio", default=0.5, help="Share of delivered orders.")
+@click.option("--ovens", default=2, help="Number of ovens.")
+@click.option("--couriers", default=2, help="Number of couriers.")
+@click.option("--seed", type=int, default=None, help="Seed for reproducible runs.")
+@click.pass_context
+def simulate_cmd(  # noqa: PLR0913
+    ctx: click.Context,
+    *,
+    n_orders: int,
+    rate: float,
+    mix: tuple[str, ...],
+    delivery_ratio: float,
+    ovens: int,
+    couriers: int,
+    seed: int | None,
+) -> None:
+    """Simulate the restaurant and report throughput, queues and latency."""
+    from pizza.simulation import SimulationConfig, format_report, simulate
+
+    config = SimulationConfig(
+        n_orders=n_orders,
+        rate_per_min=rate,
+        mix=parse_mix(mix),
+        delivery_ratio=delivery_ratio,
+        n_ovens=ovens,
+        n_couriers=couriers,
+        seed=seed,
+    )
+    try:
+        report = simulate(config, _get_menu(ctx))
+    except KeyError as exc:
+        msg = f"No such pizza on the menu: {exc}"
+        raise click.BadParameter(msg, param_hint="--mix") from exc
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    print(format_report(report))
+
+
+@cli.command(name="bench")
+@click.option("--number", default=10_000, help="Calls per repeat of a benchmark.")
+@click.option(
+    "--only",
+    multiple=True,
+    help="Run only these benchmarks, can be repeated.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="Save results as JSON.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare with results saved earlier, fail on regressions.",
+)
+@click.option("--tolerance", default=0.2, help="Allowed slowdown against baseline.")
+def bench_cmd(
+    *,
+    number: int,
+    only: tuple[str, ...],
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    """Measure speed of the order hot path and overhead of decorators."""
+    from pathlib import Path
+
+    from pizza import bench as benchmarks
 
-    restaurant = Restaurant(pizza_menu)
-    client = Client(restaurant=restaurant, is_delivery=delivery)
-    print("You want to order", message)
-    client.make_order(pizza)
+    if unknown := set(only) - benchmarks.BENCHMARKS.keys():
+        msg = (
+            f"unknown benchmarks {', '.join(sorted(unknown))}, "
+            f"choose from {', '.join(benchmarks.BENCHMARKS)}"
+        )
+        raise click.BadParameter(msg, param_hint="--only")
+    results = benchmarks.run_benchmarks(number=number, names=list(only) or None)
+    baseline_results = benchmarks.load_results(Path(baseline)) if baseline else None
+    print(benchmarks.format_results(results, baseline_results))
+    if output:
+        benchmarks.save_results(results, Path(output))
+    if baseline_results is not None:
+        regressions = benchmarks.compare(results, baseline_results, tolerance)
+        for name, ratio in regressions.items():
+            print(f"Regression: {name} is {ratio:.2f}x slower than baseline")
+        if regressions:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""Clocks for synthetic latency and time measuring.
+
+WallClock uses real time. VirtualClock moves time forward instantly on sleep,
+so simulated durations are reported without waiting for them.
+The clock in use is global and can be swapped with set_clock or use_clock.
+"""
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Source of time and a way to wait for it."""
+
+    def now(self) -> float:
+        """Return monotonic time in seconds."""
+        ...
+
+    def now_ns(self) -> int:
+        """Return monotonic time in nanoseconds."""
+        ...
+
+    def sleep(self, seconds: float) -> None:
+        """Block for seconds."""
+        ...
+
+    async def asleep(self, seconds: float) -> None:
+        """Wait for seconds without blocking the event loop."""
+        ...
+
+
+class WallClock:
+    """Real time: perf_counter, time.sleep and asyncio.sleep."""
+
+    def now(self) -> float:
+        """Return value of the performance counter in seconds."""
+        return time.perf_counter()
+
+    def now_ns(self) -> int:
+        """Return value of the performance counter in nanoseconds."""
+        return time.perf_counter_ns()
+
+    def sleep(self, seconds: float) -> None:
+        """Block the thread for seconds."""
+        time.sleep(seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        """Wait for seconds in the event loop."""
+        import asyncio
+
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """Simulated time that jumps forward instead of sleeping.
+
+    Sleeps of different threads and tasks are added one after another,
+    so the result is deterministic and doesn't depend on real scheduling.
+
+    Attributes:
+        slept: total simulated seconds of all sleeps
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        """Initialize virtual time with start in seconds."""
+        self._now = start
+        self.slept = 0.0
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        """Return current virtual time in seconds."""
+        return self._now
+
+    def now_ns(self) -> int:
+        """Return current virtual time in nanoseconds."""
+        return round(self._now * 1e9)
+
+    def sleep(self, seconds: float) -> None:
+        """Move virtual time forward by seconds and return immediately."""
+        with self._lock:
+            self._now += seconds
+            self.slept += seconds
+
+    async def asleep(self, seconds: float) -> None:
+        """Move virtual time forward and give control to other tasks."""
+        self.sleep(seconds)
+        import asyncio
+
+        await asyncio.sleep(0)
+
+
+_clock: Clock = WallClock()
+
+
+def get_clock() -> Clock:
+    """Return the clock in use."""
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Use clock from now on and return the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """Use clock inside the with block."""
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
@@ -0,0 +1,251 @@
+"""Restaurant sharded over worker processes to use all cores.
+
+Every worker process owns a Restaurant shard. Clients are routed
+to shards by a stable hash of their normalized key, so all orders
+of a client go to the same shard and its stock. Requests and responses
+are dicts of primitives of the pizza serve protocol (see pizza.server),
+so only small messages are pickled, never restaurants, clients or pizzas.
+Workers don't print spinners or timings of heavy tasks, their stdout
+is the stdout of the parent, e.g. JSON lines of pizza order --from-file.
+If a worker dies, orders of its shard get error responses instead of
+waiting forever.
+"""
+import dataclasses
+import itertools
+import multiprocessing
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from multiprocessing import connection
+from pathlib import Path
+from typing import Any
+
+from pizza.business import ClientKey, Restaurant, client_key
+from pizza.decorators import TracingConfig, get_tracing, set_tracing
+from pizza.pizza_menu import LowerKeyMenu, pizza_menu
+
+
+def shard_for(key: ClientKey, n_shards: int) -> int:
+    """Return shard of a client, the same in all processes and runs.
+
+    crc32 is used instead of hash, which is randomized per process for str.
+    """
+    name, phone_number = key
+    return zlib.crc32(f"{name}\0{phone_number}".encode()) % n_shards
+
+
+def _load_menu(menu_path: Path | None) -> LowerKeyMenu:
+    """Load menu from a file or return the default one."""
+    if menu_path is None:
+        return pizza_menu
+    from pizza.menu_loader import load_menu
+
+    return load_menu(menu_path)
+
+
+def _run_shard(
+    menu_path: Path | None,
+    tracing: TracingConfig,
+    requests: multiprocessing.Queue,
+    responses: multiprocessing.Queue,
+) -> None:
+    """Serve requests of one shard until None is received.
+
+    Menu is loaded by the worker, generated pizza types can't be pickled.
+    Tracing is given explicitly, spawned workers don't inherit it.
+    """
+    from pizza.server import handle_request
+
+    set_tracing(tracing)
+    restaurant = Restaurant(_load_menu(menu_path))
+    while (message := requests.get()) is not None:
+        request_id, request = message
+        try:
+            response = handle_request(restaurant, request)
+        except Exception as exc:  # the worker must stay alive
+            response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        responses.put((request_id, response))
+
+
+class RestaurantCluster:
+    """Restaurant shards in N worker processes behind one interface.
+
+    Responses of workers are collected by a thread of this process
+    that completes futures of requests. Another thread watches workers:
+    when one exits, it sends a marker after the last responses
+    of the worker, and the collector fails the requests still pending
+    in its shard.
+
+    Attributes:
+        n_shards: number of worker processes
+        menu: menu of all shards, e.g. to validate orders before sending them
+    """
+
+    def __init__(self, n_shards: int, *, menu_path: Path | None = None) -> None:
+        """Start worker processes with the default menu or a menu file.
+
+        Workers have latency of the tracing config in use,
+        without spinners and timings.
+
+        Raises:
+            ValueError: if n_shards is not positive.
+        """
+        if n_shards < 1:
+            msg = "Cluster should have at least one shard"
+            raise ValueError(msg)
+        self.n_shards = n_shards
+        self.menu = _load_menu(menu_path)
+        tracing = dataclasses.replace(get_tracing(), spinner=False, timer=False)
+        self._responses: multiprocessing.Queue = multiprocessing.Queue()
+        self._requests: list[multiprocessing.Queue] = []
+        self._workers: list[multiprocessing.Process] = []
+        for shard in range(n_shards):
+            requests: multiprocessing.Queue = multiprocessing.Queue()
+            worker = multiprocessing.Process(
+                target=_run_shard,
+                args=(menu_path, tracing, requests, self._responses),
+                name=f"restaurant-shard-{shard}",
+                daemon=True,
+            )
+            worker.start()
+            self._requests.append(requests)
+            self._workers.append(worker)
+        self._ids = itertools.count()
+        self._pending: dict[int, tuple[int, Future]] = {}  # id -> shard, future
+        self._dead_shards: dict[int, str] = {}  # shard -> error of its requests
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(
+            target=self._collect,
+            name="cluster-collector",
+            daemon=True,
+        )
+        self._collector.start()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            name="cluster-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        """Send a marker with the shard of every exited worker to the collector.
+
+        The marker goes through the queue of responses, so the collector
+        gets it after responses the worker sent before it exited.
+        """
+        sentinels = {
+            worker.sentinel: shard for shard, worker in enumerate(self._workers)
+        }
+        while sentinels:
+            for sentinel in connection.wait(list(sentinels)):
+                self._responses.put((None, sentinels.pop(sentinel)))
+
+    def _collect(self) -> None:
+        """Complete futures with responses of workers until None is received."""
+        while (message := self._responses.get()) is not None:
+            request_id, response = message
+            if request_id is None:
+                self._fail_shard(response)
+                continue
+            with self._lock:
+                _, future = self._pending.pop(request_id)
+            future.set_result(response)
+
+    def _fail_shard(self, shard: int) -> None:
+        """Complete pending requests of a shard whose worker has exited."""
+        exitcode = self._workers[shard].exitcode
+        error = f"Worker of shard {shard} exited with code {exitcode}"
+        with self._lock:
+            self._dead_shards[shard] = error
+            failed = [
+                request_id
+                for request_id, (request_shard, _) in self._pending.items()
+                if request_shard == shard
+            ]
+            futures = [self._pending.pop(request_id)[1] for request_id in failed]
+        for future in futures:
+            future.set_result({"ok": False, "error": error})
+
+    def submit(
+        self,
+        items: list[tuple[str, str]],
+        *,
+        is_delivery: bool,
+        name: str = "Pavel",
+        phone_number: str = "+1337",
+        idempotency_key: str | None = None,
+    ) -> Future:
+        """Send order to the shard of the client and return future of response.
+
+        Response is a dict like the one of pizza serve: "ok" and "order",
+        "pizzas" and "seconds", or "ok" false and "error".
+        Retries of a client with the same idempotency_key go to the same
+        shard and get the original response. If the worker of the shard
+        has exited, the response is an error.
+        """
+        request: dict[str, Any] = {
+            "op": "order",
+            "pizzas": items,
+            "delivery": is_delivery,
+            "name": name,
+            "phone_number": phone_number,
+        }
+        if idempotency_key is not None:
+            request["idempotency_key"] = idempotency_key
+        future: Future = Future()
+        shard = shard_for(client_key(name, phone_number), self.n_shards)
+        with self._lock:
+            error = self._dead_shards.get(shard)
+            if error is None:
+                request_id = next(self._ids)
+                self._pending[request_id] = (shard, future)
+        if error is not None:
+            future.set_result({"ok": False, "error": error})
+            return future
+        self._requests[shard].put((request_id, request))
+        return future
+
+    def order(
+        self,
+        items: list[tuple[str, str]],
+        *,
+        is_delivery: bool,
+        name: str = "Pavel",
+        phone_number: str = "+1337",
+        idempotency_key: str | None = None,
+    ) -> dict[str, Any]:
+        """Order items and wait for the response, see submit."""
+        return self.submit(
+            items,
+            is_delivery=is_delivery,
+            name=name,
+            phone_number=phone_number,
+            idempotency_key=idempotency_key,
+        ).result()
+
+    def close(self, *, timeout: float = 30.0) -> None:
+        """Finish submitted orders and stop workers.
+
+        Workers that don't finish in timeout seconds are terminated,
+        their pending orders get error responses.
+        """
+        for requests in self._requests:
+            requests.put(None)
+        end = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(end - time.monotonic(), 0))
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        self._watcher.join()
+        self._responses.put(None)
+        self._collector.join()
+
+    def __enter__(self) -> "RestaurantCluster":
+        """Use cluster as a context manager which closes it at exit."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Finish orders and stop workers at the end of the with block."""
+        self.close()
@@ -8,6 +8,10 @@ MAX_LATENCY_MS = 3_000
 TEST_LATENCY_MS = 5
 TEST_LATENCY_S = TEST_LATENCY_MS / 1_000
 
+# Budget of import time of a CLI command at cold start: all modules it imports
+# on top of the interpreter and click, stdlib modules included
+IMPORT_TIME_BUDGET_MS = 25
+
 # Lines of messages in stdout (some of them can be calculated from info messages)
 PIZZA_SIZES_LINES = 1  # extra line under menu about pizza sizes available
 INFO_LINES = 1  # info back to user what he orders
@@ -0,0 +1,219 @@
+"""Deadlines of orders and hedged deliveries.
+
+A deadline is set for a block of code with the deadline context manager
+and is kept in a context variable, so it reaches every heavy task called
+from the block: synthetic latency of traced methods sleeps only until
+the deadline and raises DeadlineExceeded. Work submitted to other threads
+keeps the deadline of its caller if it is wrapped with bind.
+
+HedgePolicy bounds tail latency of deliveries: if a courier hasn't
+delivered by a high quantile of past delivery times, a second courier
+is sent and the first one to arrive wins.
+"""
+import functools
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from pizza.clock import get_clock
+from pizza.metrics import Histogram
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+
+_deadline: ContextVar[float | None] = ContextVar("pizza_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised by a heavy task that can't finish before the deadline."""
+
+
+@contextmanager
+def deadline(timeout_s: float | None) -> Iterator[float | None]:
+    """Run the block with a deadline timeout_s seconds from now.
+
+    A deadline of an outer block is kept if it is earlier.
+    None means no new deadline.
+
+    Yields:
+        deadline by the clock in use, None if there is none.
+    """
+    at = _deadline.get()
+    if timeout_s is not None:
+        new_at = get_clock().now() + timeout_s
+        at = new_at if at is None else min(at, new_at)
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+def current() -> float | None:
+    """Return deadline by the clock in use, None if there is no deadline."""
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """Return seconds left before the deadline, None if there is no deadline."""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - get_clock().now()
+
+
+def check() -> None:
+    """Raise DeadlineExceeded if the deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded
+
+
+def sleep(seconds: float) -> None:
+    """Sleep by the clock in use, but not past the deadline.
+
+    Raises:
+        DeadlineExceeded: if the deadline comes first.
+    """
+    left = remaining()
+    if left is None or seconds < left:
+        get_clock().sleep(seconds)
+        return
+    get_clock().sleep(max(left, 0))
+    raise DeadlineExceeded
+
+
+async def asleep(seconds: float) -> None:
+    """Wait without blocking the event loop, but not past the deadline.
+
+    Raises:
+        DeadlineExceeded: if the deadline comes first.
+    """
+    left = remaining()
+    if left is None or seconds < left:
+        await get_clock().asleep(seconds)
+        return
+    await get_clock().asleep(max(left, 0))
+    raise DeadlineExceeded
+
+
+def wait_result(future: "Future[T]") -> T:
+    """Wait for result of future, but not past the deadline.
+
+    Work of the future keeps running, it should be bound to the deadline too.
+
+    Raises:
+        DeadlineExceeded: if the deadline comes first.
+    """
+    left = remaining()
+    try:
+        return future.result(timeout=None if left is None else max(left, 0))
+    except DeadlineExceeded:
+        raise
+    except TimeoutError as exc:  # futures time out with the builtin one
+        raise DeadlineExceeded from exc
+
+
+def bind(fn: Callable[[], T]) -> Callable[[], T]:
+    """Return fn that runs with the current deadline in any thread."""
+    at = _deadline.get()
+    if at is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound() -> T:
+        token = _deadline.set(at)
+        try:
+            return fn()
+        finally:
+            _deadline.reset(token)
+
+    return bound
+
+
+class HedgePolicy:
+    """Sends a second courier when the first one is slower than usual.
+
+    Durations of deliveries are collected in a histogram. Once there are
+    min_samples of them, a delivery that takes longer than their quantile
+    gets a backup attempt and the result of the first finished attempt
+    is used, the other one finds nothing to deliver.
+
+    Attributes:
+        quantile: quantile of delivery time after which to hedge
+        min_samples: deliveries to observe before hedging starts
+        hedged: number of deliveries that got a second courier
+        histogram: durations of delivery attempts
+    """
+
+    def __init__(
+        self,
+        *,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        max_attempts_in_flight: int = 16,
+    ) -> None:
+        """Initialize policy without observations."""
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.hedged = 0
+        self.histogram = Histogram()
+        self._max_workers = max_attempts_in_flight
+        self._pool: Any = None
+        self._lock = threading.Lock()
+
+    def delay_s(self) -> float | None:
+        """Return seconds to wait before hedging, None if not enough samples."""
+        if self.histogram.count < self.min_samples:
+            return None
+        return self.histogram.quantile(self.quantile)
+
+    def _timed(self, fn: Callable[[], T]) -> Callable[[], T]:
+        """Return fn that reports its duration to the histogram."""
+
+        def timed() -> T:
+            clock = get_clock()
+            start = clock.now_ns()
+            result = fn()
+            self.histogram.observe_ns(clock.now_ns() - start)
+            return result
+
+        return bind(timed)
+
+    def run(self, deliver: Callable[[], T]) -> T:
+        """Deliver, with a second attempt if the first one is too slow.
+
+        deliver should be safe to run twice, e.g. the second attempt
+        finds the food already delivered.
+        """
+        delay = self.delay_s()
+        if delay is None:
+            return self._timed(deliver)()
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    self._max_workers,
+                    thread_name_prefix="hedge",
+                )
+        attempts = [self._pool.submit(self._timed(deliver))]
+        done, _ = wait(attempts, timeout=delay)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            attempts.append(self._pool.submit(self._timed(deliver)))
+            done, _ = wait(attempts, return_when=FIRST_COMPLETED)
+        return next(iter(done)).result()
+
+    def stats(self) -> dict[str, Any]:
+        """Return number of deliveries, hedged ones and the hedging delay."""
+        return {
+            "deliveries": self.histogram.count,
+            "hedged": self.hedged,
+            "delay_s": self.delay_s(),
+        }
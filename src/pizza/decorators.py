@@ -5,47 +5,149 @@ but also check global variable. Current implementation is unnecessary convoluted
 and unpythonic (because of procedural generation methods using setattr, getattr).
 """
 import functools
+import inspect
 import os
 import random
-import time
-from collections.abc import Callable
+import threading
+import weakref
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from functools import reduce
-from typing import Any, TypedDict
+from typing import Any, NotRequired, TypedDict
 
+from pizza import deadlines
+from pizza.clock import get_clock
 from pizza.constants import MAX_LATENCY_MS, MIN_LATENCY_MS, TEST_LATENCY_MS
+from pizza.metrics import REGISTRY, MetricsRegistry
 from pizza.spinner import add_spinner
 
 
-def add_latency(fn) -> Callable:
-    """Add random latency to a class method to simulate real work."""
+@dataclass(frozen=True, slots=True)
+class TracingConfig:
+    """Layers that trace_heavy_tasks adds to heavy tasks.
 
-    @functools.wraps(fn)
-    def wrapper(self, *args, **kwargs):
-        """Run function and add random latency from uniform distribution.
+    Attributes:
+        latency: add random synthetic latency
+        test_latency: latency is always TEST_LATENCY_MS, for test purposes
+        spinner: show spinner while the task runs
+        timer: print duration of the task and report it to the metrics registry
+    """
+
+    latency: bool = False
+    test_latency: bool = False
+    spinner: bool = True
+    timer: bool = True
+
+    @classmethod
+    def from_env(cls) -> "TracingConfig":
+        """Read config from environment variables, "1" is on.
 
-        min_ms: minimum latency in ms
-        max_ms: maximum latency in ms
-        If LATENCY_ENABLED=0, then don't add latency
-            If LATENCY_FOR_TEST=1, then set min_ms, max_ms as LATENCY_FOR_TEST
-                for test purposes
+        LATENCY_ENABLED and LATENCY_FOR_TEST are off by default,
+        SPINNER_ENABLED and TIMER_ENABLED are on.
         """
+        return cls(
+            latency=os.getenv("LATENCY_ENABLED", "0") == "1",
+            test_latency=os.getenv("LATENCY_FOR_TEST", "0") == "1",
+            spinner=os.getenv("SPINNER_ENABLED", "1") == "1",
+            timer=os.getenv("TIMER_ENABLED", "1") == "1",
+        )
+
+    @classmethod
+    def off(cls) -> "TracingConfig":
+        """Return config without any layers, heavy tasks are plain methods."""
+        return cls(latency=False, spinner=False, timer=False)
+
+
+_tracing = TracingConfig.from_env()
+# classes decorated by trace_heavy_tasks -> original class and params
+_traced_classes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_tracing_lock = threading.Lock()
+
+
+def get_tracing() -> TracingConfig:
+    """Return the tracing config in use."""
+    return _tracing
 
-        min_ms = MIN_LATENCY_MS
-        max_ms = MAX_LATENCY_MS
 
-        if os.getenv("LATENCY_ENABLED", "0") == "1":
-            if os.getenv("LATENCY_FOR_TEST", "0") == "1":
-                min_ms = TEST_LATENCY_MS
-                max_ms = TEST_LATENCY_MS
+def set_tracing(config: TracingConfig) -> TracingConfig:
+    """Use config from now on and return the previous one.
 
-            smoothness = 1000
-            # imitate uniform distribution without numpy
-            seconds_sleep = random.randint(
-                min_ms * smoothness,
-                max_ms * smoothness,
-            ) / (1000 * smoothness)
+    Methods of all classes decorated by trace_heavy_tasks are rebuilt,
+    so disabled layers are not called at all.
+    """
+    global _tracing
+    with _tracing_lock:
+        previous, _tracing = _tracing, config
+        for traced_cls, (cls, params) in list(_traced_classes.items()):
+            _trace_methods(traced_cls, cls, params, config)
+    return previous
+
+
+@contextmanager
+def use_tracing(config: TracingConfig) -> Iterator[TracingConfig]:
+    """Use tracing config inside the with block."""
+    previous = set_tracing(config)
+    try:
+        yield config
+    finally:
+        set_tracing(previous)
 
-            time.sleep(seconds_sleep)
+
+def _latency_seconds() -> float | None:
+    """Draw random latency in seconds or return None if latency is disabled.
+
+    Latency is from MIN_LATENCY_MS to MAX_LATENCY_MS
+    or TEST_LATENCY_MS if test_latency of the tracing config is on.
+    """
+    if not _tracing.latency:
+        return None
+
+    min_ms = MIN_LATENCY_MS
+    max_ms = MAX_LATENCY_MS
+    if _tracing.test_latency:
+        min_ms = TEST_LATENCY_MS
+        max_ms = TEST_LATENCY_MS
+
+    smoothness = 1000
+    # imitate uniform distribution without numpy
+    return random.randint(
+        min_ms * smoothness,
+        max_ms * smoothness,
+    ) / (1000 * smoothness)
+
+
+def add_latency(fn) -> Callable:
+    """Add random latency to a class method to simulate real work.
+
+    Coroutine functions get non-blocking latency (asyncio.sleep),
+    so many of them can wait concurrently in one event loop.
+    Latency goes through the clock in use, so it can be virtual.
+    Latency doesn't go past the deadline of the caller (see pizza.deadlines),
+    the method raises DeadlineExceeded instead of running late.
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(self, *args, **kwargs):
+            """Await random latency from uniform distribution and run coroutine."""
+            seconds_sleep = _latency_seconds()
+            if seconds_sleep is None:
+                deadlines.check()
+            else:
+                await deadlines.asleep(seconds_sleep)
+            return await fn(self, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        """Run function and add random latency from uniform distribution."""
+        seconds_sleep = _latency_seconds()
+        if seconds_sleep is None:
+            deadlines.check()
+        else:
+            deadlines.sleep(seconds_sleep)
 
         return fn(self, *args, **kwargs)
 
@@ -53,9 +155,20 @@ def add_latency(fn) -> Callable:
 
 
 class LogTimeDecorator:
-    """Decorator to track and log time of function execution"""
+    """Decorator to track and log time of function execution.
 
-    def __init__(self, str_template: str = "", *, is_return_time: bool) -> None:
+    Time is measured by the clock in use, so it can be virtual.
+    """
+
+    def __init__(
+        self,
+        str_template: str = "",
+        *,
+        is_return_time: bool,
+        task: str = "",
+        pizza_types: Callable[..., Iterable[str]] | None = None,
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
         """Initialization decorator with parameters
 
         Args:
@@ -64,12 +177,37 @@ class LogTimeDecorator:
                 If provided, then print it, else: do not print
             is_return_time:
                 if true, add time as a second return value
+            task: if provided, report duration to the metrics registry
+                with this task label
+            pizza_types: function of the arguments of the decorated function
+                returning names of pizzas it works with, duration is reported
+                for every pizza type. Called before the function.
+            registry: registry of metrics to report to
         """
         self.str_template = str_template
         self.is_return_time = is_return_time
+        self.task = task
+        self.pizza_types = pizza_types
+        self.registry = registry
 
     def __call__(self, fn: Callable) -> Callable:
         """Decorate provided function"""
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_log_time(
+                *args: Any,
+                **kwargs: Any,
+            ) -> tuple[Any, float] | Any:
+                """Await coroutine with custom parameters, same as log_time."""
+                clock = get_clock()
+                pizza_types = self._get_pizza_types(args, kwargs)
+                time_start = clock.now_ns()
+                result = await fn(*args, **kwargs)
+                duration_ns = clock.now_ns() - time_start
+                return self._finish(result, duration_ns, pizza_types)
+
+            return async_log_time
 
         @functools.wraps(fn)
         def log_time(*args: Any, **kwargs: Any) -> tuple[Any, float] | Any:
@@ -80,37 +218,105 @@ class LogTimeDecorator:
                 tuple (result, float time) if is_return_time=True
             """
 
-            time_start = time.time()
+            clock = get_clock()
+            pizza_types = self._get_pizza_types(args, kwargs)
+            time_start = clock.now_ns()
             result = fn(*args, **kwargs)
-            time_end = time.time()
-            execution_time = time_end - time_start
-            if self.str_template:
-                print(self.str_template.format(execution_time), end="\n")
-            if self.is_return_time:
-                return result, execution_time
-            return result
+            time_end = clock.now_ns()
+            return self._finish(result, time_end - time_start, pizza_types)
 
         return log_time
 
+    def _get_pizza_types(self, args: tuple, kwargs: dict) -> Iterable[str]:
+        """Names of pizzas to label duration with, if metrics are reported."""
+        if not self.task:
+            return ()
+        if self.pizza_types is None:
+            return ("all",)
+        return self.pizza_types(*args, **kwargs) or ("none",)
+
+    def _finish(
+        self,
+        result: Any,
+        duration_ns: int,
+        pizza_types: Iterable[str],
+    ) -> tuple[Any, float] | Any:
+        """Report and log execution time, return result (with time if requested)."""
+        for pizza_type in pizza_types:
+            self.registry.histogram(
+                "pizza_task_duration_seconds",
+                "Duration of heavy tasks",
+                task=self.task,
+                pizza=pizza_type,
+            ).observe_ns(duration_ns)
+        if self.task:
+            self.registry.counter(
+                "pizza_tasks_total",
+                "Number of finished heavy tasks",
+                task=self.task,
+            ).inc()
+        execution_time = duration_ns / 1e9
+        if self.str_template:
+            print(self.str_template.format(execution_time), end="\n")
+        if self.is_return_time:
+            return result, execution_time
+        return result
+
 
 class MsgForParam(TypedDict):
-    """Dict with required keys for tracing heavy tasks."""
+    """Dict with keys for tracing heavy tasks."""
 
     log_time_msg: str
     start_msg: str
     end_msg: str
+    pizza_types: NotRequired[Callable[..., Iterable[str]]]
 
 
 MethodName = str
 
 
+def _trace_methods(
+    traced_cls: type,
+    cls: type,
+    params: dict[MethodName, MsgForParam],
+    config: TracingConfig,
+) -> None:
+    """Set methods of traced_cls to methods of cls with layers enabled in config."""
+    for method_name, m_params in params.items():
+        func_list: list[Callable] = []
+        if config.latency:
+            func_list.append(add_latency)
+        if config.spinner:
+            func_list.append(add_spinner(m_params["start_msg"], m_params["end_msg"]))
+        if config.timer:
+            func_list.append(
+                LogTimeDecorator(
+                    m_params["log_time_msg"],
+                    is_return_time=False,
+                    task=method_name.lstrip("_"),
+                    pizza_types=m_params.get("pizza_types"),
+                ),
+            )
+        full_mod_method = (
+            reduce(  # apply every function consecutively to original_method
+                lambda o, func: func(o),
+                func_list,
+                getattr(cls, method_name),
+            )
+        )
+        setattr(traced_cls, method_name, full_mod_method)
+
+
 def trace_heavy_tasks(params: dict[MethodName, MsgForParam]) -> Callable:
     """Decorate a class adding functionality to selected methods.
 
     added functionality:
         synthetic latency
         spinner during task execution
-        time logging
+        time logging and reporting to the metrics registry
+
+    Layers are chosen by the tracing config in use and the methods
+    are rebuilt by set_tracing, without layers a method is the original one.
 
     Args:
         params: dict with key=method_name, value - map of keyword and text
@@ -118,34 +324,18 @@ def trace_heavy_tasks(params: dict[MethodName, MsgForParam]) -> Callable:
                 start_msg: Message while running
                 end_msg: Message at the finish
                 log_time_msg: String with placeholder to log time.
+                pizza_types: optional function of method's arguments
+                    returning names of pizzas to label metrics with.
     """
 
     def wrapper(cls):
         @functools.wraps(cls, updated=())
         class DecClass(cls):
-            pass
-
-        for method_name in params:
-            original_method = getattr(cls, method_name)
-            m_params = params[method_name]
-
-            apply_latency = add_latency
-            apply_spinner = add_spinner(m_params["start_msg"], m_params["end_msg"])
-            apply_timer = LogTimeDecorator(
-                m_params["log_time_msg"],
-                is_return_time=False,
-            )
-
-            func_list = [apply_latency, apply_spinner, apply_timer]
-            full_mod_method = (
-                reduce(  # apply every function consecutively to original_method
-                    lambda o, func: func(o),
-                    func_list,
-                    original_method,
-                )
-            )
-            setattr(DecClass, method_name, full_mod_method)
+            __slots__ = ()  # stay compact if cls is
 
+        with _tracing_lock:
+            _trace_methods(DecClass, cls, params, _tracing)
+            _traced_classes[DecClass] = (cls, params)
         return DecClass
 
     return wrapper
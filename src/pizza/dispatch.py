@@ -0,0 +1,135 @@
+"""Delivery dispatcher that batches ready orders into multi-stop trips.
+
+Orders waiting for delivery are collected during a short window
+(or until a trip is full) and delivered by one courier in one trip,
+so latency of a trip is paid once for several clients.
+"""
+import queue
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+_STOP = object()  # sentinel to stop dispatching
+
+
+class DeliveryDispatcher:
+    """Collects delivery requests and sends them out as multi-stop trips.
+
+    Attributes:
+        window_s: how long the first request in a trip waits for others
+        trip_capacity: max number of stops (clients) in one trip
+        n_couriers: number of trips that can be in progress at the same time
+        trips: number of trips made
+    """
+
+    def __init__(
+        self,
+        *,
+        window_s: float = 0.05,
+        trip_capacity: int = 8,
+        n_couriers: int = 1,
+    ) -> None:
+        """Initialize dispatcher. It starts working after bind."""
+        self.window_s = window_s
+        self.trip_capacity = trip_capacity
+        self.n_couriers = n_couriers
+        self.trips = 0
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._deliver_trip: Callable[[list[Any]], Any] | None = None
+        self._couriers: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+
+    def bind(self, deliver_trip: Callable[[list[Any]], Any]) -> None:
+        """Set function that makes a trip to clients and start dispatching.
+
+        Raises:
+            RuntimeError: if dispatcher is already bound.
+        """
+        if self._deliver_trip is not None:
+            msg = "Dispatcher is already bound to a restaurant"
+            raise RuntimeError(msg)
+        self._deliver_trip = deliver_trip
+        self._couriers = ThreadPoolExecutor(
+            self.n_couriers,
+            thread_name_prefix="courier",
+        )
+        self._thread = threading.Thread(
+            target=self._dispatch,
+            name="dispatcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def request_delivery(self, client: Hashable) -> Future:
+        """Ask for delivery of client's ready food. Future is done after the trip.
+
+        Raises:
+            RuntimeError: if dispatcher is not bound to a restaurant.
+        """
+        if self._deliver_trip is None:
+            msg = "Dispatcher should be bound before requesting deliveries"
+            raise RuntimeError(msg)
+        future: Future = Future()
+        self._requests.put((client, future))
+        return future
+
+    def _dispatch(self) -> None:
+        """Collect requests into trips until the dispatcher is closed."""
+        while True:
+            request = self._requests.get()
+            if request is _STOP:
+                return
+            trip = {request[0]: [request[1]]}  # client -> futures, keeps order
+            deadline = time.monotonic() + self.window_s
+            is_stopped = False
+            while len(trip) < self.trip_capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    is_stopped = True
+                    break
+                trip.setdefault(request[0], []).append(request[1])
+            self._send(trip)
+            if is_stopped:
+                return
+
+    def _send(self, trip: dict[Hashable, list[Future]]) -> None:
+        """Give trip to a free courier and resolve futures when it's done."""
+        self.trips += 1
+        futures = [f for client_futures in trip.values() for f in client_futures]
+
+        def run_trip() -> None:
+            try:
+                self._deliver_trip(list(trip))  # type: ignore[misc]
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+            else:
+                for future in futures:
+                    future.set_result(None)
+
+        self._couriers.submit(run_trip)  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        """Send remaining trips and stop dispatching."""
+        if self._thread is None:
+            return
+        self._requests.put(_STOP)
+        self._thread.join()
+        self._couriers.shutdown(wait=True)  # type: ignore[union-attr]
+        self._thread = None
+
+    def __enter__(self) -> "DeliveryDispatcher":
+        """Use dispatcher as a context manager which closes it at exit."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Send remaining trips and stop dispatching."""
+        self.close()
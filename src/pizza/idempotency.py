@@ -0,0 +1,136 @@
+"""Deduplication of retried orders by idempotency keys.
+
+A retry of an order carries the same key as the original one.
+Keys are chosen by clients, so callers scope them by client,
+e.g. (client key, idempotency key), and clients can't collide.
+IdempotencyCache runs the order once per key and returns the original
+result for duplicates, including duplicates that arrive while the original
+is still in progress. Keys are kept in LRU order for ttl_s seconds,
+at most max_size of finished ones, so memory is bounded and lookups are O(1).
+Keys of orders in progress are never evicted, or their duplicates
+would run again.
+"""
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from pizza.clock import get_clock
+
+T = TypeVar("T")
+
+
+class _Entry:
+    """Result of an order by key, pending until done is set."""
+
+    __slots__ = ("done", "error", "expires_at", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.expires_at: float | None = None  # set when the order is done
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def wait(self) -> Any:
+        """Wait for the order and return its result or raise its exception."""
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class IdempotencyCache:
+    """Bounded LRU cache of results of orders by idempotency key with TTL.
+
+    Expiration time is measured by the clock in use, so it can be virtual.
+
+    Attributes:
+        max_size: max number of keys, the least recently used finished
+            keys are evicted
+        ttl_s: seconds a key is remembered after its order is done
+        hits: number of duplicates that got the original result
+        misses: number of orders that were run
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_s: float = 600.0) -> None:
+        """Initialize empty cache.
+
+        Raises:
+            ValueError: if max_size or ttl_s is not positive.
+        """
+        if max_size < 1 or ttl_s <= 0:
+            msg = "Size and TTL of idempotency cache should be positive"
+            raise ValueError(msg)
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of remembered keys, including expired but not yet evicted."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check if a duplicate with key would get the original result."""
+        with self._lock:
+            return self._lookup(key, get_clock().now()) is not None
+
+    def _lookup(self, key: Hashable, now: float) -> _Entry | None:
+        """Return entry of a live key and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _evict_finished(self) -> None:
+        """Evict the least recently used key of a finished order, if any."""
+        for key, entry in self._entries.items():
+            if entry.expires_at is not None:
+                del self._entries[key]
+                return
+
+    def _forget(self, key: Hashable, entry: _Entry) -> None:
+        """Remove key if it still belongs to entry."""
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+
+    def run(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn once per key and return its result, also for duplicates.
+
+        Duplicates wait for the original if it is in progress. If the original
+        fails, its duplicates get the same exception and the key is forgotten,
+        so the next retry runs fn again.
+        """
+        with self._lock:
+            entry = self._lookup(key, get_clock().now())
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._entries[key] = own = _Entry()
+                if len(self._entries) > self.max_size:
+                    self._evict_finished()
+        if entry is not None:
+            return entry.wait()
+
+        try:
+            own.result = fn()
+        except BaseException as exc:
+            own.error = exc
+            with self._lock:
+                self._forget(key, own)
+            raise
+        finally:
+            own.expires_at = get_clock().now() + self.ttl_s
+            own.done.set()
+        return own.result
+
+    def stats(self) -> dict[str, Any]:
+        """Return number of keys, hits and misses."""
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
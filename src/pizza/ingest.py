@@ -0,0 +1,250 @@
+"""Streaming ingestion of orders from JSON lines.
+
+Every input line is one order:
+    {"pizzas": ["Pepperoni", "Margherita:XL"], "delivery": true,
+        "name": "Ann", "phone": "+1 555", "idempotency_key": "order-1"}
+Pizzas are NAME[:SIZE] strings or [name, size] pairs, other fields
+are optional. Lines with an idempotency key of an earlier order
+of the same client get its result without ordering again.
+Records flow through a pipeline of generators: parse -> validate -> process,
+and every order produces one JSON line with its result and timings.
+Only one order is in memory at a time, so files of any size are processed
+in constant memory.
+"""
+import collections
+import functools
+import json
+import time
+from collections.abc import Iterable, Iterator
+from typing import IO, TYPE_CHECKING, Any, NamedTuple
+
+from pizza.pizza_menu import parse_pizza_spec, validate_pizza
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from pizza.business import Restaurant
+    from pizza.cluster import RestaurantCluster
+    from pizza.pizza_menu import LowerKeyMenu
+
+Result = dict[str, Any]  # one line of output
+
+
+class OrderRecord(NamedTuple):
+    """Parsed order from one input line."""
+
+    line: int
+    items: list[tuple[str, str]]
+    is_delivery: bool
+    name: str
+    phone_number: str
+    idempotency_key: str | None = None
+    order: str = ""  # description of validated pizzas
+    validate_s: float = 0.0
+
+
+def _error(line: int, message: str) -> Result:
+    return {"line": line, "ok": False, "error": message}
+
+
+def _parse_item(item: Any, default_size: str) -> tuple[str, str]:
+    """Convert NAME[:SIZE] or [name, size] into pizza name and size."""
+    if isinstance(item, str):
+        return parse_pizza_spec(item, default_size)
+    name, size = item
+    return str(name), str(size)
+
+
+def parse_records(
+    lines: Iterable[str],
+    *,
+    is_delivery: bool = False,
+    size: str = "L",
+) -> Iterator[OrderRecord | Result]:
+    """Parse JSON lines into orders, invalid lines become error results.
+
+    is_delivery and size are defaults for records without them.
+    Blank lines are skipped.
+    """
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            default_size = str(record.get("size", size))
+            if not isinstance(record["pizzas"], list):
+                raise TypeError
+            items = [_parse_item(item, default_size) for item in record["pizzas"]]
+        except json.JSONDecodeError:
+            yield _error(line_no, "Line should be a JSON object")
+            continue
+        except (AttributeError, KeyError, TypeError, ValueError):
+            yield _error(line_no, "Order should have a list of pizzas")
+            continue
+        if not items:
+            yield _error(line_no, "Order should contain at least one pizza")
+            continue
+        idempotency_key = record.get("idempotency_key")
+        yield OrderRecord(
+            line_no,
+            items,
+            bool(record.get("delivery", is_delivery)),
+            str(record.get("name", "Pavel")),
+            str(record.get("phone", "+1337")),
+            None if idempotency_key is None else str(idempotency_key),
+        )
+
+
+def validate_records(
+    records: Iterable[OrderRecord | Result],
+    menu: "LowerKeyMenu",
+) -> Iterator[OrderRecord | Result]:
+    """Check pizzas of orders with validate_pizza, pass results through."""
+    for record in records:
+        if not isinstance(record, OrderRecord):
+            yield record
+            continue
+        start = time.perf_counter()
+        messages = []
+        for pizza_name, size in record.items:
+            is_success, message = validate_pizza(pizza_name, size, menu)
+            if not is_success:
+                yield _error(record.line, message)
+                break
+            messages.append(message)
+        else:
+            yield record._replace(
+                order=", ".join(messages),
+                validate_s=round(time.perf_counter() - start, 6),
+            )
+
+
+def process_records(
+    records: Iterable[OrderRecord | Result],
+    restaurant: "Restaurant",
+) -> Iterator[Result]:
+    """Make orders in the restaurant and yield their results.
+
+    Every order gets its own Client, so delivered or picked up pizzas
+    are dropped with it instead of piling up in a registered client.
+    """
+    from pizza.business import Client, client_key
+
+    def make_orders(record: OrderRecord) -> Result:
+        client = Client(
+            restaurant,
+            is_delivery=record.is_delivery,
+            name=record.name,
+            phone_number=record.phone_number,
+        )
+        start = time.perf_counter()
+        pizzas = client.make_orders(record.items)
+        return {
+            "line": record.line,
+            "ok": True,
+            "order": record.order,
+            "pizzas": [str(pizza) for pizza in pizzas],
+            "validate_s": record.validate_s,
+            "order_s": round(time.perf_counter() - start, 6),
+        }
+
+    for record in records:
+        if not isinstance(record, OrderRecord):
+            yield record
+            continue
+        try:
+            if record.idempotency_key is None:
+                yield make_orders(record)
+                continue
+            key = client_key(record.name, record.phone_number)
+            result = restaurant.idempotency.run(
+                (key, record.idempotency_key),
+                functools.partial(make_orders, record),
+            )
+        except (KeyError, ValueError, RuntimeError) as exc:
+            yield _error(record.line, str(exc))
+            continue
+        yield {**result, "line": record.line}  # line of a duplicate
+
+
+def _cluster_result(record: OrderRecord | Result, future: "Future | None") -> Result:
+    """Wait for response of a cluster shard and convert it into a result."""
+    if not isinstance(record, OrderRecord) or future is None:
+        return record  # failed before it was sent
+    response = future.result()
+    if not response["ok"]:
+        return _error(record.line, response["error"])
+    return {
+        "line": record.line,
+        "ok": True,
+        "order": record.order,
+        "pizzas": response["pizzas"],
+        "validate_s": record.validate_s,
+        "order_s": round(response["seconds"], 6),
+    }
+
+
+def submit_records(
+    records: Iterable[OrderRecord | Result],
+    cluster: "RestaurantCluster",
+    *,
+    window: int,
+) -> Iterator[Result]:
+    """Make orders in the shards of a cluster and yield results in input order.
+
+    Up to window orders are in flight, so shards work in parallel
+    and memory is still bounded.
+    """
+    in_flight: collections.deque[tuple[OrderRecord | Result, Future | None]]
+    in_flight = collections.deque()
+    for record in records:
+        future = None
+        if isinstance(record, OrderRecord):
+            future = cluster.submit(
+                record.items,
+                is_delivery=record.is_delivery,
+                name=record.name,
+                phone_number=record.phone_number,
+                idempotency_key=record.idempotency_key,
+            )
+        in_flight.append((record, future))
+        if len(in_flight) >= window:
+            yield _cluster_result(*in_flight.popleft())
+    while in_flight:
+        yield _cluster_result(*in_flight.popleft())
+
+
+def ingest_orders(
+    lines: Iterable[str],
+    restaurant: "Restaurant | RestaurantCluster",
+    out: IO[str],
+    *,
+    is_delivery: bool = False,
+    size: str = "L",
+) -> tuple[int, int]:
+    """Process orders from JSON lines and write one JSON line per order to out.
+
+    Orders go to a restaurant one by one, or to a cluster
+    with several orders per shard in flight.
+
+    Returns:
+        numbers of successful and failed orders.
+    """
+    from pizza.cluster import RestaurantCluster
+
+    records = parse_records(lines, is_delivery=is_delivery, size=size)
+    validated = validate_records(records, restaurant.menu)
+    if isinstance(restaurant, RestaurantCluster):
+        window = 4 * restaurant.n_shards
+        results = submit_records(validated, restaurant, window=window)
+    else:
+        results = process_records(validated, restaurant)
+    n_ok = n_failed = 0
+    for result in results:
+        if result["ok"]:
+            n_ok += 1
+        else:
+            n_failed += 1
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()  # results are visible while the input is still streaming
+    return n_ok, n_failed
@@ -0,0 +1,256 @@
+"""Kitchen with limited capacity: pools of ovens and couriers.
+
+Orders are submitted to a bounded queue. Baking is done by oven workers,
+delivery by courier workers, both are thread pools from concurrent.futures,
+or schedulers by priority and deadline if the kitchen is scheduled.
+"""
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from pizza import deadlines
+from pizza.clock import get_clock
+from pizza.scheduling import (
+    DEFAULT_SLA_S,
+    OrderScheduler,
+    Priority,
+    PrioritySlots,
+    SlaStats,
+)
+
+
+class KitchenOverloadedError(RuntimeError):
+    """Raised when the queue of the kitchen is full and the order is rejected."""
+
+
+class Kitchen:
+    """Scheduler of orders over N ovens and M couriers with backpressure.
+
+    Attributes:
+        n_ovens: number of pizzas that can be baked at the same time
+        n_couriers: number of deliveries that can be made at the same time
+        max_queue: max number of orders in the kitchen (waiting and in progress)
+        block: if True, submission waits for a free place in the queue,
+            which is given to the most urgent waiting order first,
+            if False, KitchenOverloadedError is raised immediately
+        timeout: max seconds to wait for a free place if block=True,
+            a deadline of the caller (see pizza.deadlines) can shorten it
+        completed: number of finished orders
+        rejected: number of orders rejected because of overload
+        scheduled: if True, ovens and couriers take the most urgent work first
+            (see OrderScheduler), else they work in order of submission
+        sla_s: default deadline of orders by priority class, in seconds,
+            classes missing in the argument keep DEFAULT_SLA_S
+        sla: numbers of orders that met and missed their deadlines
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        n_ovens: int = 2,
+        n_couriers: int = 2,
+        max_queue: int = 32,
+        block: bool = True,
+        timeout: float | None = None,
+        scheduled: bool = False,
+        sla_s: dict[Priority, float] | None = None,
+    ) -> None:
+        """Initialize pools of workers and bounded queue."""
+        self.n_ovens = n_ovens
+        self.n_couriers = n_couriers
+        self.max_queue = max_queue
+        self.block = block
+        self.timeout = timeout
+        self.completed = 0
+        self.rejected = 0
+        self.scheduled = scheduled
+        self.sla_s = {**DEFAULT_SLA_S, **(sla_s or {})}
+        self.sla = SlaStats()
+        self._slots = PrioritySlots(max_queue)
+        self._counter_lock = threading.Lock()
+        self._ovens: ThreadPoolExecutor | OrderScheduler
+        self._couriers: ThreadPoolExecutor | OrderScheduler
+        if scheduled:
+            self._ovens = OrderScheduler(n_ovens, thread_name_prefix="oven")
+            self._couriers = OrderScheduler(n_couriers, thread_name_prefix="courier")
+        else:
+            self._ovens = ThreadPoolExecutor(n_ovens, thread_name_prefix="oven")
+            self._couriers = ThreadPoolExecutor(
+                n_couriers,
+                thread_name_prefix="courier",
+            )
+
+    def submit_order(
+        self,
+        bake: Callable[[], Any],
+        deliver: Callable[[], Any] | None = None,
+        *,
+        priority: Priority | None = None,
+        deadline: float | None = None,
+    ) -> Future:
+        """Put order in the queue and return future of its completion.
+
+        Args:
+            bake: task for an oven
+            deliver: optional task for a courier, it starts after baking
+            priority: see submit_batch
+            deadline: see submit_batch
+
+        Raises:
+            KitchenOverloadedError: if queue is full and block=False
+                or no place was freed during timeout.
+        """
+        return self.submit_batch(
+            [bake],
+            deliver,
+            priority=priority,
+            deadline=deadline,
+        )
+
+    def submit_batch(
+        self,
+        bakes: list[Callable[[], Any]],
+        deliver: Callable[[], Any] | None = None,
+        *,
+        priority: Priority | None = None,
+        deadline: float | None = None,
+    ) -> Future:
+        """Put order of several items in the queue as one order.
+
+        All items are baked in parallel by free ovens,
+        then one courier makes a single delivery for the whole batch.
+        Priority is DELIVERY or PICKUP by default, deadline is time
+        by the clock in use, submission time plus SLA of priority by default.
+        Scheduled kitchen takes work by priority and deadline,
+        any kitchen counts orders that met their deadlines in sla.
+
+        Returns:
+            future with result of delivery if deliver is given,
+                else with list of results of baking.
+
+        Raises:
+            ValueError: if there is nothing to bake.
+            KitchenOverloadedError: if queue is full and block=False
+                or no place was freed during timeout.
+            DeadlineExceeded: if no place was freed before the deadline
+                of the caller.
+        """
+        if not bakes:
+            msg = "Order should contain at least one item"
+            raise ValueError(msg)
+        if priority is None:
+            priority = Priority.PICKUP if deliver is None else Priority.DELIVERY
+        if not self._acquire_slot(priority):
+            with self._counter_lock:
+                self.rejected += 1
+            msg = f"Kitchen queue is full ({self.max_queue} orders)"
+            raise KitchenOverloadedError(msg)
+
+        if deadline is None:
+            deadline = get_clock().now() + self.sla_s[priority]
+        order_future: Future = Future()
+        order_future.add_done_callback(self._release)
+        order_future.add_done_callback(
+            lambda _: self.sla.record(
+                priority,
+                is_met=get_clock().now() <= deadline,
+            ),
+        )
+
+        def submit(pool: Any, fn: Callable[[], Any]) -> Future:
+            if isinstance(pool, OrderScheduler):
+                return pool.submit(fn, priority=priority, deadline=deadline)
+            return pool.submit(fn)
+
+        bake_futures: list[Future] = []
+        try:
+            bake_futures.extend(submit(self._ovens, bake) for bake in bakes)
+        except BaseException:  # e.g. RuntimeError after shutdown
+            for bake_future in bake_futures:
+                bake_future.cancel()
+            self._slots.release()
+            raise
+        n_left = [len(bake_futures)]  # to be changed from callbacks
+        left_lock = threading.Lock()
+
+        def after_bake(_: Future) -> None:
+            with left_lock:
+                n_left[0] -= 1
+                if n_left[0]:
+                    return
+            for bake_future in bake_futures:
+                if (exc := bake_future.exception()) is not None:
+                    order_future.set_exception(exc)
+                    return
+            if deliver is None:
+                order_future.set_result([f.result() for f in bake_futures])
+                return
+            try:
+                deliver_future = submit(self._couriers, deliver)
+            except RuntimeError as exc:  # couriers are shut down
+                order_future.set_exception(exc)
+                return
+            deliver_future.add_done_callback(after_deliver)
+
+        def after_deliver(deliver_future: Future) -> None:
+            if (exc := deliver_future.exception()) is not None:
+                order_future.set_exception(exc)
+            else:
+                order_future.set_result(deliver_future.result())
+
+        for bake_future in bake_futures:
+            bake_future.add_done_callback(after_bake)
+        return order_future
+
+    def bake_ahead(self, bake: Callable[[], Any]) -> Future:
+        """Bake in an oven of the kitchen without an order, e.g. for stock.
+
+        The work takes no place in the queue and isn't counted in sla,
+        a scheduled kitchen runs it after waiting orders.
+
+        Raises:
+            RuntimeError: if the kitchen is shut down.
+        """
+        if isinstance(self._ovens, OrderScheduler):
+            return self._ovens.submit(
+                bake,
+                priority=Priority.PICKUP,
+                deadline=float("inf"),
+            )
+        return self._ovens.submit(bake)
+
+    def _acquire_slot(self, priority: Priority) -> bool:
+        """Take a place in the queue, return False if there is none in time.
+
+        Raises:
+            DeadlineExceeded: if the deadline of the caller comes before
+                a free place and before timeout.
+        """
+        if not self.block:
+            return self._slots.acquire(priority, timeout=0)
+        left = deadlines.remaining()
+        if left is None or (self.timeout is not None and self.timeout <= left):
+            return self._slots.acquire(priority, timeout=self.timeout)
+        if self._slots.acquire(priority, timeout=max(left, 0)):
+            return True
+        raise deadlines.DeadlineExceeded
+
+    def _release(self, _: Future) -> None:
+        """Free place in the queue after order is done."""
+        with self._counter_lock:
+            self.completed += 1
+        self._slots.release()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop workers. If wait=True, finish orders already in the kitchen."""
+        self._ovens.shutdown(wait=wait)
+        self._couriers.shutdown(wait=wait)
+
+    def __enter__(self) -> "Kitchen":
+        """Use kitchen as a context manager which shuts it down at exit."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Wait for all orders and stop workers."""
+        self.shutdown(wait=True)
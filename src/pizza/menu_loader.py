@@ -0,0 +1,133 @@
+"""Loading of menus from TOML or JSON files into generated Pizza types.
+
+A menu file has a list of pizzas, e.g. in TOML:
+
+    [[pizzas]]
+    name = "Four Cheese"
+    recipe = ["tomato sauce", "mozzarella", "gorgonzola", "parmesan", "ricotta"]
+    emoji = "🧀"
+
+Parsed menus are cached with marshal in PIZZA_CACHE_DIR (~/.cache/pizza
+by default). The cache is checked by mtime and size of the file,
+and by its sha256 if they have changed, so unchanged menus are not parsed
+again on every process start.
+"""
+import hashlib
+import json
+import marshal
+import os
+import re
+import tomllib
+from pathlib import Path
+
+from pizza.pizza_menu import LowerKeyMenu, Pizza
+
+CACHE_VERSION = 1
+MenuEntry = tuple[str, tuple[str, ...], str]  # name, recipe and emoji
+
+
+def default_cache_dir() -> Path:
+    """Return directory for cached menus from PIZZA_CACHE_DIR or ~/.cache/pizza."""
+    if cache_dir := os.environ.get("PIZZA_CACHE_DIR"):
+        return Path(cache_dir)
+    return Path.home() / ".cache" / "pizza"
+
+
+def parse_menu(data: bytes, suffix: str) -> list[MenuEntry]:
+    """Parse and validate content of a menu file with suffix .toml or .json.
+
+    Raises:
+        ValueError: if format is unknown or the menu is invalid.
+    """
+    if suffix == ".toml":
+        document = tomllib.loads(data.decode())
+    elif suffix == ".json":
+        document = json.loads(data)
+    else:
+        msg = f"Menu should be a .toml or .json file, not {suffix!r}"
+        raise ValueError(msg)
+    if not isinstance(document, dict):
+        msg = "Menu should be a table with a list of pizzas"
+        raise ValueError(msg)
+    pizzas = document.get("pizzas", [])
+    if not isinstance(pizzas, list):
+        msg = "Menu should have a list of pizzas"
+        raise ValueError(msg)
+    entries = []
+    for i, pizza in enumerate(pizzas):
+        try:
+            name, recipe = pizza["name"], pizza["recipe"]
+        except (KeyError, TypeError) as exc:
+            msg = f"Pizza #{i + 1} should have a name and a recipe"
+            raise ValueError(msg) from exc
+        if not isinstance(name, str) or not isinstance(recipe, list):
+            msg = f"Pizza #{i + 1} should have a string name and a list recipe"
+            raise ValueError(msg)
+        entries.append((name, tuple(map(str, recipe)), str(pizza.get("emoji", ""))))
+    if not entries:
+        msg = "Menu should contain at least one pizza"
+        raise ValueError(msg)
+    return entries
+
+
+def _read_entries(path: Path, cache_dir: Path) -> list[MenuEntry]:
+    """Return entries of a menu from the cache or parse the file and cache it."""
+    stat = path.stat()
+    path_hash = hashlib.sha256(str(path.resolve()).encode()).hexdigest()
+    cache_path = cache_dir / f"menu-{path_hash[:16]}.marshal"
+    try:
+        cached = marshal.loads(cache_path.read_bytes())
+        version, mtime_ns, size, sha, entries = cached
+    except (OSError, EOFError, ValueError, TypeError):
+        version = None
+    if version == CACHE_VERSION and (mtime_ns, size) == (
+        stat.st_mtime_ns,
+        stat.st_size,
+    ):
+        return entries
+
+    data = path.read_bytes()
+    new_sha = hashlib.sha256(data).hexdigest()
+    if version != CACHE_VERSION or sha != new_sha:
+        entries = parse_menu(data, path.suffix)
+    payload = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size, new_sha, entries)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(marshal.dumps(payload))
+        tmp_path.replace(cache_path)  # atomic for concurrent processes
+    except OSError:
+        pass  # cache is an optimization, menu is loaded anyway
+    return entries
+
+
+def make_pizza_type(name: str, recipe: tuple[str, ...], emoji: str) -> type[Pizza]:
+    """Generate a compact Pizza subclass like hand-written ones."""
+    class_name = "".join(re.findall(r"\w+", name.title())) or "Pizza"
+    return type(
+        class_name,
+        (Pizza,),
+        {
+            "__slots__": (),
+            "__doc__": f"{name} pizza.",
+            "__module__": __name__,
+            "recipe": recipe,
+            "emoji": emoji,
+            "alt_name": name,
+        },
+    )
+
+
+def load_menu(path: Path, *, cache_dir: Path | None = None) -> LowerKeyMenu:
+    """Load menu from a TOML or JSON file, parsing it only if it has changed.
+
+    Raises:
+        OSError: if the file can't be read.
+        ValueError: if format is unknown or the menu is invalid.
+    """
+    entries = _read_entries(path, cache_dir or default_cache_dir())
+    menu = LowerKeyMenu()
+    for name, recipe, emoji in entries:
+        pizza_cls = make_pizza_type(name, recipe, emoji)
+        menu[pizza_cls.name] = pizza_cls
+    return menu
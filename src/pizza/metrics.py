@@ -0,0 +1,215 @@
+"""Metrics of heavy tasks: counters and fixed-bucket histograms.
+
+Every method wrapped by trace_heavy_tasks reports its duration to REGISTRY.
+Metrics can be exported as Prometheus text format or a JSON snapshot.
+"""
+import threading
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# upper bounds of histogram buckets in seconds (+Inf bucket is added)
+DEFAULT_BUCKETS_S: tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    1.5,
+    2.0,
+    2.5,
+    3.0,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]  # sorted pairs of label name and value
+
+
+class Counter:
+    """Monotonically increasing number."""
+
+    def __init__(self) -> None:
+        """Initialize counter with zero."""
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """Increase counter by amount."""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Distribution of durations over fixed buckets.
+
+    Observations are kept in nanoseconds to avoid float math on the hot path.
+
+    Attributes:
+        buckets_s: upper bounds of buckets in seconds
+        counts: number of observations in each bucket (not cumulative),
+            the last one is +Inf
+        sum_ns: sum of all observations
+        count: number of observations
+    """
+
+    def __init__(self, buckets_s: tuple[float, ...] = DEFAULT_BUCKETS_S) -> None:
+        """Initialize empty histogram with buckets."""
+        self.buckets_s = buckets_s
+        self._bounds_ns = [round(bound * 1e9) for bound in buckets_s]
+        self.counts = [0] * (len(buckets_s) + 1)
+        self.sum_ns = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe_ns(self, duration_ns: int) -> None:
+        """Add observation in nanoseconds."""
+        i = bisect_left(self._bounds_ns, duration_ns)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum_ns += duration_ns
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile in seconds by linear interpolation inside a bucket.
+
+        Values in the +Inf bucket are reported as the largest finite bound.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, n in zip(self.buckets_s, self.counts, strict=False):
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return self.buckets_s[-1]
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return pairs of bucket bound and cumulative count as Prometheus does."""
+        bounds = [f"{bound:g}" for bound in self.buckets_s] + ["+Inf"]
+        pairs, total = [], 0
+        for bound, n in zip(bounds, self.counts, strict=True):
+            total += n
+            pairs.append((bound, total))
+        return pairs
+
+
+_LABEL_ESCAPES = str.maketrans({"\\": r"\\", '"': r'\"', "\n": r"\n"})
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format labels as {name="value",...} for Prometheus, values escaped."""
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{value.translate(_LABEL_ESCAPES)}"' for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+class MetricsRegistry:
+    """Collection of named metrics with labels."""
+
+    def __init__(self) -> None:
+        """Initialize empty registry."""
+        self._counters: dict[str, dict[Labels, Counter]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = "", **labels: str) -> Counter:
+        """Get or create counter with name and labels."""
+        key = tuple(sorted(labels.items()))
+        try:
+            return self._counters[name][key]
+        except KeyError:
+            with self._lock:
+                self._help.setdefault(name, help_text)
+                by_labels = self._counters.setdefault(name, {})
+                return by_labels.setdefault(key, Counter())
+
+    def histogram(self, name: str, help_text: str = "", **labels: str) -> Histogram:
+        """Get or create histogram with name and labels."""
+        key = tuple(sorted(labels.items()))
+        try:
+            return self._histograms[name][key]
+        except KeyError:
+            with self._lock:
+                self._help.setdefault(name, help_text)
+                by_labels = self._histograms.setdefault(name, {})
+                return by_labels.setdefault(key, Histogram())
+
+    def clear(self) -> None:
+        """Remove all metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._help.clear()
+
+    def to_prometheus(self) -> str:
+        """Export all metrics in Prometheus text exposition format."""
+        lines = []
+        for name, by_labels in self._counters.items():
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(
+                f"{name}{_format_labels(labels)} {counter.value}"
+                for labels, counter in by_labels.items()
+            )
+        for name, by_labels in self._histograms.items():
+            lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in by_labels.items():
+                lines.extend(
+                    f"{name}_bucket{_format_labels((*labels, ('le', le)))} {n}"
+                    for le, n in hist.cumulative()
+                )
+                str_labels = _format_labels(labels)
+                lines.append(f"{name}_sum{str_labels} {hist.sum_ns / 1e9}")
+                lines.append(f"{name}_count{str_labels} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        """Export all metrics as a JSON-serializable dict with quantiles."""
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": counter.value}
+                for name, by_labels in self._counters.items()
+                for labels, counter in by_labels.items()
+            ],
+            "histograms": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist.count,
+                    "sum_s": hist.sum_ns / 1e9,
+                    "p50_s": hist.quantile(0.5),
+                    "p95_s": hist.quantile(0.95),
+                    "p99_s": hist.quantile(0.99),
+                    "buckets": hist.cumulative(),
+                }
+                for name, by_labels in self._histograms.items()
+                for labels, hist in by_labels.items()
+            ],
+        }
+
+    def write(self, path: "Path") -> None:
+        """Write metrics to a file: JSON if suffix is .json, else Prometheus text."""
+        if path.suffix == ".json":
+            import json
+
+            path.write_text(json.dumps(self.snapshot(), indent=2) + "\n")
+        else:
+            path.write_text(self.to_prometheus())
+
+
+REGISTRY = MetricsRegistry()
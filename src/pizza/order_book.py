@@ -0,0 +1,212 @@
+"""Order book of a restaurant: open orders with indexes.
+
+Every baked pizza is an order with an id. Orders are indexed by client,
+pizza type and status, so lookups, pickups and "what's waiting" queries
+take O(1) (or O(size of the smallest matching index) for combined filters).
+"""
+import threading
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+from enum import Enum
+
+from pizza.pizza_menu import Pizza
+
+
+class OrderStatus(Enum):
+    """Status of an open order."""
+
+    BAKED = "baked"
+    AWAITING_PICKUP = "awaiting pickup"
+    OUT_FOR_DELIVERY = "out for delivery"
+
+
+@dataclass(slots=True)
+class Order:
+    """Baked pizza for a client.
+
+    Attributes:
+        order_id: unique id of the order in the book
+        client_key: id of a client who ordered it
+        pizza: ordered pizza
+        status: status of the order
+    """
+
+    order_id: int
+    client_key: Hashable
+    pizza: Pizza
+    status: OrderStatus
+
+    @property
+    def pizza_type(self) -> str:
+        """Name of the ordered pizza."""
+        return self.pizza.kind.name
+
+
+class OrderBook:
+    """Open orders indexed by id, client, pizza type and status.
+
+    Indexes are dicts with None values to keep insertion order of orders.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, first_id: int = 1) -> None:
+        """Initialize empty book, ids of new orders start from first_id."""
+        self._orders: dict[int, Order] = {}
+        self._by_client: dict[Hashable, dict[int, None]] = {}
+        self._by_type: dict[str, dict[int, None]] = {}
+        self._by_status: dict[OrderStatus, dict[int, None]] = {}
+        self._next_id = first_id
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of open orders."""
+        return len(self._orders)
+
+    def __contains__(self, client_key: Hashable) -> bool:
+        """Check if client has open orders."""
+        return client_key in self._by_client
+
+    @staticmethod
+    def _index_add(index: dict, key: Hashable, order_id: int) -> None:
+        index.setdefault(key, {})[order_id] = None
+
+    @staticmethod
+    def _index_remove(index: dict, key: Hashable, order_id: int) -> None:
+        ids = index[key]
+        del ids[order_id]
+        if not ids:
+            del index[key]
+
+    def add(
+        self,
+        client_key: Hashable,
+        pizza: Pizza,
+        status: OrderStatus = OrderStatus.BAKED,
+    ) -> Order:
+        """Open new order of a client and return it."""
+        with self._lock:
+            order = Order(self._next_id, client_key, pizza, status)
+            self._next_id += 1
+            self._insert(order)
+        return order
+
+    def restore(self, order: Order) -> None:
+        """Put order with a known id back to the book, e.g. from a store.
+
+        Ids of new orders continue after the largest restored id.
+        """
+        with self._lock:
+            self._insert(order)
+            if order.order_id >= self._next_id:
+                self._next_id = order.order_id + 1
+
+    def _insert(self, order: Order) -> None:
+        """Put order to the book and all indexes."""
+        self._orders[order.order_id] = order
+        self._index_add(self._by_client, order.client_key, order.order_id)
+        self._index_add(self._by_type, order.pizza_type, order.order_id)
+        self._index_add(self._by_status, order.status, order.order_id)
+
+    def get(self, order_id: int) -> Order:
+        """Return open order by id.
+
+        Raises:
+            KeyError: if there is no such open order.
+        """
+        return self._orders[order_id]
+
+    def set_status(self, order_ids: Iterable[int], status: OrderStatus) -> None:
+        """Change status of orders."""
+        with self._lock:
+            for order_id in order_ids:
+                order = self._orders[order_id]
+                self._index_remove(self._by_status, order.status, order_id)
+                order.status = status
+                self._index_add(self._by_status, status, order_id)
+
+    def set_client_status(
+        self,
+        client_key: Hashable,
+        status: OrderStatus,
+    ) -> list[int]:
+        """Change status of all open orders of a client and return their ids."""
+        with self._lock:
+            order_ids = list(self._by_client.get(client_key, ()))
+            self.set_status(order_ids, status)
+        return order_ids
+
+    def remove(self, order_id: int) -> Order:
+        """Close order and return it.
+
+        Raises:
+            KeyError: if there is no such open order.
+        """
+        with self._lock:
+            order = self._orders.pop(order_id)
+            self._index_remove(self._by_client, order.client_key, order_id)
+            self._index_remove(self._by_type, order.pizza_type, order_id)
+            self._index_remove(self._by_status, order.status, order_id)
+        return order
+
+    def pop_orders(self, order_ids: Iterable[int]) -> list[Order]:
+        """Close open orders by id and return them, closed ones are skipped."""
+        with self._lock:
+            return [
+                self.remove(order_id)
+                for order_id in order_ids
+                if order_id in self._orders
+            ]
+
+    def pop_client(self, client_key: Hashable) -> list[Order]:
+        """Close all orders of a client and return them."""
+        with self._lock:
+            ids = list(self._by_client.get(client_key, ()))
+            return [self.remove(order_id) for order_id in ids]
+
+    def find(
+        self,
+        *,
+        client_key: Hashable | None = None,
+        pizza_type: str | None = None,
+        status: OrderStatus | None = None,
+    ) -> list[Order]:
+        """Return open orders matching all given filters, all if none given."""
+        with self._lock:
+            candidates = [
+                index.get(key, {})
+                for index, key in (
+                    (self._by_client, client_key),
+                    (self._by_type, pizza_type),
+                    (self._by_status, status),
+                )
+                if key is not None
+            ]
+            if not candidates:
+                return list(self._orders.values())
+            smallest = min(candidates, key=len)
+            return [
+                self._orders[order_id]
+                for order_id in smallest
+                if all(order_id in ids for ids in candidates)
+            ]
+
+    def count(
+        self,
+        *,
+        pizza_type: str | None = None,
+        status: OrderStatus | None = None,
+    ) -> int:
+        """Count open orders of pizza type and/or status, e.g. what's waiting."""
+        if pizza_type is None and status is None:
+            return len(self._orders)
+        if pizza_type is None:
+            return len(self._by_status.get(status, ()))  # type: ignore[arg-type]
+        if status is None:
+            return len(self._by_type.get(pizza_type, ()))
+        return len(self.find(pizza_type=pizza_type, status=status))
+
+    def pizzas(self, client_key: Hashable) -> list[Pizza]:
+        """Return pizzas of open orders of a client."""
+        with self._lock:
+            ids = self._by_client.get(client_key, ())
+            return [self._orders[order_id].pizza for order_id in ids]
@@ -2,8 +2,9 @@
 
 Module defines pizza classes and collects them into custom dict
 """
-from collections import UserDict
-from typing import TypeVar
+import itertools
+from collections.abc import Iterable, Mapping
+from typing import Any, ClassVar, TypeVar
 
 from pizza.constants import AVAILABLE_PIZZA_SIZES
 
@@ -16,9 +17,50 @@ class classproperty:  # noqa: D101
         return self.fget(owner)
 
 
+class PizzaKind:
+    """Metadata shared by all pizzas of one type (flyweight).
+
+    Kinds are interned by name and set of ingredients,
+    so pizzas of the same kind can be compared by identity of their kinds.
+
+    Attributes:
+        name: name of pizza
+        recipe: recipe of this food
+        ingredients: recipe as a set
+        emoji: emoji, associated with this food
+    """
+
+    __slots__ = ("emoji", "ingredients", "name", "recipe")
+    _interned: ClassVar[dict[tuple[str, frozenset[str]], "PizzaKind"]] = {}
+
+    def __init__(self, name: str, recipe: tuple[str, ...], emoji: str) -> None:
+        """Initialize kind. Use PizzaKind.get to reuse existing kinds."""
+        self.name = name
+        self.recipe = recipe
+        self.ingredients = frozenset(recipe)
+        self.emoji = emoji
+
+    @classmethod
+    def get(cls, name: str, recipe: tuple[str, ...], emoji: str) -> "PizzaKind":
+        """Return interned kind with this name and recipe, create if needed."""
+        key = (name, frozenset(recipe))
+        kind = cls._interned.get(key)
+        if kind is None:
+            kind = cls._interned[key] = cls(name, recipe, emoji)
+        return kind
+
+    def __repr__(self) -> str:
+        """Repr of kind with its name."""
+        return f"PizzaKind({self.name!r})"
+
+
 class Pizza:
     """Pizza template that can be cooked and served.
 
+    Instances are compact (__slots__), subclasses should define
+    empty __slots__ to stay compact.
+    Pizzas are hashable, equal pizzas have the same kind and size.
+
     Attributes:
         recipe: recipe of this food
         emoji: emoji, associated with this food
@@ -29,12 +71,20 @@ class Pizza:
     Class attributes:
         name: name of pizza (alt_name or from class name)
         clean_recipe: recipe as string separated by comma
+        kind: metadata shared by all pizzas of the class
     """
 
-    recipe: tuple[str, ...]
-    emoji: str
+    __slots__ = ("_signature", "is_baked")
+
+    recipe: tuple[str, ...] = ()
+    emoji: str = ""
     alt_name: str | None = None
-    is_baked: bool = False
+    kind: ClassVar[PizzaKind]
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Attach shared kind to every pizza class."""
+        super().__init_subclass__(**kwargs)
+        cls.kind = PizzaKind.get(cls.name, cls.recipe, cls.emoji)
 
     def __init__(self, size="L") -> None:
         """Initialize Pizza with size.
@@ -48,7 +98,13 @@ class Pizza:
         if size.upper() not in AVAILABLE_PIZZA_SIZES:
             string_error = f"{size} size is not in {AVAILABLE_PIZZA_SIZES}"
             raise ValueError(string_error)
-        self.size = size
+        self._signature = (type(self).kind, size.upper())
+        self.is_baked = False
+
+    @property
+    def size(self) -> str:
+        """Size of pizza."""
+        return self._signature[1]
 
     def bake(self) -> None:
         """Make pizza bake itself. Changes is_baked attr to True."""
@@ -77,43 +133,186 @@ class Pizza:
     def __eq__(self, other: "Pizza") -> bool:  # type: ignore
         """Compare pizzas by their characteristics.
 
-        They will be equal only with the same recipe, size and name.
+        They will be equal only with the same recipe, size and name,
+        i.e. with the same kind and size.
         """
         if not isinstance(other, Pizza):
             return NotImplemented
-        return (
-            (set(self.recipe) == set(other.recipe))
-            & (self.name == other.name)
-            & (self.size == other.size)
-        )
+        return self._signature == other._signature
+
+    def __hash__(self) -> int:
+        """Hash of kind and size, consistent with equality."""
+        return hash(self._signature)
 
     def dict(self) -> dict[str, tuple[str, ...]]:
         """Return dictionary with key=name of pizza, value=recipe of pizza."""
         return {self.name: self.recipe}
 
 
-class LowerKeyMenu(UserDict):
+Pizza.kind = PizzaKind.get(Pizza.name, Pizza.recipe, Pizza.emoji)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize name of food: casefold and collapse whitespace."""
+    return " ".join(name.casefold().split())
+
+
+def _trigrams(name: str) -> set[str]:
+    """Trigrams of a normalized name padded with spaces."""
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class LowerKeyMenu(dict):
     """Custom dictionary for pizza menu to be more resilient.
 
-    Dictionary that is indifferent of case of the key
-    It makes lower every key.
+    Dictionary that is indifferent of case and extra whitespace of the key.
+    Keys are normalized once on assignment, lookups of a normalized key
+    or of a key exactly as it was assigned skip normalization.
+    A trigram index for suggest is built on first use after the menu changes.
+    Every method that changes the menu goes through __setitem__ or
+    __delitem__ or drops the aliases and the index itself.
     """
 
     def __init__(self) -> None:
-        """Initialize UserDict."""
+        """Initialize empty menu."""
         super().__init__()
+        self._aliases: dict[str, str] = {}  # key as assigned -> normalized key
+        self._index: dict[str, list[str]] | None = None  # trigram -> keys
+        self._n_trigrams: dict[str, int] = {}
+
+    def _key(self, item: str) -> str:
+        """Find normalized key for item without normalizing if possible."""
+        return self._aliases.get(item) or normalize_name(item)
 
     def __getitem__(self, item: str) -> type[Pizza]:
-        """Key should be string and it is converted to lower case."""
-        return super().__getitem__(item.lower())
+        """Key should be string and it is normalized if it is not exact."""
+        value = dict.get(self, item)
+        if value is None:
+            return super().__getitem__(self._key(item))
+        return value
+
+    def get(self, item: str, default: Any = None) -> Any:  # type: ignore[override]
+        """Return value by a key in any case or default."""
+        value = dict.get(self, item)
+        if value is None:
+            return dict.get(self, self._key(item), default)
+        return value
 
     def __setitem__(self, key: str, value: type[Pizza]) -> None:
-        """Key is str and will be lowered."""
-        return super().__setitem__(key.lower(), value)
+        """Key is str and will be normalized."""
+        normalized = normalize_name(key)
+        self._aliases[key] = normalized
+        self._index = None
+        super().__setitem__(normalized, value)
+
+    def _forget(self, normalized: str) -> None:
+        """Drop aliases of a deleted key and the trigram index."""
+        self._aliases = {
+            alias: k for alias, k in self._aliases.items() if k != normalized
+        }
+        self._index = None
+
+    def __delitem__(self, key: str) -> None:
+        """Delete value by a key in any case."""
+        normalized = self._key(key)
+        super().__delitem__(normalized)
+        self._forget(normalized)
+
+    def update(  # type: ignore[override]
+        self,
+        other: Mapping[str, type[Pizza]] | Iterable[tuple[str, type[Pizza]]] = (),
+        /,
+        **kwargs: type[Pizza],
+    ) -> None:
+        """Add food from a mapping or pairs, keys will be normalized."""
+        items = other.items() if isinstance(other, Mapping) else other
+        for key, value in itertools.chain(items, kwargs.items()):
+            self[key] = value
+
+    def __ior__(self, other: Any) -> "LowerKeyMenu":  # type: ignore[override]
+        """Add food from a mapping, keys will be normalized."""
+        self.update(other)
+        return self
+
+    def setdefault(  # type: ignore[override]
+        self,
+        key: str,
+        default: type[Pizza],
+    ) -> type[Pizza]:
+        """Return value by a key in any case, add default if key is missing."""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default: Any) -> Any:
+        """Remove value by a key in any case and return it or default."""
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> tuple[str, type[Pizza]]:
+        """Remove and return the last added food with its normalized key."""
+        key, value = super().popitem()
+        self._forget(key)
+        return key, value
+
+    def clear(self) -> None:
+        """Remove all food from the menu."""
+        super().clear()
+        self._aliases.clear()
+        self._index = None
+
+    def __contains__(self, item: object) -> bool:
+        """Item is normalized if it is not an exact key."""
+        return dict.__contains__(self, item) or (
+            isinstance(item, str) and dict.__contains__(self, self._key(item))
+        )
 
-    def __contains__(self, item: str) -> bool:  # type: ignore
-        """Item is converted to lower case."""
-        return super().__contains__(item.lower())
+    def _build_index(self) -> dict[str, list[str]]:
+        """Map every trigram to keys containing it."""
+        index: dict[str, list[str]] = {}
+        self._n_trigrams = {}
+        for key in self:
+            trigrams = _trigrams(key)
+            self._n_trigrams[key] = len(trigrams)
+            for trigram in trigrams:
+                index.setdefault(trigram, []).append(key)
+        return index
+
+    def suggest(
+        self,
+        name: str,
+        *,
+        limit: int = 3,
+        min_similarity: float = 0.3,
+    ) -> list[str]:
+        """Return names of the most similar food for a misspelled name.
+
+        Similarity is Jaccard index of trigram sets, only keys sharing
+        a trigram with name are compared, so it doesn't scan the whole menu.
+        """
+        if self._index is None:
+            self._index = self._build_index()
+        trigrams = _trigrams(normalize_name(name))
+        shared: dict[str, int] = {}
+        for trigram in trigrams:
+            for key in self._index.get(trigram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        scored = [
+            (n / (len(trigrams) + self._n_trigrams[key] - n), key)
+            for key, n in shared.items()
+        ]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [
+            dict.__getitem__(self, key).name
+            for similarity, key in scored[:limit]
+            if similarity >= min_similarity
+        ]
 
 
 pizza_menu = LowerKeyMenu()
@@ -134,6 +333,8 @@ def add_pizza_to_menu(cls: type[P]) -> type[P]:
 class Margherita(Pizza):
     """Margherita Pizza."""
 
+    __slots__ = ()
+
     recipe = ("tomato sauce", "mozzarella", "tomatoes")
     emoji = "🧀"
 
@@ -142,6 +343,8 @@ class Margherita(Pizza):
 class Pepperoni(Pizza):
     """Pepperoni Pizza."""
 
+    __slots__ = ()
+
     recipe = ("tomato sauce", "mozzarella", "pepperoni")
     emoji = "🍕"
 
@@ -150,20 +353,61 @@ class Pepperoni(Pizza):
 class Hawaiian(Pizza):
     """Hawaiian Special pizza."""
 
+    __slots__ = ()
+
     recipe = ("tomato sauce", "mozzarella", "chicken", "pineapples")
     emoji = "🍍"
     alt_name = "Hawaiian Special"  # Give a complex name for a test
 
 
+def render_menu(
+    menu: LowerKeyMenu = pizza_menu,
+    *,
+    page: int = 1,
+    per_page: int | None = None,
+) -> str:
+    """Render menu as a multiline string, only one page of it if per_page is set.
+
+    Only food on the page is rendered, so big menus are cheap to show.
+
+    Raises:
+        ValueError: if page or per_page is not positive.
+    """
+    if page < 1 or (per_page is not None and per_page < 1):
+        msg = "Page and number of pizzas per page should be positive"
+        raise ValueError(msg)
+    if per_page is None:
+        foods = iter(menu.values())
+    else:
+        start = (page - 1) * per_page
+        foods = itertools.islice(menu.values(), start, start + per_page)
+    lines = [f"- {v.name} {v.emoji} : {v.clean_recipe}" for v in foods]
+    lines.append(f"Available pizza sizes: {', '.join(AVAILABLE_PIZZA_SIZES)}")
+    if per_page is not None:
+        n_pages = max(1, -(-len(menu) // per_page))
+        lines.append(f"Page {page} of {n_pages}")
+    return "\n".join(lines)
+
+
+def parse_pizza_spec(spec: str, default_size: str) -> tuple[str, str]:
+    """Split pizza spec NAME[:SIZE] into pizza name and size."""
+    pizza_name, sep, size = spec.rpartition(":")
+    if not sep:
+        return spec, default_size
+    return pizza_name, size
+
+
 def validate_pizza(
     pizza_name: str,
     size: str,
+    menu: LowerKeyMenu = pizza_menu,
 ) -> tuple[bool, str]:
     """Validate if pizza with parameters exists and return log message.
 
     Attributes:
         pizza_name:  pizza name from the menu
         size:  size from the available sizes
+        menu: menu to look for pizza in
 
     Returns:
         A tuple with two values
@@ -178,24 +422,29 @@ def validate_pizza(
             f"Choose one from: {AVAILABLE_PIZZA_SIZES}"
         )
         return False, message
-    if pizza_name not in pizza_menu:
-        message = (
-            f"No such pizza on the menu, the available pizzas:\n{full_menu_str}"
-        )
+    if pizza_name not in menu:
+        if suggestions := menu.suggest(pizza_name):
+            did_you_mean = " or ".join(suggestions)
+            message = f"No such pizza on the menu. Did you mean {did_you_mean}?"
+        else:
+            message = (
+                "No such pizza on the menu, the available pizzas:\n"
+                + render_menu(menu)
+            )
         return False, message
 
-    cls_pizza = pizza_menu[pizza_name]
+    cls_pizza = menu[pizza_name]
     message = f"{cls_pizza.name} {cls_pizza.emoji} {size} size"
     return True, message
 
 
-# full menu as a single multiline string
-full_menu_str: str = (
-    "\n".join(
-        f"- {v.name} {v.emoji} : {v.clean_recipe}" for v in pizza_menu.values()
-    )
-    + f"\nAvailable pizza sizes: {', '.join(AVAILABLE_PIZZA_SIZES)}"
-)
+def __getattr__(name: str) -> str:
+    """Render full_menu_str (full menu as a single multiline string) on access."""
+    if name == "full_menu_str":
+        return render_menu(pizza_menu)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
 
 if __name__ == "__main__":
     pizza2 = Pepperoni()
@@ -207,7 +456,7 @@ if __name__ == "__main__":
     pizza.bake()
     print(pizza)
     print(pizza.dict())
-    print(full_menu_str)
+    print(render_menu())
     try:
         print(Pepperoni(size="s"))
     except ValueError:
@@ -0,0 +1,232 @@
+"""Deterministic profiler for CLI commands.
+
+Records every call in all threads with sys.setprofile and reports:
+    time of every traced heavy task, split into sleeping (synthetic latency)
+        and everything else (decorators, spinner, real work)
+    functions with the largest own time
+    collapsed stacks for flamegraph tools (flamegraph.pl, speedscope)
+
+A coroutine returns to the event loop on every await that suspends it
+and is called again on resume. It is counted as one call from its start
+to its final return, own time only includes the time it was running.
+"""
+import asyncio
+import dis
+import sys
+import threading
+import time
+from collections import defaultdict
+from inspect import CO_COROUTINE, CO_ITERABLE_COROUTINE
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from pizza.clock import VirtualClock, WallClock
+from pizza.decorators import LogTimeDecorator
+
+SLEEP_FUNCS = frozenset({time.sleep})
+ASYNC_SLEEP_CODES = frozenset(
+    {
+        asyncio.sleep.__code__,
+        WallClock.asleep.__code__,
+        VirtualClock.asleep.__code__,
+    },
+)
+_COROUTINE_FLAGS = CO_COROUTINE | CO_ITERABLE_COROUTINE
+_YIELD_VALUE = dis.opmap["YIELD_VALUE"]
+
+
+def _wrapper_codes() -> frozenset:
+    """Code objects of the outermost wrappers made by trace_heavy_tasks."""
+
+    def original(_: object) -> None:
+        """Stub to decorate."""
+
+    async def async_original(_: object) -> None:
+        """Stub to decorate."""
+
+    decorator = LogTimeDecorator(is_return_time=False, task="stub")
+    return frozenset(
+        decorator(fn).__code__ for fn in (original, async_original)  # type: ignore
+    )
+
+
+class _Entry:
+    """Running call on the stack of a thread."""
+
+    __slots__ = (
+        "child_ns",
+        "key",
+        "name",
+        "ran_ns",
+        "resumed",
+        "sleep_ns",
+        "start",
+        "task",
+    )
+
+    def __init__(self, key: Any, name: str, start: int, task: str | None) -> None:
+        self.key = key
+        self.name = name
+        self.start = start
+        self.resumed = start  # start of the current run of a coroutine
+        self.ran_ns = 0  # time of earlier runs of a coroutine
+        self.child_ns = 0
+        self.sleep_ns = 0
+        self.task = task
+
+
+class Profiler:
+    """Profiler of all threads, started and stopped explicitly.
+
+    Attributes:
+        collapsed: own time in ns by stack of function names joined with ";"
+        tasks: by task name: [calls, total ns, sleeping ns]
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty profile."""
+        self.collapsed: defaultdict[str, int] = defaultdict(int)
+        self.tasks: defaultdict[str, list[int]] = defaultdict(lambda: [0, 0, 0])
+        self._stacks: dict[int, list[_Entry]] = {}
+        self._suspended: dict[FrameType, _Entry] = {}
+        self._wrapper_codes = _wrapper_codes()
+        self._lock = threading.Lock()
+        self._start_ns = 0
+        self.total_ns = 0
+
+    def start(self) -> None:
+        """Start recording calls in this and all new threads."""
+        self._start_ns = time.perf_counter_ns()
+        threading.setprofile(self._callback)
+        sys.setprofile(self._callback)
+
+    def stop(self) -> None:
+        """Stop recording calls."""
+        sys.setprofile(None)
+        threading.setprofile(None)  # type: ignore[arg-type]
+        self.total_ns = time.perf_counter_ns() - self._start_ns
+
+    def __enter__(self) -> "Profiler":
+        """Profile the with block."""
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Stop profiling at the end of the with block."""
+        self.stop()
+
+    def _callback(self, frame: FrameType, event: str, arg: Any) -> None:
+        """Push calls to and pop returns from the stack of the current thread."""
+        now = time.perf_counter_ns()
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        if event == "call":
+            code = frame.f_code
+            if code.co_flags & _COROUTINE_FLAGS and (
+                suspended := self._suspended.pop(frame, None)
+            ):
+                suspended.resumed = now
+                stack.append(suspended)
+                return
+            task = None
+            if code in self._wrapper_codes:
+                task = frame.f_locals["self"].task
+                name = f"[{task}]"
+            else:
+                module = frame.f_globals.get("__name__", "?")
+                name = f"{module}:{code.co_qualname}"
+            stack.append(_Entry(frame, name, now, task))
+        elif event == "c_call":
+            module = getattr(arg, "__module__", None) or "builtins"
+            name = f"{module}.{getattr(arg, '__qualname__', repr(arg))}"
+            stack.append(_Entry((frame, arg), name, now, None))
+        elif event == "return":
+            code = frame.f_code
+            if (
+                code.co_flags & _COROUTINE_FLAGS
+                and code.co_code[frame.f_lasti] == _YIELD_VALUE
+            ):
+                self._suspend(stack, frame, now)
+            else:
+                self._pop(stack, frame, now, is_sleep=code in ASYNC_SLEEP_CODES)
+        elif event in ("c_return", "c_exception"):
+            self._pop(stack, (frame, arg), now, is_sleep=arg in SLEEP_FUNCS)
+
+    @staticmethod
+    def _find(stack: list[_Entry], key: Any) -> int:
+        """Return depth of the call with key in the stack, -1 if it isn't there."""
+        for depth in range(len(stack) - 1, -1, -1):
+            if stack[depth].key == key:
+                return depth
+        return -1  # call started before profiling
+
+    def _suspend(self, stack: list[_Entry], frame: FrameType, now: int) -> None:
+        """Keep the call of a suspended coroutine aside until it is resumed."""
+        depth = self._find(stack, frame)
+        if depth < 0:
+            return
+        entry = stack[depth]
+        del stack[depth:]
+        ran_ns = now - entry.resumed
+        entry.ran_ns += ran_ns
+        self._suspended[frame] = entry
+        if stack:
+            stack[-1].child_ns += ran_ns
+
+    def _pop(
+        self,
+        stack: list[_Entry],
+        key: Any,
+        now: int,
+        *,
+        is_sleep: bool,
+    ) -> None:
+        """Finish the call with key and account its time."""
+        depth = self._find(stack, key)
+        if depth < 0:
+            return
+        path = ";".join(entry.name for entry in stack[: depth + 1])
+        entry = stack[depth]
+        del stack[depth:]
+        total = now - entry.start
+        ran_ns = now - entry.resumed
+        sleep_ns = total if is_sleep else entry.sleep_ns
+        with self._lock:
+            self.collapsed[path] += entry.ran_ns + ran_ns - entry.child_ns
+            if entry.task is not None:
+                calls_total_sleep = self.tasks[entry.task]
+                calls_total_sleep[0] += 1
+                calls_total_sleep[1] += total
+                calls_total_sleep[2] += sleep_ns
+        if stack:
+            stack[-1].child_ns += ran_ns
+            stack[-1].sleep_ns += sleep_ns
+
+    def write_collapsed(self, path: Path) -> None:
+        """Write collapsed stacks with own time in microseconds."""
+        with path.open("w") as file:
+            for stack, ns in sorted(self.collapsed.items()):
+                if us := ns // 1000:
+                    file.write(f"{stack} {us}\n")
+
+    def report(self, top: int = 10) -> str:
+        """Return heavy tasks breakdown and functions with the largest own time."""
+        lines = [
+            f"Profile: {self.total_ns / 1e6:.1f} ms in total",
+            f"{'task':<16}{'calls':>7}"
+            f"{'total ms':>11}{'sleep ms':>11}{'other ms':>11}",
+        ]
+        for task, (calls, total, sleep) in sorted(self.tasks.items()):
+            lines.append(
+                f"{task:<16}{calls:>7}{total / 1e6:>11.1f}"
+                f"{sleep / 1e6:>11.1f}{(total - sleep) / 1e6:>11.1f}",
+            )
+        own_time: defaultdict[str, int] = defaultdict(int)
+        for stack, ns in self.collapsed.items():
+            own_time[stack.rsplit(";", 1)[-1]] += ns
+        lines.append(f"Top {top} functions by own time:")
+        lines.extend(
+            f"{ns / 1e6:>10.1f} ms  {name}"
+            for name, ns in sorted(own_time.items(), key=lambda x: -x[1])[:top]
+        )
+        return "\n".join(lines)
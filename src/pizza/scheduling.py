@@ -0,0 +1,251 @@
+"""Scheduling of kitchen work by priority class and deadline.
+
+Every order has a priority class and a deadline (its SLA from submission
+by default). Workers take the job of the most urgent class with the
+earliest deadline first, so express deliveries overtake the queue
+when the kitchen is saturated. To protect other classes from starvation,
+a job that has waited max_wait_s is taken before everything else.
+Places in the queue of a kitchen are given by priority class too,
+so an express order doesn't wait for a place behind waiting pickups.
+"""
+import heapq
+import itertools
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from pizza.clock import get_clock
+
+
+class Priority(IntEnum):
+    """Priority classes of orders, smaller is more urgent."""
+
+    EXPRESS = 0
+    DELIVERY = 1
+    PICKUP = 2
+
+
+DEFAULT_SLA_S = {
+    Priority.EXPRESS: 5.0,
+    Priority.DELIVERY: 10.0,
+    Priority.PICKUP: 20.0,
+}
+
+
+@dataclass(order=True, slots=True)
+class _Job:
+    """Work waiting for a worker, ordered by deadline within its class."""
+
+    deadline: float
+    seq: int
+    submitted_at: float = field(compare=False)
+    priority: Priority = field(compare=False)
+    fn: Callable[[], Any] = field(compare=False)
+    future: Future = field(compare=False)
+    is_taken: bool = field(default=False, compare=False)
+
+
+class OrderScheduler:
+    """Pool of workers taking jobs by priority, deadline and waiting time.
+
+    Attributes:
+        n_workers: number of jobs that can run at the same time
+        max_wait_s: jobs waiting longer are taken first, whatever their class
+        n_aged: number of jobs taken because they have waited too long
+    """
+
+    def __init__(
+        self,
+        n_workers: int,
+        *,
+        max_wait_s: float = 30.0,
+        thread_name_prefix: str = "scheduler",
+    ) -> None:
+        """Start worker threads."""
+        self.n_workers = n_workers
+        self.max_wait_s = max_wait_s
+        self.n_aged = 0
+        self._queues: dict[Priority, list[_Job]] = {p: [] for p in Priority}
+        self._by_age: list[tuple[float, int, _Job]] = []  # may hold taken jobs
+        self._n_waiting = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._is_shutdown = False
+        self._workers = [
+            threading.Thread(
+                target=self._work,
+                name=f"{thread_name_prefix}_{i}",
+                daemon=True,
+            )
+            for i in range(n_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __len__(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._n_waiting
+
+    def submit(
+        self,
+        fn: Callable[[], Any],
+        *,
+        priority: Priority,
+        deadline: float,
+    ) -> Future:
+        """Schedule fn and return future of its result.
+
+        Args:
+            fn: job to run
+            priority: priority class of the job
+            deadline: time by the clock in use the job should be done by
+
+        Raises:
+            RuntimeError: if scheduler is shut down.
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._is_shutdown:
+                msg = "Scheduler is shut down"
+                raise RuntimeError(msg)
+            now = get_clock().now()
+            job = _Job(deadline, next(self._seq), now, priority, fn, future)
+            heapq.heappush(self._queues[priority], job)
+            heapq.heappush(self._by_age, (now, job.seq, job))
+            self._n_waiting += 1
+            self._cond.notify()
+        return future
+
+    def _take(self) -> _Job:
+        """Remove and return the next job, there should be one."""
+        while self._by_age[0][2].is_taken:
+            heapq.heappop(self._by_age)
+        submitted_at, _, oldest = self._by_age[0]
+        if get_clock().now() - submitted_at >= self.max_wait_s:
+            job = oldest
+            self.n_aged += 1
+        else:  # queues are in order of priority
+            queue = next(q for q in self._queues.values() if self._skip_taken(q))
+            job = heapq.heappop(queue)
+        job.is_taken = True
+        self._n_waiting -= 1
+        return job
+
+    @staticmethod
+    def _skip_taken(queue: list[_Job]) -> list[_Job]:
+        """Drop jobs taken by aging from the top of a queue and return it."""
+        while queue and queue[0].is_taken:
+            heapq.heappop(queue)
+        return queue
+
+    def _work(self) -> None:
+        """Run jobs until shutdown and the queue is empty."""
+        while True:
+            with self._cond:
+                while not self._n_waiting and not self._is_shutdown:
+                    self._cond.wait()
+                if not self._n_waiting:
+                    return
+                job = self._take()
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = job.fn()
+            except BaseException as exc:  # the future gets any error
+                job.future.set_exception(exc)
+            else:
+                job.future.set_result(result)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop workers after the queue is empty, wait for them if wait=True."""
+        with self._cond:
+            self._is_shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    """Caller waiting for a place, ordered by class, then by arrival."""
+
+    priority: Priority
+    seq: int
+    cond: threading.Condition = field(compare=False)
+    is_granted: bool = field(default=False, compare=False)
+    is_cancelled: bool = field(default=False, compare=False)
+
+
+class PrioritySlots:
+    """Semaphore which gives a freed slot to the most urgent waiting caller.
+
+    Callers of the same class get slots in order of arrival.
+    """
+
+    def __init__(self, n_slots: int) -> None:
+        """Initialize with all slots free."""
+        self._free = n_slots
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority: Priority, *, timeout: float | None = None) -> bool:
+        """Take a slot, wait up to timeout seconds (forever if None) for one.
+
+        Returns:
+            False if no slot was given in time.
+        """
+        with self._lock:
+            if self._free:
+                self._free -= 1
+                return True
+            if timeout is not None and timeout <= 0:
+                return False
+            cond = threading.Condition(self._lock)
+            waiter = _Waiter(priority, next(self._seq), cond)
+            heapq.heappush(self._waiters, waiter)
+            waiter.cond.wait_for(lambda: waiter.is_granted, timeout)
+            waiter.is_cancelled = not waiter.is_granted  # left in the heap
+            return waiter.is_granted
+
+    def release(self) -> None:
+        """Give the slot to the most urgent waiting caller or free it."""
+        with self._lock:
+            while self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                if not waiter.is_cancelled:
+                    waiter.is_granted = True
+                    waiter.cond.notify()
+                    return
+            self._free += 1
+
+    @property
+    def n_waiting(self) -> int:
+        """Number of callers waiting for a slot."""
+        with self._lock:
+            return sum(not waiter.is_cancelled for waiter in self._waiters)
+
+
+class SlaStats:
+    """Numbers of orders that met and missed their deadlines by priority."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._counts = {p: [0, 0] for p in Priority}  # met, missed
+        self._lock = threading.Lock()
+
+    def record(self, priority: Priority, *, is_met: bool) -> None:
+        """Count finished order."""
+        with self._lock:
+            self._counts[priority][0 if is_met else 1] += 1
+
+    def as_dict(self) -> dict[str, dict[str, int]]:
+        """Return met and missed orders by name of priority class."""
+        return {
+            priority.name.lower(): {"met": met, "missed": missed}
+            for priority, (met, missed) in self._counts.items()
+        }
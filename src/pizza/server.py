@@ -0,0 +1,240 @@
+"""Daemon that keeps one warm restaurant and takes orders over a Unix socket.
+
+Protocol is JSON lines: a client sends one JSON object per line
+and gets one JSON object per line back, many requests can go
+through one connection. Requests:
+    {"op": "ping"}
+    {"op": "stats"}
+    {"op": "order", "pizzas": [[name, size], ...], "delivery": bool,
+        "name": str, "phone_number": str, "idempotency_key": str,
+        "priority": "express" | "delivery" | "pickup"}
+Responses have "ok": true and results, or "ok": false and "error".
+A retried order of a client with the same idempotency_key gets the response
+of the original one and nothing is baked again. Priority is used
+by a scheduled kitchen (pizza serve --scheduled).
+"""
+import json
+import os
+import socket
+import socketserver
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # CLI uses ServeClient without loading business logic
+    from pizza.business import Restaurant
+
+
+def restaurant_stats(restaurant: "Restaurant") -> dict[str, Any]:
+    """Return statistics of caches and deadlines of the restaurant."""
+    stats: dict[str, Any] = {"idempotency": restaurant.idempotency.stats()}
+    if restaurant.warm_inventory is not None:
+        stats["warm_inventory"] = restaurant.warm_inventory.stats()
+    if restaurant.kitchen is not None:
+        stats["sla"] = restaurant.kitchen.sla.as_dict()
+    if restaurant.hedging is not None:
+        stats["hedging"] = restaurant.hedging.stats()
+    return stats
+
+
+def handle_request(restaurant: "Restaurant", request: dict[str, Any]) -> dict:
+    """Process one request with the restaurant and return the response."""
+    from pizza.business import client_key
+    from pizza.deadlines import DeadlineExceeded
+    from pizza.pizza_menu import validate_pizza
+    from pizza.scheduling import Priority
+
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True}
+    if op == "stats":
+        return {"ok": True, **restaurant_stats(restaurant)}
+    if op != "order":
+        return {"ok": False, "error": f"Unknown operation {op!r}"}
+    try:
+        items = [(str(name), str(size)) for name, size in request["pizzas"]]
+        is_delivery = bool(request.get("delivery", False))
+        priority = request.get("priority")
+        if priority is not None:
+            priority = Priority[priority.upper()]
+        timeout = request.get("timeout")
+        if timeout is not None:
+            timeout = float(timeout)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        msg = (
+            "Order should have a list of [name, size], an optional priority: "
+            "express, delivery or pickup and an optional timeout in seconds"
+        )
+        return {"ok": False, "error": msg}
+    messages = []
+    for pizza_name, size in items:
+        is_success, message = validate_pizza(pizza_name, size, restaurant.menu)
+        if not is_success:
+            return {"ok": False, "error": message}
+        messages.append(message)
+
+    name = str(request.get("name", "Pavel"))
+    phone_number = str(request.get("phone_number", "+1337"))
+
+    def make_orders() -> dict[str, Any]:
+        client = restaurant.clients.get_or_create(
+            name,
+            phone_number,
+            is_delivery=is_delivery,
+        )
+        start = time.perf_counter()
+        pizzas = client.make_orders(
+            items,
+            priority=priority,
+            timeout=timeout,
+            is_delivery=is_delivery,
+        )
+        client.get_stock().clear()  # food is handed over in the response
+        return {
+            "ok": True,
+            "order": ", ".join(messages),
+            "pizzas": [str(pizza) for pizza in pizzas],
+            "seconds": time.perf_counter() - start,
+        }
+
+    idempotency_key = request.get("idempotency_key")
+    try:
+        if idempotency_key is None:
+            response = make_orders()
+        else:
+            response = restaurant.idempotency.run(
+                (client_key(name, phone_number), str(idempotency_key)),
+                make_orders,
+            )
+    except (KeyError, ValueError, RuntimeError) as exc:  # e.g. kitchen overload
+        response = {"ok": False, "error": str(exc)}
+    except DeadlineExceeded:
+        response = {
+            "ok": False,
+            "error": f"Order took longer than {timeout} seconds and was cancelled",
+        }
+    return response
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serve requests of one connection until it is closed."""
+
+    server: "OrderServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                response = {"ok": False, "error": "Request should be JSON"}
+            else:
+                response = handle_request(self.server.restaurant, request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class OrderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server with a thread per connection and a shared restaurant.
+
+    Attributes:
+        restaurant: restaurant that processes all orders
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, restaurant: "Restaurant") -> None:
+        """Bind to socket_path, replacing a stale socket of a dead daemon.
+
+        Raises:
+            RuntimeError: if another daemon is listening on socket_path.
+        """
+        self.restaurant = restaurant
+        if os.path.exists(socket_path):
+            if (client := ServeClient.connect(socket_path)) is not None:
+                client.close()
+                msg = f"pizza serve is already running on {socket_path}"
+                raise RuntimeError(msg)
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)  # type: ignore[arg-type]
+
+
+class ServeClient:
+    """Persistent connection to pizza serve."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        """Use connected socket."""
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    @classmethod
+    def connect(cls, socket_path: str) -> "ServeClient | None":
+        """Connect to the daemon, return None if it isn't running."""
+        if not socket_path:
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            sock.close()
+            return None
+        return cls(sock)
+
+    def request(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Send request and wait for the response.
+
+        Raises:
+            ConnectionError: if the daemon has closed the connection.
+        """
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            msg = "pizza serve closed the connection"
+            raise ConnectionError(msg)
+        return json.loads(line)
+
+    def order(  # noqa: PLR0913
+        self,
+        items: list[tuple[str, str]],
+        *,
+        is_delivery: bool,
+        name: str = "Pavel",
+        phone_number: str = "+1337",
+        idempotency_key: str | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Order items and wait until they are delivered or picked up.
+
+        Retries with the same idempotency_key get the original response.
+        An order that isn't done in timeout seconds is cancelled.
+        """
+        request = {
+            "op": "order",
+            "pizzas": items,
+            "delivery": is_delivery,
+            "name": name,
+            "phone_number": phone_number,
+        }
+        if idempotency_key is not None:
+            request["idempotency_key"] = idempotency_key
+        if timeout is not None:
+            request["timeout"] = timeout
+        return self.request(request)
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "ServeClient":
+        """Use client as a context manager which closes it at exit."""
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        """Close the connection at the end of the with block."""
+        self.close()
@@ -0,0 +1,278 @@
+"""Discrete-event simulation of a restaurant to size its kitchen.
+
+Orders arrive as a Poisson process, each of them for a pizza drawn
+from the mix, wait for a free oven, then wait for a free courier
+(delivery) or are picked up by a client.
+Durations of steps are drawn from the same uniform distribution
+as the synthetic latency of Restaurant and Client (MIN/MAX_LATENCY_MS).
+
+Nothing sleeps and no object is created per order or per event:
+times are kept in arrays and both stages are FIFO multi-server queues,
+computed with a heap of free times of servers.
+"""
+import heapq
+import itertools
+import math
+import random
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from pizza.constants import MAX_LATENCY_MS, MIN_LATENCY_MS
+from pizza.pizza_menu import LowerKeyMenu, pizza_menu
+
+
+@dataclass
+class SimulationConfig:
+    """Parameters of a simulation.
+
+    Attributes:
+        n_orders: number of orders to simulate
+        rate_per_min: mean number of arriving orders per minute
+        mix: weights of pizzas by name, all pizzas are equal if empty
+        delivery_ratio: share of orders to be delivered, others are picked up
+        n_ovens: number of pizzas baked at the same time
+        n_couriers: number of deliveries made at the same time
+        seed: seed of random generator for reproducible results
+    """
+
+    n_orders: int = 10_000
+    rate_per_min: float = 30.0
+    mix: dict[str, float] = field(default_factory=dict)
+    delivery_ratio: float = 0.5
+    n_ovens: int = 2
+    n_couriers: int = 2
+    seed: int | None = None
+
+
+@dataclass
+class StageStats:
+    """Queue statistics of one stage (ovens or couriers).
+
+    Attributes:
+        n_served: number of orders that went through the stage
+        mean_queue: time-average number of orders waiting
+        max_queue: max number of orders waiting at the same time
+        mean_wait_s: mean waiting time for a free server
+        utilization: share of time servers were busy
+    """
+
+    n_served: int
+    mean_queue: float
+    max_queue: int
+    mean_wait_s: float
+    utilization: float
+
+
+@dataclass
+class SimulationReport:
+    """Results of a simulation.
+
+    Attributes:
+        n_orders: number of simulated orders
+        duration_s: time from the first arrival to the last finished order
+        throughput_per_min: finished orders per minute
+        latency_percentiles_s: order latency (arrival to getting food)
+            by percentile: 50, 95, 99
+        ovens: queue statistics of baking
+        couriers: queue statistics of delivery
+        orders_by_pizza: number of orders of each pizza
+        latency_by_pizza_s: order latency of each pizza by percentile
+    """
+
+    n_orders: int
+    duration_s: float
+    throughput_per_min: float
+    latency_percentiles_s: dict[int, float]
+    ovens: StageStats
+    couriers: StageStats
+    orders_by_pizza: dict[str, int]
+    latency_by_pizza_s: dict[str, dict[int, float]]
+
+
+def _fifo_servers(
+    ready: Iterable[float],
+    durations: Iterable[float],
+    n_servers: int,
+) -> tuple[array, array]:
+    """Serve orders in the order they are ready by the first free server.
+
+    Args:
+        ready: non-decreasing times when orders join the queue
+        durations: service time of every order
+        n_servers: number of servers
+
+    Returns:
+        start and end times of service of every order.
+    """
+    free_at = [0.0] * n_servers  # heap of times when servers are free
+    starts, ends = array("d"), array("d")
+    for ready_at, duration in zip(ready, durations, strict=True):
+        start = max(ready_at, free_at[0])
+        end = start + duration
+        heapq.heapreplace(free_at, end)
+        starts.append(start)
+        ends.append(end)
+    return starts, ends
+
+
+def _stage_stats(
+    ready: array,
+    starts: array,
+    durations: array,
+    n_servers: int,
+    horizon: float,
+) -> StageStats:
+    """Compute queue statistics of a FIFO stage.
+
+    Times in ready and starts are non-decreasing, so the number of waiting
+    orders is found by one linear merge of both sequences.
+    """
+    n = len(ready)
+    if n == 0 or horizon <= 0:
+        return StageStats(n, 0.0, 0, 0.0, 0.0)
+    total_wait = sum(starts) - sum(ready)
+    max_queue = j = 0
+    for i, ready_at in enumerate(ready):
+        while j < n and starts[j] <= ready_at:  # orders that left the queue
+            j += 1
+        max_queue = max(max_queue, i + 1 - j)
+    return StageStats(
+        n_served=n,
+        mean_queue=total_wait / horizon,
+        max_queue=max_queue,
+        mean_wait_s=total_wait / n,
+        utilization=sum(durations) / (horizon * n_servers),
+    )
+
+
+def _percentile(sorted_values: list[float], percent: int) -> float:
+    """Nearest-rank percentile of sorted values."""
+    rank = math.ceil(percent / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, rank)]
+
+
+def _percentiles(sorted_values: list[float]) -> dict[int, float]:
+    """Percentiles 50, 95 and 99 of sorted values."""
+    return {p: _percentile(sorted_values, p) for p in (50, 95, 99)}
+
+
+def simulate(
+    config: SimulationConfig,
+    menu: LowerKeyMenu = pizza_menu,
+) -> SimulationReport:
+    """Run discrete-event simulation of the restaurant with config.
+
+    Raises:
+        KeyError: if a pizza from the mix is not on the menu.
+        ValueError: if parameters are out of their ranges.
+    """
+    if config.n_orders <= 0 or config.rate_per_min <= 0:
+        msg = "Number of orders and arrival rate should be positive"
+        raise ValueError(msg)
+    if config.n_ovens <= 0 or config.n_couriers <= 0:
+        msg = "Kitchen should have at least one oven and one courier"
+        raise ValueError(msg)
+    if not 0 <= config.delivery_ratio <= 1:
+        msg = "Delivery ratio should be between 0 and 1"
+        raise ValueError(msg)
+    mix = config.mix or {pizza_cls.name: 1.0 for pizza_cls in menu.values()}
+    names = [menu[name].name for name in mix]  # raises KeyError if not on menu
+
+    rng = random.Random(config.seed)
+    n = config.n_orders
+    pizza_ids = rng.choices(range(len(names)), weights=list(mix.values()), k=n)
+    min_s, max_s = MIN_LATENCY_MS / 1000, MAX_LATENCY_MS / 1000
+    rate_per_s = config.rate_per_min / 60
+
+    arrivals = array("d")
+    now = 0.0
+    for _ in range(n):
+        now += rng.expovariate(rate_per_s)
+        arrivals.append(now)
+    bake_times = array("d", (rng.uniform(min_s, max_s) for _ in range(n)))
+    bake_starts, baked = _fifo_servers(arrivals, bake_times, config.n_ovens)
+
+    is_delivery = [rng.random() < config.delivery_ratio for _ in range(n)]
+    trip_times = array("d", (rng.uniform(min_s, max_s) for _ in range(n)))
+    # couriers take orders in the order they are baked
+    delivery_ids = sorted(
+        (i for i in range(n) if is_delivery[i]),
+        key=baked.__getitem__,
+    )
+    delivery_ready = array("d", (baked[i] for i in delivery_ids))
+    delivery_times = array("d", (trip_times[i] for i in delivery_ids))
+    delivery_starts, delivered = _fifo_servers(
+        delivery_ready,
+        delivery_times,
+        config.n_couriers,
+    )
+
+    done = array("d", (b + t for b, t in zip(baked, trip_times, strict=True)))
+    for i, delivered_at in zip(delivery_ids, delivered, strict=True):
+        done[i] = delivered_at
+    by_pizza: list[list[float]] = [[] for _ in names]
+    for pizza_id, done_at, arrived_at in zip(pizza_ids, done, arrivals, strict=True):
+        by_pizza[pizza_id].append(done_at - arrived_at)
+    latencies = sorted(itertools.chain.from_iterable(by_pizza))
+    for pizza_latencies in by_pizza:
+        pizza_latencies.sort()
+
+    horizon = max(done) - arrivals[0]
+    return SimulationReport(
+        n_orders=n,
+        duration_s=horizon,
+        throughput_per_min=n / horizon * 60,
+        latency_percentiles_s=_percentiles(latencies),
+        ovens=_stage_stats(
+            arrivals,
+            bake_starts,
+            bake_times,
+            config.n_ovens,
+            horizon,
+        ),
+        couriers=_stage_stats(
+            delivery_ready,
+            delivery_starts,
+            delivery_times,
+            config.n_couriers,
+            horizon,
+        ),
+        orders_by_pizza={
+            name: len(pizza_latencies)
+            for name, pizza_latencies in zip(names, by_pizza, strict=True)
+            if pizza_latencies
+        },
+        latency_by_pizza_s={
+            name: _percentiles(pizza_latencies)
+            for name, pizza_latencies in zip(names, by_pizza, strict=True)
+            if pizza_latencies
+        },
+    )
+
+
+def _format_percentiles(percentiles: dict[int, float]) -> str:
+    """Return percentiles of latency as e.g. 'p50 1.20 s, p95 2.80 s'."""
+    return ", ".join(f"p{p} {seconds:.2f} s" for p, seconds in percentiles.items())
+
+
+def format_report(report: SimulationReport) -> str:
+    """Return report as a multiline human-readable string."""
+    lines = [
+        f"Orders: {report.n_orders}, simulated time: {report.duration_s:.1f} s",
+        f"Throughput: {report.throughput_per_min:.2f} orders/min",
+        f"Order latency: {_format_percentiles(report.latency_percentiles_s)}",
+    ]
+    stages = (("Ovens", report.ovens), ("Couriers", report.couriers))
+    for stage_name, stage in stages:
+        lines.append(
+            f"{stage_name}: served {stage.n_served}, "
+            f"utilization {stage.utilization:.0%}, "
+            f"queue mean {stage.mean_queue:.2f} max {stage.max_queue}, "
+            f"mean wait {stage.mean_wait_s:.2f} s",
+        )
+    lines.append("Orders by pizza:")
+    for name, n in report.orders_by_pizza.items():
+        latency = _format_percentiles(report.latency_by_pizza_s[name])
+        lines.append(f"  {name}: {n}, latency {latency}")
+    return "\n".join(lines)
@@ -1,51 +1,137 @@
-"""Adds spinner for long tasks. Inspiration came from the book Fluent Python."""
+"""Adds spinner for long tasks. Inspiration came from the book Fluent Python.
+
+One long-lived renderer thread draws all active tasks in a single status line,
+so concurrent tasks don't clobber each other's output
+and decorated calls don't create a thread each.
+"""
 import functools
+import inspect
 import itertools
-from threading import Event, Thread
+import sys
+import threading
+import time
+from collections import Counter
+
+SPINNER_CHARS = r"\|/-"
 
 
-def spin(start_msg: str, end_msg: str, done: Event) -> None:
-    """Cycle dashes forever until the other thread don't change the Event.
+class ProgressRenderer:
+    """Draws spinners of all active tasks with a fixed frame rate.
 
-    First will be printed start_msg with a spinner
-    After Event is True end_msg printed in the same line, replacing start_msg
+    Tasks register with start_task and unregister with finish_task.
+    The drawing thread starts with the first task and sleeps
+    while there are no active tasks.
 
-    Args:
-        start_msg: pizza_size printed in the start and until the finish
-        end_msg: pizza_size printed in the end
-        done: when Event is True, spinner finishes and prints end_msg.
+    Attributes:
+        frame_s: seconds between redraws
     """
-    for char in itertools.cycle(r"\|/-"):
-        status = f"\r {char} {start_msg}"
-        print(status, end="", flush=True)
-        if done.wait(0.1):  # waits for done to be True
-            break
-    print(
-        f"\r{end_msg}! ",
-        end="",
-    )  # print success pizza_size rewriting previous msg
+
+    def __init__(self, frame_s: float = 0.1) -> None:
+        """Initialize renderer without starting the thread."""
+        self.frame_s = frame_s
+        self._active: dict[int, str] = {}  # task id -> start_msg
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._hold_until = 0.0  # don't redraw until finish messages are written
+
+    def start_task(self, start_msg: str) -> int:
+        """Register task to draw and return its id."""
+        with self._cond:
+            task_id = next(self._ids)
+            self._active[task_id] = start_msg
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._render,
+                    name="progress-renderer",
+                    daemon=True,
+                )
+                self._thread.start()
+            self._cond.notify()
+        return task_id
+
+    def finish_task(self, task_id: int, end_msg: str | None) -> None:
+        """Unregister task and print end_msg (if any) in place of the status line."""
+        with self._cond:
+            del self._active[task_id]
+            self._write(f"\r\x1b[K{end_msg}! " if end_msg else "\r\x1b[K")
+            # give the caller time to finish the line (e.g. with timing info)
+            self._hold_until = time.monotonic() + self.frame_s
+
+    def _render(self) -> None:
+        """Redraw status line forever, sleeping while there is nothing to draw."""
+        import shutil
+
+        for char in itertools.cycle(SPINNER_CHARS):
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+                if time.monotonic() >= self._hold_until:
+                    width = shutil.get_terminal_size().columns - 1
+                    self._write(self._status_line(char, width))
+            time.sleep(self.frame_s)
+
+    def _status_line(self, char: str, width: int) -> str:
+        """Status of all active tasks grouped by their messages, cut to width."""
+        counts = Counter(self._active.values())
+        status = " | ".join(
+            f"{char} {msg}" + (f" x{n}" if n > 1 else "")
+            for msg, n in counts.items()
+        )
+        return f"\r\x1b[K{status[:width]}"
+
+    @staticmethod
+    def _write(text: str) -> None:
+        """Write text to stdout right away."""
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+renderer = ProgressRenderer()
 
 
 def add_spinner(start_msg: str, end_msg: str):
-    """Function decorator for applying spin function to a long action."""
+    """Function decorator for showing spinner during a long action.
+
+    If stdout is not a TTY, spinner is not drawn, only end_msg is printed.
+    """
+
+    def start() -> int | None:
+        if not sys.stdout.isatty():
+            return None
+        return renderer.start_task(start_msg)
+
+    def finish(task_id: int | None, *, is_success: bool) -> None:
+        if task_id is not None:
+            renderer.finish_task(task_id, end_msg if is_success else None)
+        elif is_success:
+            print(f"{end_msg}! ", end="")
 
     def outer_wrapper(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                task_id = start()
+                try:
+                    result = await fn(self, *args, **kwargs)
+                except BaseException:
+                    finish(task_id, is_success=False)
+                    raise
+                finish(task_id, is_success=True)
+                return result
+
+            return async_wrapper
+
         @functools.wraps(fn)
-        def inner_wrapper(self, *args, **kwargs) -> int:
-            done = Event()
-            spinner = Thread(
-                target=spin,
-                args=(start_msg, end_msg, done),
-            )  # create new thread
-            spinner.start()  # start a second thread
-            result = fn(
-                self,
-                *args,
-                **kwargs,
-            )  # time.sleep inside the function will block main thread
-            # and release GIL
-            done.set()  # going to stop spin
-            spinner.join()  # wait until spin finishes
+        def inner_wrapper(self, *args, **kwargs):
+            task_id = start()
+            try:
+                result = fn(self, *args, **kwargs)
+            except BaseException:
+                finish(task_id, is_success=False)
+                raise
+            finish(task_id, is_success=True)
             return result
 
         return inner_wrapper
@@ -0,0 +1,319 @@
+"""Persistent storage of orders of a restaurant.
+
+A store keeps open orders, so they survive restarts, and closed orders
+as order history. Restaurant writes to a store on every change of its
+order book and restores open orders from it at startup.
+
+SQLiteStore writes in batches: changes are buffered in memory
+and committed in one transaction with executemany when the batch is full
+or flush_interval_s has passed, so the cost of a commit is shared
+by many orders. A background thread flushes changes of an idle store.
+A change that the database rejects is logged and dropped, so it doesn't
+take the rest of its batch or the background thread down with it.
+"""
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple, Protocol
+
+from pizza.order_book import Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+class StoredOrder(NamedTuple):
+    """Order as it is kept in a store.
+
+    Client key of orders in a store is a pair of client name and phone number.
+    """
+
+    order_id: int
+    client_name: str
+    client_phone: str
+    pizza_name: str
+    size: str
+    status: str
+
+
+class StockStore(Protocol):
+    """Storage backend of open orders and order history."""
+
+    def add(self, order: Order) -> None:
+        """Save new open order."""
+
+    def set_status(self, order_ids: Iterable[int], status: OrderStatus) -> None:
+        """Save new status of open orders."""
+
+    def close_orders(self, order_ids: Iterable[int]) -> None:
+        """Move orders to history."""
+
+    def open_orders(self) -> list[StoredOrder]:
+        """Return open orders ordered by id."""
+
+    def history(self, client_key: tuple[str, str]) -> list[StoredOrder]:
+        """Return closed orders of a client ordered by id."""
+
+    def last_order_id(self) -> int:
+        """Return the largest id of all orders, 0 if there are none."""
+
+    def flush(self) -> None:
+        """Write buffered changes."""
+
+    def close(self) -> None:
+        """Write buffered changes and release resources."""
+
+
+def _stored(order: Order) -> StoredOrder:
+    """Convert order of the order book into a row of a store."""
+    name, phone = order.client_key  # type: ignore[misc]
+    return StoredOrder(
+        order.order_id,
+        name,
+        phone,
+        order.pizza_type,
+        order.pizza.size,
+        order.status.value,
+    )
+
+
+class MemoryStore:
+    """Store in process memory, e.g. to share orders between restaurants."""
+
+    def __init__(self) -> None:
+        """Initialize empty store."""
+        self._open: dict[int, StoredOrder] = {}
+        self._closed: dict[int, StoredOrder] = {}
+        self._lock = threading.Lock()
+
+    def add(self, order: Order) -> None:
+        """Save new open order."""
+        with self._lock:
+            self._open[order.order_id] = _stored(order)
+
+    def set_status(self, order_ids: Iterable[int], status: OrderStatus) -> None:
+        """Save new status of open orders."""
+        with self._lock:
+            for order_id in order_ids:
+                stored = self._open[order_id]
+                self._open[order_id] = stored._replace(status=status.value)
+
+    def close_orders(self, order_ids: Iterable[int]) -> None:
+        """Move orders to history."""
+        with self._lock:
+            for order_id in order_ids:
+                self._closed[order_id] = self._open.pop(order_id)
+
+    def open_orders(self) -> list[StoredOrder]:
+        """Return open orders ordered by id."""
+        return sorted(self._open.values())
+
+    def history(self, client_key: tuple[str, str]) -> list[StoredOrder]:
+        """Return closed orders of a client ordered by id."""
+        return sorted(
+            stored
+            for stored in self._closed.values()
+            if (stored.client_name, stored.client_phone) == client_key
+        )
+
+    def last_order_id(self) -> int:
+        """Return the largest id of all orders, 0 if there are none."""
+        return max(itertools.chain(self._open, self._closed), default=0)
+
+    def flush(self) -> None:
+        """Nothing to write, changes are saved immediately."""
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    client_name TEXT NOT NULL,
+    client_phone TEXT NOT NULL,
+    pizza_name TEXT NOT NULL,
+    size TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    closed_at REAL
+);
+CREATE INDEX IF NOT EXISTS orders_open
+    ON orders (order_id) WHERE closed_at IS NULL;
+CREATE INDEX IF NOT EXISTS orders_client
+    ON orders (client_name, client_phone);
+"""
+# statements are constant strings, so sqlite3 prepares each of them once
+_INSERT = (
+    "INSERT INTO orders (order_id, client_name, client_phone, pizza_name,"
+    " size, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SET_STATUS = "UPDATE orders SET status = ? WHERE order_id = ?"
+_CLOSE = "UPDATE orders SET closed_at = ? WHERE order_id = ?"
+_COLUMNS = "order_id, client_name, client_phone, pizza_name, size, status"
+
+
+class SQLiteStore:
+    """Store in a local SQLite database in WAL mode with batched writes.
+
+    Changes are visible to this store at once (reads flush the buffer),
+    and are durable after a flush. Buffered changes are flushed on every
+    write that finds them old enough, and by a background thread started
+    on the first write, so even an idle store doesn't keep them longer than
+    flush_interval_s. Up to batch_size changes or flush_interval_s seconds
+    of changes can be lost if the process is killed.
+
+    Attributes:
+        path: path to the database file
+        batch_size: number of buffered changes that triggers a flush
+        flush_interval_s: max age of buffered changes, inf disables
+            the background thread
+        n_commits: number of transactions committed
+        n_dropped: number of changes rejected by the database and dropped
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        batch_size: int = 512,
+        flush_interval_s: float = 0.5,
+    ) -> None:
+        """Open or create the database at path."""
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.n_commits = 0
+        self.n_dropped = 0
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,  # transactions are managed explicitly
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending: list[tuple[str, tuple]] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def _flush_periodically(self) -> None:
+        """Flush buffered changes every flush_interval_s until closed."""
+        while not self._closed.wait(self.flush_interval_s):
+            self.flush()
+
+    def _start_flusher(self) -> None:
+        """Start the background flush thread, also again in a forked process."""
+        if self.flush_interval_s == float("inf") or (
+            self._flusher is not None and self._flusher.is_alive()
+        ):
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            name="sqlite-flush",
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _write(self, rows: Iterable[tuple[str, tuple]]) -> None:
+        """Buffer changes and flush if the batch is full or old enough."""
+        with self._lock:
+            self._start_flusher()
+            self._pending.extend(rows)
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval_s
+            ):
+                self._flush()
+
+    def add(self, order: Order) -> None:
+        """Save new open order."""
+        self._write([(_INSERT, (*_stored(order), time.time()))])
+
+    def set_status(self, order_ids: Iterable[int], status: OrderStatus) -> None:
+        """Save new status of open orders."""
+        self._write((_SET_STATUS, (status.value, i)) for i in order_ids)
+
+    def close_orders(self, order_ids: Iterable[int]) -> None:
+        """Move orders to history."""
+        now = time.time()
+        self._write((_CLOSE, (now, order_id)) for order_id in order_ids)
+
+    def _select(self, where: str, params: tuple = ()) -> list[StoredOrder]:
+        """Flush buffer and select orders ordered by id."""
+        self.flush()
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM orders WHERE {where} ORDER BY order_id",
+            params,
+        )
+        return [StoredOrder(*row) for row in rows]
+
+    def open_orders(self) -> list[StoredOrder]:
+        """Return open orders ordered by id."""
+        return self._select("closed_at IS NULL")
+
+    def history(self, client_key: tuple[str, str]) -> list[StoredOrder]:
+        """Return closed orders of a client ordered by id."""
+        return self._select(
+            "client_name = ? AND client_phone = ? AND closed_at IS NOT NULL",
+            client_key,
+        )
+
+    def last_order_id(self) -> int:
+        """Return the largest id of all orders, 0 if there are none."""
+        self.flush()
+        (last,) = self._conn.execute("SELECT MAX(order_id) FROM orders").fetchone()
+        return last or 0
+
+    def flush(self) -> None:
+        """Write buffered changes in one transaction."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write buffered changes, runs of the same statement go to executemany.
+
+        If the batch fails, it is rolled back and written again change
+        by change, dropping the changes the database rejects.
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._conn:  # one transaction for the whole buffer
+                self._conn.execute("BEGIN")
+                for sql, group in itertools.groupby(pending, key=lambda x: x[0]):
+                    self._conn.executemany(sql, [params for _, params in group])
+        except sqlite3.Error:
+            logger.exception("Batch of %d changes failed", len(pending))
+            try:
+                self._write_each(pending)
+            except sqlite3.Error:
+                logger.exception("Dropped batch of %d changes", len(pending))
+                self.n_dropped += len(pending)
+                return
+        self.n_commits += 1
+
+    def _write_each(self, pending: list[tuple[str, tuple]]) -> None:
+        """Write changes in one transaction, skipping the rejected ones."""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            for sql, params in pending:
+                try:
+                    self._conn.execute(sql, params)
+                except sqlite3.Error:
+                    logger.exception("Dropped change %s %s", sql, params)
+                    self.n_dropped += 1
+
+    def close(self) -> None:
+        """Stop the background thread, write buffered changes and close."""
+        self._closed.set()
+        if self._flusher is not None and self._flusher.is_alive():
+            self._flusher.join()
+        self.flush()
+        self._conn.close()
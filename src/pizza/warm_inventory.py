@@ -0,0 +1,183 @@
+"""Warm inventory: pizzas baked ahead of time for the expected demand.
+
+Demand for every pizza type and size is counted with exponential decay,
+so recent orders weigh more than old ones. Refills bake the hottest
+items up to a capacity split by their share of demand, and orders take
+a baked pizza from the inventory instead of waiting for the oven.
+Pizzas older than max_age_s are thrown away as waste.
+"""
+import threading
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from pizza.clock import get_clock
+from pizza.pizza_menu import Pizza
+
+WarmKey = tuple[str, str]  # pizza name and size
+MIN_TRACKED_DEMAND = 0.01  # demand counters below are forgotten
+
+
+class WarmInventory:
+    """Pre-baked pizzas by type and size, with decayed demand counters.
+
+    Time is measured by the clock in use, so it can be virtual.
+
+    Attributes:
+        capacity: max number of pizzas in the inventory
+        max_age_s: pizzas older than this are thrown away
+        half_life_s: seconds for demand of an item to halve without orders
+        min_demand: items with smaller decayed demand are not pre-baked
+        hits: orders served from the inventory
+        misses: orders that had to be baked
+        baked: pizzas baked for the inventory
+        wasted: pizzas thrown away because of age or colder demand,
+            or because the inventory was filled while they were baked
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 8,
+        max_age_s: float = 120.0,
+        half_life_s: float = 60.0,
+        min_demand: float = 0.5,
+    ) -> None:
+        """Initialize empty inventory without demand.
+
+        Raises:
+            ValueError: if capacity, max_age_s or half_life_s is not positive.
+        """
+        if capacity < 1 or max_age_s <= 0 or half_life_s <= 0:
+            msg = "Capacity, max age and half-life of inventory should be positive"
+            raise ValueError(msg)
+        self.capacity = capacity
+        self.max_age_s = max_age_s
+        self.half_life_s = half_life_s
+        self.min_demand = min_demand
+        self.hits = self.misses = self.baked = self.wasted = 0
+        self._demand: dict[WarmKey, tuple[float, float]] = {}  # value, updated at
+        self._items: dict[WarmKey, deque[tuple[float, Pizza]]] = {}  # oldest first
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of pizzas in the inventory."""
+        return self._size
+
+    def _decayed(self, key: WarmKey, now: float) -> float:
+        """Demand of an item at time now."""
+        value, updated_at = self._demand.get(key, (0.0, now))
+        return value * 0.5 ** ((now - updated_at) / self.half_life_s)
+
+    def demand(self, pizza_name: str, size: str) -> float:
+        """Return current decayed demand of an item."""
+        with self._lock:
+            return self._decayed((pizza_name, size), get_clock().now())
+
+    def _evict_stale(self, now: float) -> None:
+        """Throw away pizzas older than max_age_s."""
+        for key, items in list(self._items.items()):
+            while items and now - items[0][0] >= self.max_age_s:
+                items.popleft()
+                self._size -= 1
+                self.wasted += 1
+            if not items:
+                del self._items[key]
+
+    def take(self, pizza: Pizza) -> Pizza | None:
+        """Count demand for pizza and return a baked one like it if available."""
+        key = (type(pizza).name, pizza.size)
+        with self._lock:
+            now = get_clock().now()
+            self._demand[key] = (self._decayed(key, now) + 1, now)
+            self._evict_stale(now)
+            items = self._items.get(key)
+            if not items:
+                self.misses += 1
+                return None
+            _, baked = items.popleft()
+            if not items:
+                del self._items[key]
+            self._size -= 1
+            self.hits += 1
+            return baked
+
+    def plan(self) -> dict[WarmKey, int]:
+        """Return number of pizzas of every hot item the inventory should have.
+
+        Capacity is split by share of demand, the hottest items first.
+        """
+        with self._lock:
+            return self._plan(get_clock().now())
+
+    def _plan(self, now: float) -> dict[WarmKey, int]:
+        demand = {}
+        for key in list(self._demand):
+            value = self._decayed(key, now)
+            if value >= self.min_demand:
+                demand[key] = value
+            elif value < MIN_TRACKED_DEMAND:
+                del self._demand[key]  # keeps counters bounded by recent items
+        total = sum(demand.values())
+        targets = {}
+        left = self.capacity
+        for key, value in sorted(demand.items(), key=lambda x: -x[1]):
+            if left == 0:
+                break
+            targets[key] = min(left, max(1, round(self.capacity * value / total)))
+            left -= targets[key]
+        return targets
+
+    def refill(self, bake: Callable[[str, str], Pizza]) -> int:
+        """Bake missing hot items with bake(pizza_name, size).
+
+        Stale pizzas and pizzas above their target are thrown away first,
+        so there is room for hotter items. Baking is done without the lock,
+        orders can take pizzas meanwhile.
+
+        Returns:
+            number of pizzas added to the inventory.
+        """
+        with self._lock:
+            now = get_clock().now()
+            self._evict_stale(now)
+            targets = self._plan(now)
+            for key, items in list(self._items.items()):
+                while len(items) > targets.get(key, 0):
+                    items.pop()  # the freshest go, the oldest are taken first
+                    self._size -= 1
+                    self.wasted += 1
+                if not items:
+                    del self._items[key]
+            missing = [
+                (key, target - len(self._items.get(key, ())))
+                for key, target in targets.items()
+            ]
+        n_baked = 0
+        for (pizza_name, size), n in missing:
+            for _ in range(n):
+                pizza = bake(pizza_name, size)
+                with self._lock:
+                    self.baked += 1
+                    if self._size >= self.capacity:  # another refill filled it
+                        self.wasted += 1
+                        return n_baked
+                    self._items.setdefault((pizza_name, size), deque()).append(
+                        (get_clock().now(), pizza),
+                    )
+                    self._size += 1
+                n_baked += 1
+        return n_baked
+
+    def stats(self) -> dict[str, Any]:
+        """Return size of the inventory, hits, misses, baked and wasted pizzas."""
+        served = self.hits + self.misses
+        return {
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / served if served else 0.0,
+            "baked": self.baked,
+            "wasted": self.wasted,
+        }
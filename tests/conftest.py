@@ -0,0 +1,12 @@
+"""Shared configuration of tests."""
+import gc
+
+
+def pytest_collection_finish():
+    """Keep objects of the collection out of garbage collection of tests.
+
+    A full collection of them can take longer than the tight timeouts
+    of latency tests.
+    """
+    gc.collect()
+    gc.freeze()
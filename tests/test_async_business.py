@@ -0,0 +1,72 @@
+"""Tests for asyncio version of business logic."""
+import asyncio
+
+import pytest
+
+from pizza.async_business import AsyncClient, AsyncRestaurant
+from pizza.constants import TEST_LATENCY_S
+from pizza.decorators import LogTimeDecorator, TracingConfig, use_tracing
+from pizza.pizza_menu import Pizza, pizza_menu
+
+from .help_funcs import all_types_delivery
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+
+
+@pytest.fixture(name="enable_latency")
+def _use_test_latency():
+    """Make latency small but still existing."""
+    with use_tracing(TracingConfig(latency=True, test_latency=True)):
+        yield
+
+
+@all_types_delivery
+def test_async_pizza_order(is_delivery: bool):  # noqa: FBT001
+    """Same stock semantics as for the sync Client and Restaurant."""
+    restaurant = AsyncRestaurant(pizza_menu)
+    client = AsyncClient(is_delivery=is_delivery, restaurant=restaurant)
+    n_orders = 20
+
+    async def order_all():
+        await asyncio.gather(
+            *(client.make_order(first_pizza_name) for _ in range(n_orders)),
+        )
+
+    asyncio.run(order_all())
+    assert len(client.get_stock()) == n_orders
+    assert len(restaurant.get_stock()) == 0
+    assert all(
+        pizza.is_baked and isinstance(pizza, Pizza) for pizza in client.get_stock()
+    )
+
+
+@pytest.mark.usefixtures("enable_latency")
+@pytest.mark.timeout(TEST_LATENCY_S * 200)
+def test_async_orders_are_concurrent():
+    """Wall time of many orders is close to the longest order, not the sum."""
+    restaurant = AsyncRestaurant(pizza_menu)
+    clients = [
+        AsyncClient(restaurant=restaurant, is_delivery=bool(i % 2), name=str(i))
+        for i in range(200)
+    ]
+
+    async def order_all():
+        await asyncio.gather(*(c.make_order(first_pizza_name) for c in clients))
+
+    _, execution_time = LogTimeDecorator(is_return_time=True)(asyncio.run)(
+        order_all(),
+    )
+    # every order has 2 heavy steps, sequentially it would take 400 latencies
+    assert execution_time < TEST_LATENCY_S * 100
+    assert all(len(c.get_stock()) == 1 for c in clients)
+    assert len(restaurant.get_stock()) == 0
+
+
+def test_sync_entry_points_are_rejected():
+    """Sync methods would call coroutines without awaiting them."""
+    restaurant = AsyncRestaurant(pizza_menu)
+    client = AsyncClient(restaurant=restaurant, is_delivery=True)
+    with pytest.raises(TypeError, match="use await process_order"):
+        restaurant.process_orders([(first_pizza_name, "L")], client)
+    with pytest.raises(TypeError, match="use await make_order"):
+        client.make_orders([(first_pizza_name, "L")])
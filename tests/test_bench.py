@@ -0,0 +1,47 @@
+"""Tests for benchmarks of the hot path."""
+import json
+
+from click.testing import CliRunner
+
+from pizza.bench import BENCHMARKS, compare, run_benchmarks
+from pizza.cli import cli
+
+# disabled layers aren't applied, the rest is noise of measurement,
+# while any applied layer at least doubles the cost of a trivial method
+DISABLED_LAYERS_TOLERANCE = 0.5
+
+
+def test_all_benchmarks_run():
+    """Every benchmark returns positive time per operation."""
+    results = run_benchmarks(number=10)
+    assert results.keys() == BENCHMARKS.keys()
+    assert all(ns > 0 for ns in results.values())
+
+
+def test_disabled_layers_are_as_fast_as_plain_methods():
+    """Heavy task without tracing layers costs as much as a plain method."""
+    results = run_benchmarks(number=20_000, names=["layer.none", "layer.off"])
+    plain = {"layer": results["layer.none"]}
+    off = {"layer": results["layer.off"]}
+    assert compare(off, plain, tolerance=DISABLED_LAYERS_TOLERANCE) == {}
+
+
+def test_compare_finds_regressions():
+    """Only benchmarks slower than tolerance allows are regressions."""
+    baseline = {"fast": 100.0, "slow": 100.0, "new": 1.0}
+    results = {"fast": 110.0, "slow": 150.0}
+    assert compare(results, baseline, tolerance=0.2) == {"slow": 1.5}
+
+
+def test_bench_cli_baseline(tmp_path):
+    """Results saved by the CLI can be used as a baseline."""
+    output = tmp_path / "bench.json"
+    runner = CliRunner()
+    args = ["bench", "--number", "10", "--only", "pizza.eq"]
+    result = runner.invoke(cli, [*args, "--output", str(output)])
+    assert result.exit_code == 0
+    assert "pizza.eq" in json.loads(output.read_text())["results_ns"]
+
+    args += ["--baseline", str(output), "--tolerance", "1e9"]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
@@ -1,9 +1,9 @@
 """Tests for business logic (client, restaurant, pizza)."""
 import pytest
 
-from pizza.business import Client, Restaurant
+from pizza.business import Client, Restaurant, client_key
 from pizza.constants import AVAILABLE_PIZZA_SIZES
-from pizza.pizza_menu import Pizza, pizza_menu, validate_pizza
+from pizza.pizza_menu import LowerKeyMenu, Pizza, pizza_menu, validate_pizza
 
 from .help_funcs import all_pizzas_parameters, all_types_delivery
 
@@ -14,7 +14,8 @@ Restaurant = Restaurant.__wrapped__  # type: ignore
 Client = Client.__wrapped__  # type: ignore
 
 # To take random first actual values if they don't matter
-first_pizza_name = next(iter(pizza_menu.values())).name
+first_pizza = next(iter(pizza_menu.values()))
+first_pizza_name = first_pizza.name
 first_pizza_size = AVAILABLE_PIZZA_SIZES[0]
 unk_pizza = "definitely_unknown_pizza"
 unk_size = "definitely_unknown_size"
@@ -27,6 +28,25 @@ def test_pizza_equality(pizza_class: type[Pizza]):
     assert pizza_class(size="XL") != pizza_class(size="L")
 
 
+@all_pizzas_parameters
+def test_pizza_hash(pizza_class: type[Pizza]):
+    """Equal pizzas have equal hashes and are deduplicated in sets."""
+    assert hash(pizza_class(size="l")) == hash(pizza_class(size="L"))
+    pizzas = {pizza_class(size=size) for size in AVAILABLE_PIZZA_SIZES * 2}
+    assert len(pizzas) == len(AVAILABLE_PIZZA_SIZES)
+    assert pizza_class.kind is type(pizza_class()).kind
+    assert not hasattr(pizza_class(), "__dict__")
+
+
+def test_base_pizza():
+    """Pizza without a recipe is a pizza of its own kind."""
+    pizza = Pizza(size="XL")
+    assert pizza == Pizza(size="xl")
+    assert hash(pizza) == hash(Pizza(size="XL"))
+    assert pizza != first_pizza(size="XL")
+    assert str(pizza) == "Pizza, Size: XL, Is baked: False"
+
+
 def test_pizza_inequality():
     """Test on first two pizzas from menu that they are considered different."""
     if len(pizza_menu) > 1:
@@ -100,3 +120,107 @@ def test_pizza_order_diff_clients():
     assert len(restaurant.get_stock()) == 0
     assert len(client1.get_stock()) == 1
     assert len(client2.get_stock()) == 1
+
+
+@all_types_delivery
+def test_bulk_order_single_trip(is_delivery: bool, monkeypatch):  # noqa: FBT001
+    """All pizzas of a bulk order are baked and delivered or picked up at once."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(is_delivery=is_delivery, restaurant=restaurant)
+    trips = []
+    trip_method = "_deliver" if is_delivery else "_pickup"
+    trip_owner = type(restaurant if is_delivery else client)  # clients have slots
+    original_trip = getattr(trip_owner, trip_method)
+
+    def counting_trip(*args):
+        trips.append(args)
+        return original_trip(*args)
+
+    monkeypatch.setattr(trip_owner, trip_method, counting_trip)
+    items = [
+        (pizza_class.name, size)
+        for pizza_class in pizza_menu.values()
+        for size in AVAILABLE_PIZZA_SIZES
+    ]
+    client.make_orders(items)
+    assert len(trips) == 1
+    assert len(client.get_stock()) == len(items)
+    assert len(restaurant.get_stock()) == 0
+    assert all(pizza.is_baked for pizza in client.get_stock())
+
+
+def test_bulk_order_is_validated_before_baking():
+    """Nothing is baked if any pizza of the order is wrong."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(is_delivery=False, restaurant=restaurant)
+    with pytest.raises(KeyError):
+        restaurant.process_orders(
+            [(first_pizza_name, first_pizza_size), (unk_pizza, first_pizza_size)],
+            client,
+        )
+    assert len(restaurant.get_stock()) == 0
+
+
+def test_client_registry_interns_clients():
+    """Same person gets the same client object whatever the spelling."""
+    restaurant = Restaurant(pizza_menu)
+    registry = restaurant.clients
+    client = registry.get_or_create("Ann  Lee", "+1 (337) 00")
+    assert registry.get_or_create("ann lee", "133700") is client
+    assert registry.lookup("ANN LEE", "1-337-00") is client
+    same = Client(
+        restaurant,
+        is_delivery=True,
+        name="ANN LEE",
+        phone_number="133700",
+    )
+    assert same == client
+    assert registry.intern(same) is client
+    assert registry.lookup("Bob", "1") is None
+
+    records = [("Bob", "1"), ("bob", "+1"), ("Ann Lee", "133700")]
+    n_new = registry.bulk_import(records)
+    assert n_new == 1
+    assert len(registry) == len({client.key, client_key("Bob", "1")})
+    assert not hasattr(client, "__dict__")
+
+
+def test_menu_lookup_ignores_case_and_spaces():
+    """Menu finds food by name in any case and with extra whitespace."""
+    assert pizza_menu["  hawaiian   SPECIAL "] is pizza_menu["Hawaiian Special"]
+    assert "PEPPERONI" in pizza_menu
+    assert pizza_menu.get(unk_pizza) is None
+
+
+def test_menu_changes_keep_keys_normalized():
+    """Dict methods that change the menu normalize keys and reset suggest."""
+    menu = LowerKeyMenu()
+    pepperoni = pizza_menu["Pepperoni"]
+    menu.update({"Foo  Bar": pepperoni}, Margherita=pizza_menu["Margherita"])
+    menu |= {"Hawaiian": pizza_menu["Hawaiian Special"]}
+    assert "foo bar" in menu
+    assert menu.setdefault("MARGHERITA", pepperoni) is pizza_menu["Margherita"]
+    assert menu.setdefault(" Pepperoni", pepperoni) is pepperoni
+    assert menu.suggest("peperoni") == ["Pepperoni"]
+    assert menu.pop("pepperoni") is pepperoni
+    assert menu.pop("pepperoni", None) is None
+    assert menu.suggest("peperoni") == []
+    assert menu.popitem() == ("hawaiian", pizza_menu["Hawaiian Special"])
+    assert "Hawaiian" not in menu
+    menu.clear()
+    assert menu.suggest("margarita") == []
+
+
+@pytest.mark.parametrize(
+    ("misspelled", "suggestion"),
+    [
+        ("peperoni", "Pepperoni"),
+        ("Margarita", "Margherita"),
+        ("hawaian", "Hawaiian"),
+    ],
+)
+def test_misspelled_pizza_suggestion(misspelled, suggestion):
+    """Validation suggests similar pizzas instead of the whole menu."""
+    is_valid, message = validate_pizza(pizza_name=misspelled, size=first_pizza_size)
+    assert not is_valid
+    assert f"Did you mean {suggestion}" in message
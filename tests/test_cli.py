@@ -2,13 +2,18 @@
 
 Tests are very basic and might be improved by exact matching.
 """
+import json
 import os
+import subprocess
+import sys
 
 import pytest
 from click.testing import CliRunner
 
+from pizza.business import client_key
 from pizza.cli import cli
 from pizza.constants import (
+    IMPORT_TIME_BUDGET_MS,
     INFO_LINES,
     INFO_MESSAGE_WRONG_PIZZA_LINES,
     NUM_ACTIONS_LINES,
@@ -17,10 +22,12 @@ from pizza.constants import (
 )
 from pizza.decorators import LogTimeDecorator
 from pizza.pizza_menu import pizza_menu
+from pizza.storage import SQLiteStore
 
 from .help_funcs import all_pizzas_parameters, all_types_delivery
 
 os.environ["LATENCY_ENABLED"] = "0"
+os.environ["PIZZA_SERVE_SOCKET"] = ""  # don't send orders to a running daemon
 
 
 @pytest.fixture()
@@ -87,6 +94,16 @@ def test_pizza_order(is_delivery, pizza_class, runner):
     assert len(split_result) == INFO_LINES + NUM_ACTIONS_LINES
 
 
+@all_types_delivery
+def test_bulk_pizza_order(is_delivery, runner):
+    """Order of all pizzas at once: baking of each pizza and a single trip."""
+    pizzas = [f"{pizza_class.name}:XL" for pizza_class in pizza_menu.values()]
+    params_cli = ["order", *pizzas] + (["--delivery"] if is_delivery else [])
+    exit_code, split_result = runner(params_cli)
+    assert exit_code == 0
+    assert len(split_result) == INFO_LINES + len(pizzas) + 1
+
+
 @all_pizzas_parameters
 def test_pizza_wrong_size(pizza_class, runner):
     """Test that program don't crash on unknown pizza size."""
@@ -127,3 +144,164 @@ def test_latency_exists(pizza_class, is_delivery, runner):
         args=params_cli,
     )
     assert execution_time > TEST_LATENCY_S
+
+
+def test_simulate(runner):
+    """Simulation prints its report."""
+    exit_code, split_result = runner(["simulate", "--orders", "100", "--seed", "1"])
+    assert exit_code == 0
+    assert split_result[0].startswith("Orders: 100")
+
+
+@pytest.mark.parametrize("weight", ["-1", "nan", "inf"])
+def test_simulate_rejects_bad_weights(runner, weight):
+    """Weights of the mix are finite and not negative."""
+    exit_code, split_result = runner(["simulate", "--mix", f"Pepperoni={weight}"])
+    assert exit_code != 0
+    assert "finite number >= 0" in split_result[-1]
+
+
+def test_metrics_file(runner, tmp_path):
+    """Metrics of heavy tasks are saved at exit."""
+    path = tmp_path / "metrics.prom"
+    exit_code, _ = runner(["--metrics", str(path), "order", "Pepperoni"])
+    assert exit_code == 0
+    assert 'pizza_tasks_total{task="bake"}' in path.read_text()
+
+
+def test_profile(runner, tmp_path):
+    """Profile of a command is saved as collapsed stacks."""
+    path = tmp_path / "stacks.txt"
+    exit_code, _ = runner(["--profile-output", str(path), "order", "Pepperoni"])
+    assert exit_code == 0
+    assert "[bake]" in path.read_text()
+
+
+def test_db_keeps_order_history(runner, tmp_path):
+    """Orders made with --db are saved to the database."""
+    path = tmp_path / "orders.db"
+    for _ in range(2):
+        exit_code, _ = runner(["--db", str(path), "order", "Pepperoni"])
+        assert exit_code == 0
+    store = SQLiteStore(path)
+    history = store.history(client_key("Pavel", "+1337"))
+    assert [stored.order_id for stored in history] == [1, 2]
+    assert store.open_orders() == []
+    store.close()
+
+
+def test_menu_from_file(runner, tmp_path, monkeypatch):
+    """Menu file replaces the default menu for all commands."""
+    monkeypatch.setenv("PIZZA_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "menu.json"
+    path.write_text('{"pizzas": [{"name": "Marinara", "recipe": ["garlic"]}]}')
+    menu_args = ["--menu", str(path)]
+    exit_code, split_result = runner([*menu_args, "menu", "--per-page", "1"])
+    assert exit_code == 0
+    assert split_result[0].startswith("- Marinara")
+    exit_code, split_result = runner([*menu_args, "order", "marinara"])
+    assert exit_code == 0
+    assert split_result[0].startswith("You want to order Marinara")
+
+
+def test_idempotency_key_needs_daemon(runner):
+    """Without pizza serve there is nothing to deduplicate retries with."""
+    args = ["order", "Pepperoni", "--idempotency-key", "1"]
+    exit_code, split_result = runner(args)
+    assert exit_code != 0
+    assert "needs a running pizza serve" in split_result[-1]
+
+
+def test_order_from_file(tmp_path, monkeypatch):
+    """Orders from a file are printed as JSON lines, summary goes to stderr.
+
+    Heavy tasks aren't timed, nobody would see their timings.
+    """
+    timed = []
+    monkeypatch.setattr(LogTimeDecorator, "_finish", lambda *a: timed.append(a))
+    path = tmp_path / "orders.jsonl"
+    path.write_text(
+        '{"pizzas": ["Pepperoni", "Margherita:XL"], "delivery": true}\n'
+        '{"pizzas": ["Pepperoni"], "size": "XXXL"}\n',
+    )
+    result = CliRunner().invoke(
+        cli,
+        ["order", "--from-file", str(path)],
+    )
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line["ok"] for line in lines] == [True, False]
+    assert result.stderr.startswith("Processed 2 orders")
+    assert timed == []
+
+
+def test_order_from_file_with_workers_prints_only_json(tmp_path):
+    """Worker processes don't print timings of heavy tasks to stdout."""
+    path = tmp_path / "orders.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps({"pizzas": ["Pepperoni"], "name": f"c{i}"}) + "\n"
+            for i in range(4)
+        ),
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from pizza.cli import cli; cli()",
+            "order",
+            "--from-file",
+            str(path),
+            "--workers",
+            "2",
+        ],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "LATENCY_ENABLED": "0"},
+        check=True,
+    )
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [line["ok"] for line in lines] == [True] * 4
+
+
+def _import_times_ms(code: str, *args: str) -> dict[str, float]:
+    """Run code in a new interpreter and return own import time of every module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "LATENCY_ENABLED": "0"},
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            self_us, _, name = line.removeprefix("import time:").split("|")
+            times[name.strip()] = int(self_us) / 1000
+    return times
+
+
+@pytest.mark.parametrize(
+    ("args", "not_imported"),
+    [
+        (
+            ["menu"],
+            {"pizza.business", "pizza.spinner", "concurrent.futures", "pathlib"},
+        ),
+        (
+            ["order", "Pepperoni"],
+            {"asyncio", "sqlite3", "pizza.simulation", "pizza.server", "signal"},
+        ),
+    ],
+)
+def test_import_time_budget(args, not_imported):
+    """Commands import only what they use and start fast.
+
+    Import time of a command is the time of all modules it imports,
+    stdlib included, except the ones imported by the interpreter and click.
+    """
+    baseline = _import_times_ms("import click")
+    times = _import_times_ms("from pizza.cli import cli; cli()", *args)
+    command_ms = sum(ms for name, ms in times.items() if name not in baseline)
+    assert command_ms < IMPORT_TIME_BUDGET_MS
+    assert not not_imported & times.keys()
@@ -0,0 +1,52 @@
+"""Tests for virtual clock used by latency and timing decorators."""
+import asyncio
+
+import pytest
+
+from pizza.async_business import AsyncClient, AsyncRestaurant
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, WallClock, get_clock, use_clock
+from pizza.constants import MAX_LATENCY_MS, MIN_LATENCY_MS, TEST_LATENCY_S
+from pizza.decorators import LogTimeDecorator, TracingConfig, use_tracing
+from pizza.pizza_menu import pizza_menu
+
+from .help_funcs import all_types_delivery
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+n_steps = 2  # bake + deliver/pick up
+
+
+@pytest.fixture(name="real_latency")
+def _use_real_latency():
+    """Enable latency of the real durations."""
+    with use_tracing(TracingConfig(latency=True)):
+        yield
+
+
+@all_types_delivery
+@pytest.mark.usefixtures("real_latency")
+@pytest.mark.timeout(TEST_LATENCY_S * 100)
+def test_virtual_latency_is_instant(is_delivery: bool):  # noqa: FBT001
+    """Real latency is simulated without waiting and reported by the timer."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant=restaurant, is_delivery=is_delivery)
+    with use_clock(VirtualClock()) as clock:
+        _, execution_time = LogTimeDecorator(is_return_time=True)(
+            client.make_order,
+        )(first_pizza_name)
+    assert MIN_LATENCY_MS * n_steps <= execution_time * 1000
+    assert execution_time * 1000 <= MAX_LATENCY_MS * n_steps
+    assert execution_time == pytest.approx(clock.slept)
+    assert isinstance(get_clock(), WallClock)
+
+
+@pytest.mark.usefixtures("real_latency")
+@pytest.mark.timeout(TEST_LATENCY_S * 100)
+def test_virtual_latency_async():
+    """Coroutines also sleep in virtual time."""
+    restaurant = AsyncRestaurant(pizza_menu)
+    client = AsyncClient(restaurant=restaurant, is_delivery=True)
+    with use_clock(VirtualClock()) as clock:
+        asyncio.run(client.make_order(first_pizza_name))
+    assert clock.slept * 1000 >= MIN_LATENCY_MS * n_steps
+    assert len(client.get_stock()) == 1
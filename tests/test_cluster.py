@@ -0,0 +1,64 @@
+"""Tests for the restaurant sharded over worker processes."""
+import io
+import json
+
+import pytest
+
+from pizza.business import client_key
+from pizza.cluster import RestaurantCluster, shard_for
+from pizza.ingest import ingest_orders
+
+
+@pytest.fixture(name="cluster", scope="module")
+def _cluster():
+    """Cluster with two worker processes shared by tests of the module."""
+    with RestaurantCluster(2) as cluster:
+        yield cluster
+
+
+def test_shard_is_stable_for_equal_clients():
+    """Equal clients go to the same shard, and shards are spread."""
+    key = client_key("Ann ", "+1 555")
+    assert shard_for(key, 4) == shard_for(client_key("ann", "1555"), 4)
+    shards = {shard_for(client_key(f"client {i}", ""), 4) for i in range(100)}
+    assert shards == {0, 1, 2, 3}
+
+
+def test_cluster_orders(cluster):
+    """Orders are processed by workers, errors come back as responses."""
+    futures = [
+        cluster.submit([("Pepperoni", "L")], is_delivery=i % 2 == 0, name=f"c{i}")
+        for i in range(10)
+    ]
+    responses = [future.result(timeout=10) for future in futures]
+    assert all(response["ok"] for response in responses)
+    assert responses[0]["pizzas"] == ["Pepperoni, Size: L, Is baked: True"]
+    response = cluster.order([("Pepperoni", "XXXL")], is_delivery=False)
+    assert not response["ok"]
+
+
+def test_ingest_orders_with_cluster(cluster):
+    """Results of a cluster keep the input order."""
+    lines = [
+        json.dumps({"pizzas": ["Margherita"], "name": f"c{i}"}) for i in range(20)
+    ]
+    lines.insert(5, "not json")
+    out = io.StringIO()
+    assert ingest_orders(lines, cluster, out) == (20, 1)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result["line"] for result in results] == list(range(1, 22))
+
+
+@pytest.mark.timeout(30)
+def test_dead_worker_fails_its_orders():
+    """Orders of a shard whose worker died get errors instead of hanging."""
+    with RestaurantCluster(1) as cluster:
+        worker = cluster._workers[0]
+        worker.kill()
+        worker.join()
+        futures = [
+            cluster.submit([("Pepperoni", "L")], is_delivery=False) for _ in range(2)
+        ]
+        responses = [future.result(timeout=10) for future in futures]
+    assert not any(response["ok"] for response in responses)
+    assert "Worker of shard 0 exited" in responses[-1]["error"]
@@ -0,0 +1,110 @@
+"""Tests for deadlines of orders and hedged deliveries."""
+import threading
+
+import pytest
+
+from pizza import deadlines
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, use_clock
+from pizza.constants import TEST_LATENCY_S
+from pizza.deadlines import DeadlineExceeded, HedgePolicy
+from pizza.decorators import TracingConfig, use_tracing
+from pizza.kitchen import Kitchen
+from pizza.pizza_menu import pizza_menu
+from pizza.storage import MemoryStore
+
+
+@pytest.fixture
+def fixed_latency():
+    """Every heavy task takes TEST_LATENCY_S by a virtual clock."""
+    config = TracingConfig(latency=True, test_latency=True)
+    with use_tracing(config), use_clock(VirtualClock()) as clock:
+        yield clock
+
+
+def test_sleep_stops_at_the_earliest_deadline():
+    """Nested deadline can't extend the outer one."""
+    with use_clock(VirtualClock()) as clock:
+        start = clock.now()
+        with deadlines.deadline(1), deadlines.deadline(5):
+            assert deadlines.remaining() == pytest.approx(1)
+            with pytest.raises(DeadlineExceeded):
+                deadlines.sleep(3)
+        assert clock.now() - start == pytest.approx(1)
+        assert deadlines.remaining() is None
+
+
+@pytest.mark.usefixtures("fixed_latency")
+def test_late_delivery_is_cancelled():
+    """Pizza baked before the deadline is taken back from the stock."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant, is_delivery=True)
+    with pytest.raises(DeadlineExceeded):
+        client.make_order("Pepperoni", timeout=TEST_LATENCY_S * 1.5)
+    assert len(restaurant.get_stock()) == 0
+    assert client.get_stock() == []
+    client.make_order("Pepperoni", timeout=TEST_LATENCY_S * 3)
+    assert len(client.get_stock()) == 1
+
+
+@pytest.mark.usefixtures("fixed_latency")
+def test_late_pickup_is_cancelled():
+    """Order ready by the deadline but picked up late is closed everywhere."""
+    store = MemoryStore()
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant, is_delivery=False)
+    with pytest.raises(DeadlineExceeded):
+        client.make_order("Pepperoni", timeout=TEST_LATENCY_S * 1.5)
+    assert len(restaurant.get_stock()) == 0
+    assert store.open_orders() == []
+    assert client.make_orders([("Margherita", "L")]) == [pizza_menu["Margherita"]()]
+
+
+def test_kitchen_queue_wait_stops_at_the_deadline():
+    """Full kitchen doesn't keep an order waiting past its deadline."""
+    release = threading.Event()
+    with Kitchen(n_ovens=1, max_queue=1) as kitchen:
+        kitchen.submit_order(release.wait)
+        try:
+            with deadlines.deadline(0.01), pytest.raises(DeadlineExceeded):
+                kitchen.submit_order(lambda: None)
+        finally:
+            release.set()
+    assert kitchen.rejected == 0
+
+
+@pytest.mark.usefixtures("fixed_latency")
+def test_late_kitchen_order_is_cancelled():
+    """Deadline reaches kitchen threads, bakes after it don't open orders."""
+    with Kitchen(n_ovens=1, n_couriers=1) as kitchen:
+        restaurant = Restaurant(pizza_menu, kitchen=kitchen)
+        client = Client(restaurant, is_delivery=False)
+        with pytest.raises(DeadlineExceeded):
+            client.make_orders(
+                [("Pepperoni", "L"), ("Margherita", "L")],
+                timeout=TEST_LATENCY_S * 1.5,
+            )
+    assert len(restaurant.get_stock()) == 0
+
+
+def test_slow_delivery_is_hedged():
+    """Second attempt starts after the usual delivery time and wins."""
+    policy = HedgePolicy(quantile=0.5, min_samples=3)
+    for _ in range(3):
+        assert policy.run(lambda: "fast") == "fast"
+    assert policy.hedged == 0
+    release = threading.Event()
+    calls = []
+
+    def deliver() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait()
+            return "slow"
+        return "hedged"
+
+    try:
+        assert policy.run(deliver) == "hedged"
+    finally:
+        release.set()
+    assert policy.hedged == 1
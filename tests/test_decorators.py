@@ -0,0 +1,55 @@
+"""Tests for tracing layers of heavy tasks."""
+import asyncio
+
+import pytest
+
+from pizza import deadlines
+from pizza.async_business import AsyncClient, AsyncRestaurant
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, use_clock
+from pizza.deadlines import DeadlineExceeded
+from pizza.decorators import TracingConfig, use_tracing
+from pizza.pizza_menu import pizza_menu
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+
+
+def test_disabled_tracing_layers_cost_nothing():
+    """Without layers heavy tasks are the original methods, layers come back."""
+    original = Restaurant.__wrapped__._bake  # type: ignore
+    with use_tracing(TracingConfig.off()):
+        assert Restaurant._bake is original
+        client = Client(Restaurant(pizza_menu), is_delivery=True)
+        client.make_order(first_pizza_name)
+        assert len(client.get_stock()) == 1
+    with use_tracing(TracingConfig(spinner=False, timer=True)):
+        assert Restaurant._bake is not original
+
+
+@pytest.fixture(name="late_order")
+def _late_order():
+    """Order with a passed deadline and tracing without layers."""
+    with (
+        use_tracing(TracingConfig.off()),
+        use_clock(VirtualClock()),
+        deadlines.deadline(0),
+    ):
+        yield
+
+
+@pytest.mark.usefixtures("late_order")
+def test_deadline_is_checked_without_latency():
+    """Late order doesn't start its heavy tasks even without latency."""
+    client = Client(Restaurant(pizza_menu), is_delivery=True)
+    with pytest.raises(DeadlineExceeded):
+        client.make_order(first_pizza_name)
+    assert client.get_stock() == []
+
+
+@pytest.mark.usefixtures("late_order")
+def test_deadline_is_checked_without_latency_async():
+    """Coroutines of heavy tasks check the deadline too."""
+    client = AsyncClient(AsyncRestaurant(pizza_menu), is_delivery=True)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(client.make_order(first_pizza_name))
+    assert client.get_stock() == []
@@ -0,0 +1,47 @@
+"""Tests for batching of deliveries into trips."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pizza.business import Client, Restaurant
+from pizza.dispatch import DeliveryDispatcher
+from pizza.pizza_menu import pizza_menu
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+
+
+def test_concurrent_deliveries_share_trips():
+    """Orders of clients at the same time are delivered in few trips.
+
+    A slow thread can miss the window of a trip and take another one,
+    so only the bounds of the number of trips are exact.
+    """
+    n_clients, trip_capacity = 12, 4
+    start = threading.Barrier(n_clients)
+    with DeliveryDispatcher(window_s=0.5, trip_capacity=trip_capacity) as dispatcher:
+        restaurant = Restaurant(pizza_menu, dispatcher=dispatcher)
+        clients = [
+            Client(restaurant=restaurant, is_delivery=True, name=str(i))
+            for i in range(n_clients)
+        ]
+
+        def order(client: Client) -> None:
+            start.wait()
+            client.make_order(first_pizza_name)
+
+        with ThreadPoolExecutor(n_clients) as pool:
+            list(pool.map(order, clients))
+    assert n_clients // trip_capacity <= dispatcher.trips < n_clients
+    assert all(len(client.get_stock()) == 1 for client in clients)
+    assert len(restaurant.get_stock()) == 0
+
+
+def test_single_delivery_waits_only_window():
+    """Lonely order leaves after the window in its own trip."""
+    with DeliveryDispatcher(window_s=0.01, trip_capacity=4) as dispatcher:
+        restaurant = Restaurant(pizza_menu, dispatcher=dispatcher)
+        client = Client(restaurant=restaurant, is_delivery=True)
+        n_orders = 2
+        for _ in range(n_orders):
+            client.make_order(first_pizza_name)
+    assert dispatcher.trips == n_orders
+    assert len(client.get_stock()) == n_orders
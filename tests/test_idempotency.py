@@ -0,0 +1,116 @@
+"""Tests for deduplication of orders by idempotency keys."""
+import threading
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, use_clock
+from pizza.idempotency import IdempotencyCache
+from pizza.pizza_menu import pizza_menu
+
+
+def test_duplicates_get_original_result():
+    """fn runs once per key, duplicates get its result."""
+    cache = IdempotencyCache()
+    calls = []
+    for _ in range(3):
+        assert cache.run("a", lambda: calls.append(1) or len(calls)) == 1
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+
+
+def test_keys_expire_and_are_bounded():
+    """Keys are forgotten after TTL and the least recently used are evicted."""
+    cache = IdempotencyCache(max_size=2, ttl_s=10)
+    with use_clock(VirtualClock()) as clock:
+        cache.run("a", lambda: 1)
+        cache.run("b", lambda: 2)
+        cache.run("a", lambda: 0)  # "a" is recently used now
+        cache.run("c", lambda: 3)
+        assert "a" in cache
+        assert "b" not in cache
+        clock.sleep(10)
+        assert "a" not in cache
+    assert len(cache) == 1
+
+
+def test_failed_order_can_be_retried():
+    """Key of a failed order is forgotten."""
+    cache = IdempotencyCache()
+    with pytest.raises(ValueError, match="oven"):
+        cache.run("a", lambda: int("oven"))
+    assert cache.run("a", lambda: 1) == 1
+
+
+def test_duplicate_waits_for_original_in_progress():
+    """Concurrent duplicate doesn't run fn and gets the original result."""
+    cache = IdempotencyCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow() -> str:
+        started.set()
+        release.wait()
+        return "original"
+
+    results = []
+    original = threading.Thread(target=lambda: results.append(cache.run("a", slow)))
+    original.start()
+    started.wait()
+    duplicate = threading.Thread(
+        target=lambda: results.append(cache.run("a", lambda: "duplicate")),
+    )
+    duplicate.start()
+    release.set()
+    original.join()
+    duplicate.join()
+    assert results == ["original", "original"]
+
+
+@pytest.mark.parametrize("is_delivery", [True, False])
+def test_retried_client_order_is_baked_once(is_delivery):
+    """Client order with the same key is baked and delivered once."""
+    n_retried_keys = 2  # every key is sent twice
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant, is_delivery=is_delivery)
+    for _ in range(2):
+        client.make_order("Pepperoni", idempotency_key="order-1")
+    restaurant.process_order("Margherita", client, idempotency_key="order-2")
+    restaurant.process_order("Margherita", client, idempotency_key="order-2")
+    assert len(client.get_stock()) == 1
+    assert restaurant.get_stock().count() == 1
+    assert restaurant.idempotency.hits == n_retried_keys
+
+
+def test_keys_of_clients_do_not_collide():
+    """The same key of another client is a different order."""
+    restaurant = Restaurant(pizza_menu)
+    ann = Client(restaurant, is_delivery=True, name="Ann")
+    bob = Client(restaurant, is_delivery=True, name="Bob")
+    ann.make_order("Pepperoni", idempotency_key="k1")
+    bob.make_order("Margherita", idempotency_key="k1")
+    assert bob.get_stock() == [pizza_menu["Margherita"]()]
+
+
+def test_orders_in_progress_are_not_evicted():
+    """Duplicate of an order in progress waits for it even if the cache is full."""
+    cache = IdempotencyCache(max_size=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow() -> str:
+        started.set()
+        release.wait()
+        return "original"
+
+    results = []
+    original = threading.Thread(target=lambda: results.append(cache.run("a", slow)))
+    original.start()
+    started.wait()
+    cache.run("b", lambda: "other")
+    assert "a" in cache
+    duplicate = threading.Thread(
+        target=lambda: results.append(cache.run("a", lambda: "duplicate")),
+    )
+    duplicate.start()
+    release.set()
+    original.join()
+    duplicate.join()
+    assert results == ["original", "original"]
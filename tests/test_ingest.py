@@ -0,0 +1,46 @@
+"""Tests for streaming ingestion of orders from JSON lines."""
+import io
+import json
+
+from pizza.business import Restaurant
+from pizza.ingest import OrderRecord, ingest_orders, parse_records
+from pizza.pizza_menu import pizza_menu
+
+
+def test_parse_records_applies_defaults():
+    """Records get default delivery and size, bad lines become errors."""
+    lines = [
+        '{"pizzas": ["Pepperoni", ["Margherita", "XL"]], "size": "M"}',
+        "",
+        '{"pizzas": "Pepperoni"}',
+        "[1, 2]",
+    ]
+    first, *errors = parse_records(lines, is_delivery=True, size="L")
+    assert first == OrderRecord(
+        1,
+        [("Pepperoni", "M"), ("Margherita", "XL")],
+        is_delivery=True,
+        name="Pavel",
+        phone_number="+1337",
+    )
+    assert [error["line"] for error in errors] == [3, 4]
+    assert not any(error["ok"] for error in errors)
+
+
+def test_ingest_orders_writes_result_per_order():
+    """Every order has a result line in input order, failures don't stop it."""
+    lines = [
+        json.dumps({"pizzas": ["pepperoni:XL"], "delivery": True}),
+        json.dumps({"pizzas": ["Pizza with pineapples"]}),
+        json.dumps({"pizzas": ["Margherita"], "name": "Ann", "phone": "+1 555"}),
+    ]
+    out = io.StringIO()
+    restaurant = Restaurant(pizza_menu)
+    n_ok, n_failed = ingest_orders(iter(lines), restaurant, out)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert (n_ok, n_failed) == (2, 1)
+    assert [result["line"] for result in results] == [1, 2, 3]
+    assert results[0]["pizzas"] == ["Pepperoni, Size: XL, Is baked: True"]
+    assert results[0]["order_s"] >= 0
+    assert "No such pizza" in results[1]["error"]
+    assert len(restaurant.get_stock()) == 0
@@ -0,0 +1,83 @@
+"""Tests for kitchen with pools of ovens and couriers."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.kitchen import Kitchen, KitchenOverloadedError
+from pizza.pizza_menu import pizza_menu
+
+from .help_funcs import all_types_delivery
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+
+
+@all_types_delivery
+def test_many_clients_from_many_threads(is_delivery: bool):  # noqa: FBT001
+    """Every client gets his pizzas when orders come from different threads."""
+    n_clients, n_orders = 8, 5
+    with Kitchen(n_ovens=3, n_couriers=2, max_queue=4) as kitchen:
+        restaurant = Restaurant(pizza_menu, kitchen=kitchen)
+        clients = [
+            Client(restaurant=restaurant, is_delivery=is_delivery, name=str(i))
+            for i in range(n_clients)
+        ]
+
+        def order_many(client: Client) -> None:
+            for _ in range(n_orders):
+                client.make_order(first_pizza_name)
+
+        with ThreadPoolExecutor(n_clients) as pool:
+            list(pool.map(order_many, clients))
+
+    assert kitchen.completed == n_clients * n_orders
+    assert all(len(client.get_stock()) == n_orders for client in clients)
+    assert len(restaurant.get_stock()) == 0
+
+
+def test_submit_order_returns_future():
+    """Order is delivered when its future is done."""
+    with Kitchen(n_ovens=1, n_couriers=1) as kitchen:
+        restaurant = Restaurant(pizza_menu, kitchen=kitchen)
+        client = Client(restaurant=restaurant, is_delivery=True)
+        n_orders = 3
+        futures = [
+            restaurant.submit_order(first_pizza_name, client, is_delivery=True)
+            for _ in range(n_orders)
+        ]
+        for future in futures:
+            future.result()
+    assert len(client.get_stock()) == n_orders
+
+
+def test_overloaded_kitchen_rejects_orders():
+    """Non-blocking kitchen raises error if its queue is full."""
+    oven_is_free = threading.Event()
+    with Kitchen(n_ovens=1, n_couriers=1, max_queue=1, block=False) as kitchen:
+        first = kitchen.submit_order(oven_is_free.wait)
+        with pytest.raises(KitchenOverloadedError):
+            kitchen.submit_order(oven_is_free.wait)
+        oven_is_free.set()
+        first.result()
+    assert kitchen.rejected == 1
+    assert kitchen.completed == 1
+
+
+def test_non_blocking_kitchen_ignores_timeout():
+    """Timeout is only for waiting, a non-blocking kitchen accepts orders."""
+    with Kitchen(max_queue=1, block=False, timeout=1.0) as kitchen:
+        kitchen.submit_order(lambda: None).result()
+    assert kitchen.completed == 1
+
+
+@pytest.mark.parametrize("scheduled", [False, True])
+def test_order_after_shutdown_frees_its_place(scheduled: bool):  # noqa: FBT001
+    """Order rejected by stopped ovens doesn't keep its place in the queue."""
+    kitchen = Kitchen(max_queue=1, block=False, scheduled=scheduled)
+    kitchen.shutdown()
+    for _ in range(2):
+        with pytest.raises(RuntimeError) as exc_info:
+            kitchen.submit_order(lambda: None)
+        assert exc_info.type is not KitchenOverloadedError
+    assert kitchen.rejected == 0
@@ -0,0 +1,82 @@
+"""Tests for loading menus from files."""
+import json
+
+import pytest
+
+from pizza.menu_loader import load_menu
+from pizza.pizza_menu import Pizza, render_menu
+
+TOML_MENU = """
+[[pizzas]]
+name = "Four Cheese"
+recipe = ["tomato sauce", "mozzarella", "gorgonzola"]
+emoji = "🧀"
+
+[[pizzas]]
+name = "Marinara"
+recipe = ["tomato sauce", "garlic"]
+"""
+
+
+def test_load_toml_menu(tmp_path):
+    """Pizzas from a file are compact Pizza types found by name."""
+    path = tmp_path / "menu.toml"
+    path.write_text(TOML_MENU)
+    menu = load_menu(path, cache_dir=tmp_path / "cache")
+
+    four_cheese = menu["four cheese"]
+    assert issubclass(four_cheese, Pizza)
+    assert four_cheese.name == "Four Cheese"
+    assert four_cheese.recipe == ("tomato sauce", "mozzarella", "gorgonzola")
+    assert not hasattr(four_cheese(size="XL"), "__dict__")
+    assert "Marinara" in menu
+
+
+def test_cache_is_used_until_file_changes(tmp_path, monkeypatch):
+    """Unchanged menu is not parsed again, changed one is."""
+    path = tmp_path / "menu.json"
+    data = {"pizzas": [{"name": "Marinara", "recipe": ["garlic"]}]}
+    path.write_text(json.dumps(data))
+    cache_dir = tmp_path / "cache"
+    load_menu(path, cache_dir=cache_dir)
+
+    parsed = []
+    monkeypatch.setattr(
+        "pizza.menu_loader.parse_menu",
+        lambda *args: parsed.append(args) or [("Broken", ("x",), "")],
+    )
+    assert list(load_menu(path, cache_dir=cache_dir)) == ["marinara"]
+    assert not parsed
+
+    data["pizzas"].append({"name": "Diavola", "recipe": ["salami"]})
+    path.write_text(json.dumps(data))
+    load_menu(path, cache_dir=cache_dir)
+    assert len(parsed) == 1
+
+
+@pytest.mark.parametrize(
+    ("file_name", "content"),
+    [
+        ("menu.yaml", "pizzas: []"),
+        ("menu.json", '{"pizzas": []}'),
+        ("menu.json", '{"pizzas": [{"name": "No recipe"}]}'),
+        ("menu.json", '[{"name": "Marinara", "recipe": ["garlic"]}]'),
+        ("menu.json", '{"pizzas": "Marinara"}'),
+    ],
+)
+def test_invalid_menu(tmp_path, file_name, content):
+    """Invalid menu files are rejected."""
+    path = tmp_path / file_name
+    path.write_text(content)
+    with pytest.raises(ValueError, match=r"Menu should|should have"):
+        load_menu(path, cache_dir=tmp_path / "cache")
+
+
+def test_render_page(tmp_path):
+    """Only pizzas of the page are rendered."""
+    path = tmp_path / "menu.toml"
+    path.write_text(TOML_MENU)
+    menu = load_menu(path, cache_dir=tmp_path / "cache")
+    lines = render_menu(menu, page=2, per_page=1).split("\n")
+    assert lines[0].startswith("- Marinara")
+    assert lines[-1] == "Page 2 of 2"
@@ -0,0 +1,73 @@
+"""Tests for metrics of heavy tasks."""
+import json
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.metrics import REGISTRY, Histogram, MetricsRegistry
+from pizza.pizza_menu import pizza_menu
+
+from .help_funcs import all_types_delivery
+
+
+@pytest.fixture(name="registry")
+def _clean_registry():
+    """Global registry without metrics of previous tests."""
+    REGISTRY.clear()
+    yield REGISTRY
+    REGISTRY.clear()
+
+
+def test_histogram_quantiles():
+    """Quantiles are interpolated inside fixed buckets."""
+    hist = Histogram(buckets_s=(1.0, 2.0))
+    for duration_s in (0.5, 1.5, 1.5, 1.5, 5):
+        hist.observe_ns(int(duration_s * 1e9))
+    assert hist.counts == [1, 3, 1]
+    assert hist.quantile(0.2) == pytest.approx(1.0)
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.quantile(1) == pytest.approx(2.0)  # +Inf bucket is capped
+    assert hist.cumulative() == [("1", 1), ("2", 4), ("+Inf", 5)]
+
+
+def test_prometheus_format():
+    """Histograms are exported with cumulative buckets, sum and count."""
+    registry = MetricsRegistry()
+    registry.counter("orders_total", "Orders", task="bake").inc(2)
+    registry.histogram("took_seconds", "Took", task="bake").observe_ns(10**9)
+    text = registry.to_prometheus()
+    assert "# TYPE orders_total counter" in text
+    assert 'orders_total{task="bake"} 2' in text
+    assert 'took_seconds_bucket{task="bake",le="+Inf"} 1' in text
+    assert 'took_seconds_sum{task="bake"} 1.0' in text
+
+
+def test_prometheus_label_values_are_escaped():
+    """Quotes, backslashes and newlines in label values are escaped."""
+    registry = MetricsRegistry()
+    registry.counter("orders_total", "Orders", pizza='a"b\\c\nd').inc()
+    assert r'orders_total{pizza="a\"b\\c\nd"} 1' in registry.to_prometheus()
+
+
+@all_types_delivery
+def test_heavy_tasks_report_metrics(is_delivery: bool, registry, tmp_path):  # noqa: FBT001
+    """Every heavy task reports its duration by pizza type."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant=restaurant, is_delivery=is_delivery)
+    pizza_names = [pizza_class.name for pizza_class in pizza_menu.values()]
+    client.make_orders([(name, "L") for name in pizza_names])
+
+    path = tmp_path / "metrics.json"
+    registry.write(path)
+    snapshot = json.loads(path.read_text())
+    durations = {
+        (h["labels"]["task"], h["labels"]["pizza"]): h["count"]
+        for h in snapshot["histograms"]
+    }
+    trip = "deliver" if is_delivery else "pickup"
+    assert durations == {
+        **{("bake", name): 1 for name in pizza_names},
+        **{(trip, name): 1 for name in pizza_names},
+    }
+    counters = {c["labels"]["task"]: c["value"] for c in snapshot["counters"]}
+    assert counters == {"bake": len(pizza_names), trip: 1}
@@ -0,0 +1,49 @@
+"""Tests for the order book of a restaurant."""
+from pizza.business import Client, Restaurant
+from pizza.order_book import OrderBook, OrderStatus
+from pizza.pizza_menu import Margherita, Pepperoni, pizza_menu
+
+
+def test_indexes_follow_orders():
+    """Orders are found by client, pizza type and status until closed."""
+    n_orders, n_pepperoni, n_awaiting_pickup, n_client_a = 3, 2, 2, 2
+    book = OrderBook()
+    first = book.add("a", Pepperoni())
+    book.add("a", Margherita(), OrderStatus.AWAITING_PICKUP)
+    book.add("b", Pepperoni(), OrderStatus.AWAITING_PICKUP)
+
+    assert len(book) == n_orders
+    assert first.order_id == 1
+    assert book.get(first.order_id) is first
+    assert book.count(pizza_type="Pepperoni") == n_pepperoni
+    assert book.count(status=OrderStatus.AWAITING_PICKUP) == n_awaiting_pickup
+    found = book.find(pizza_type="Pepperoni", status=OrderStatus.AWAITING_PICKUP)
+    assert [order.client_key for order in found] == ["b"]
+
+    book.set_client_status("a", OrderStatus.OUT_FOR_DELIVERY)
+    assert book.count(status=OrderStatus.OUT_FOR_DELIVERY) == n_client_a
+    assert len(book.pop_client("a")) == n_client_a
+    assert "a" not in book
+    assert book.count(pizza_type="Margherita") == 0
+    assert len(book) == n_orders - n_client_a
+
+
+def test_pop_unknown_client_creates_nothing():
+    """Taking food of a client without orders leaves the book empty."""
+    book = OrderBook()
+    assert book.pop_client("nobody") == []
+    assert len(book) == 0
+    assert "nobody" not in book
+
+
+def test_clients_with_same_info_share_orders():
+    """Equal clients are the same key of the order book."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant=restaurant, is_delivery=False, name="A")
+    same = Client(restaurant=restaurant, is_delivery=False, name="A")
+    restaurant._add_to_stock(client, Pepperoni())
+
+    assert client == same
+    assert restaurant.get_stock().pizzas(same.key) == [Pepperoni()]
+    assert restaurant.give_food(same) == [Pepperoni()]
+    assert len(restaurant.get_stock()) == 0
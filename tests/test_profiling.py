@@ -0,0 +1,65 @@
+"""Tests for profiling of heavy tasks."""
+import asyncio
+
+import pytest
+
+from pizza.async_business import AsyncClient, AsyncRestaurant
+from pizza.business import Client, Restaurant
+from pizza.constants import TEST_LATENCY_S
+from pizza.decorators import TracingConfig, use_tracing
+from pizza.pizza_menu import pizza_menu
+from pizza.profiling import Profiler
+
+
+@pytest.fixture(name="enable_latency")
+def _use_test_latency():
+    """Make latency small but still existing."""
+    with use_tracing(TracingConfig(latency=True, test_latency=True)):
+        yield
+
+
+@pytest.mark.usefixtures("enable_latency")
+def test_sleeping_is_separated(tmp_path):
+    """Latency of heavy tasks is reported as sleeping, stacks are collapsed."""
+    restaurant = Restaurant(pizza_menu)
+    client = Client(restaurant=restaurant, is_delivery=True)
+    with Profiler() as profiler:
+        client.make_order("Pepperoni")
+
+    calls, total_ns, sleep_ns = profiler.tasks["bake"]
+    assert calls == 1
+    assert sleep_ns >= TEST_LATENCY_S * 1e9
+    assert total_ns >= sleep_ns
+    assert profiler.tasks["deliver"][0] == 1
+    assert "deliver" in profiler.report()
+
+    path = tmp_path / "stacks.txt"
+    profiler.write_collapsed(path)
+    sleep_stacks = [
+        line for line in path.read_text().splitlines() if "[bake]" in line
+    ]
+    assert any(line.split()[0].endswith(";time.sleep") for line in sleep_stacks)
+
+
+@pytest.mark.usefixtures("enable_latency")
+def test_coroutine_is_one_call():
+    """Suspended coroutine is counted once and its awaited latency is sleeping."""
+    n_clients = 3
+    restaurant = AsyncRestaurant(pizza_menu)
+    clients = [
+        AsyncClient(restaurant=restaurant, is_delivery=True)
+        for _ in range(n_clients)
+    ]
+
+    async def make_orders() -> None:
+        await asyncio.gather(*(client.make_order("Pepperoni") for client in clients))
+
+    with Profiler() as profiler:
+        asyncio.run(make_orders())
+
+    for task in ("bake", "deliver"):
+        calls, total_ns, sleep_ns = profiler.tasks[task]
+        assert calls == n_clients
+        assert sleep_ns >= n_clients * TEST_LATENCY_S * 1e9
+        assert total_ns >= sleep_ns
+    assert all(ns >= 0 for ns in profiler.collapsed.values())
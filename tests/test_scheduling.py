@@ -0,0 +1,152 @@
+"""Tests for scheduling of kitchen work by priority and deadline."""
+import threading
+import time
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, use_clock
+from pizza.kitchen import Kitchen
+from pizza.pizza_menu import pizza_menu
+from pizza.scheduling import (
+    DEFAULT_SLA_S,
+    OrderScheduler,
+    Priority,
+    PrioritySlots,
+)
+
+
+@pytest.fixture(name="busy_scheduler")
+def _busy_scheduler():
+    """Scheduler with one worker busy until the event is set."""
+    scheduler = OrderScheduler(1, max_wait_s=10)
+    release = threading.Event()
+    scheduler.submit(release.wait, priority=Priority.PICKUP, deadline=0)
+    yield scheduler, release
+    release.set()
+    scheduler.shutdown()
+
+
+def _submit_all(scheduler, jobs, done: list[str]) -> list:
+    """Submit jobs (name, priority, deadline) that append names to done."""
+    return [
+        scheduler.submit(
+            lambda name=name: done.append(name),
+            priority=priority,
+            deadline=deadline,
+        )
+        for name, priority, deadline in jobs
+    ]
+
+
+def test_urgent_class_then_earliest_deadline(busy_scheduler):
+    """Jobs are taken by priority class, then by deadline."""
+    scheduler, release = busy_scheduler
+    done: list[str] = []
+    futures = _submit_all(
+        scheduler,
+        [
+            ("pickup", Priority.PICKUP, 1),
+            ("late delivery", Priority.DELIVERY, 20),
+            ("early delivery", Priority.DELIVERY, 10),
+            ("express", Priority.EXPRESS, 30),
+        ],
+        done,
+    )
+    release.set()
+    for future in futures:
+        future.result()
+    assert done == ["express", "early delivery", "late delivery", "pickup"]
+
+
+def test_waiting_job_is_not_starved(busy_scheduler):
+    """Job that has waited max_wait_s goes before more urgent ones."""
+    scheduler, release = busy_scheduler
+    done: list[str] = []
+    with use_clock(VirtualClock()) as clock:
+        futures = _submit_all(scheduler, [("pickup", Priority.PICKUP, 100)], done)
+        clock.sleep(scheduler.max_wait_s)
+        futures += _submit_all(scheduler, [("express", Priority.EXPRESS, 0)], done)
+        release.set()
+        for future in futures:
+            future.result()
+    assert done == ["pickup", "express"]
+    assert scheduler.n_aged == 1
+
+
+def test_scheduled_kitchen_reports_sla():
+    """Orders of a scheduled kitchen are counted as met or missed."""
+    with Kitchen(n_ovens=2, n_couriers=1, scheduled=True) as kitchen:
+        restaurant = Restaurant(pizza_menu, kitchen=kitchen)
+        Client(restaurant, is_delivery=True).make_orders(
+            [("Pepperoni", "L")],
+            priority=Priority.EXPRESS,
+        )
+        Client(restaurant, is_delivery=False).make_order("Margherita")
+    sla = kitchen.sla.as_dict()
+    assert sla["express"] == {"met": 1, "missed": 0}
+    assert sla["pickup"] == {"met": 1, "missed": 0}
+    assert sla["delivery"] == {"met": 0, "missed": 0}
+
+
+def _bake(name: str, done: list[str]):
+    """Task for an oven which appends name to done."""
+    return lambda: done.append(name)
+
+
+@pytest.mark.parametrize("scheduled", [False, True])
+def test_express_overtakes_queued_pickups(scheduled):
+    """Express baked after all queued pickups in FIFO order, next if scheduled.
+
+    Position of the express pizza stands for its latency in a saturated kitchen.
+    """
+    n_pickups = 20
+    done: list[str] = []
+    is_busy, release = threading.Event(), threading.Event()
+    with Kitchen(n_ovens=1, max_queue=n_pickups + 2, scheduled=scheduled) as kitchen:
+        kitchen.submit_order(lambda: (is_busy.set(), release.wait()))
+        is_busy.wait()
+        for i in range(n_pickups):
+            kitchen.submit_order(_bake(f"pickup {i}", done))
+        kitchen.submit_order(_bake("express", done), priority=Priority.EXPRESS)
+        release.set()
+    expected_position = 0 if scheduled else n_pickups
+    assert done.index("express") == expected_position
+
+
+def test_express_gets_the_next_free_slot():
+    """Freed slot goes to the most urgent caller, then to the longest waiting."""
+    slots = PrioritySlots(1)
+    assert slots.acquire(Priority.PICKUP)
+    got: list[str] = []
+    callers = [(f"pickup {i}", Priority.PICKUP) for i in range(3)]
+    callers.append(("express", Priority.EXPRESS))
+    threads = []
+    for name, priority in callers:
+        threads.append(
+            threading.Thread(
+                target=lambda name=name, priority=priority: (
+                    slots.acquire(priority),
+                    got.append(name),
+                ),
+            ),
+        )
+        threads[-1].start()
+        while slots.n_waiting < len(threads):
+            time.sleep(0.001)
+    assert not slots.acquire(Priority.EXPRESS, timeout=0.01)
+    for n_got in range(1, len(threads) + 1):
+        slots.release()
+        while len(got) < n_got:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    assert got == ["express", "pickup 0", "pickup 1", "pickup 2"]
+
+
+def test_partial_sla_keeps_defaults():
+    """Classes missing in sla_s of a kitchen keep their default SLA."""
+    with Kitchen(sla_s={Priority.EXPRESS: 1.0}) as kitchen:
+        kitchen.submit_order(lambda: None).result()
+    assert kitchen.sla_s == {**DEFAULT_SLA_S, Priority.EXPRESS: 1.0}
+    assert kitchen.sla.as_dict()["pickup"] == {"met": 1, "missed": 0}
@@ -0,0 +1,111 @@
+"""Tests for the pizza serve daemon and its client."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from pizza.business import Restaurant
+from pizza.cli import cli
+from pizza.decorators import TracingConfig, use_tracing
+from pizza.kitchen import Kitchen
+from pizza.pizza_menu import pizza_menu
+from pizza.server import OrderServer, ServeClient
+
+
+@pytest.fixture(name="socket_path")
+def _running_server(tmp_path):
+    """Start daemon in a thread and return its socket path."""
+    socket_path = str(tmp_path / "pizza.sock")
+    server = OrderServer(socket_path, Restaurant(pizza_menu))
+    thread = threading.Thread(
+        target=server.serve_forever,
+        kwargs={"poll_interval": 0.01},
+        daemon=True,
+    )
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+
+
+def test_orders_share_connection_and_restaurant(socket_path):
+    """Several orders go through one connection to the same restaurant."""
+    with ServeClient.connect(socket_path) as daemon:
+        assert daemon.request({"op": "ping"}) == {"ok": True}
+        first = daemon.order([("Pepperoni", "L")], is_delivery=True)
+        items = [("pepperoni", "XL"), ("Margherita", "L")]
+        second = daemon.order(items, is_delivery=False, name="Ann")
+    assert first["ok"]
+    assert second["ok"]
+    assert len(second["pizzas"]) == len(items)
+
+
+def test_concurrent_orders_of_a_client_get_own_pizzas(tmp_path):
+    """Orders of one client on several connections don't take each other's food."""
+    socket_path = str(tmp_path / "pizza.sock")
+    n_orders = 6
+    items = [("Pepperoni", "L"), ("Margherita", "L")]
+    config = TracingConfig(latency=True, test_latency=True, spinner=False)
+    with (
+        use_tracing(config),
+        Kitchen(n_ovens=4, n_couriers=4) as kitchen,
+        OrderServer(socket_path, Restaurant(pizza_menu, kitchen=kitchen)) as server,
+    ):
+        threading.Thread(
+            target=server.serve_forever,
+            kwargs={"poll_interval": 0.01},
+            daemon=True,
+        ).start()
+
+        def order(is_delivery: bool) -> dict:  # noqa: FBT001
+            with ServeClient.connect(socket_path) as daemon:
+                return daemon.order(items, is_delivery=is_delivery)
+
+        with ThreadPoolExecutor(n_orders) as pool:
+            responses = list(pool.map(order, [True, False] * (n_orders // 2)))
+        server.shutdown()
+    assert [len(response["pizzas"]) for response in responses] == [2] * n_orders
+
+
+def test_invalid_order_is_rejected(socket_path):
+    """Invalid orders get an error and the connection stays usable."""
+    with ServeClient.connect(socket_path) as daemon:
+        response = daemon.order([("peperoni", "L")], is_delivery=False)
+        assert not response["ok"]
+        assert "Did you mean Pepperoni" in response["error"]
+        assert daemon.request({"op": "unknown"})["ok"] is False
+        assert daemon.request({"op": "ping"})["ok"]
+
+
+def test_second_daemon_is_refused(socket_path):
+    """Only one daemon listens on a socket."""
+    with pytest.raises(RuntimeError, match="already running"):
+        OrderServer(socket_path, Restaurant(pizza_menu))
+
+
+def test_cli_order_uses_daemon(socket_path, monkeypatch):
+    """pizza order sends the order to a running daemon."""
+    monkeypatch.setenv("PIZZA_SERVE_SOCKET", socket_path)
+    result = CliRunner().invoke(cli, ["order", "Pepperoni", "--delivery"])
+    assert result.exit_code == 0
+    assert "Delivered 1 pizzas by pizza serve" in result.output
+
+
+def test_cli_order_without_daemon(tmp_path, monkeypatch):
+    """pizza order works locally if the daemon isn't running."""
+    monkeypatch.setenv("PIZZA_SERVE_SOCKET", str(tmp_path / "missing.sock"))
+    monkeypatch.setenv("LATENCY_ENABLED", "0")
+    result = CliRunner().invoke(cli, ["order", "Pepperoni"])
+    assert result.exit_code == 0
+    assert "by pizza serve" not in result.output
+
+
+def test_retried_order_gets_original_response(socket_path):
+    """Order with the same idempotency key is processed once."""
+    with ServeClient.connect(socket_path) as daemon:
+        first, retry = (
+            daemon.order([("Pepperoni", "L")], is_delivery=True, idempotency_key="1")
+            for _ in range(2)
+        )
+    assert retry == first
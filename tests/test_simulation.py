@@ -0,0 +1,71 @@
+"""Tests for discrete-event simulation of the restaurant."""
+import pytest
+
+from pizza.constants import MAX_LATENCY_MS, MIN_LATENCY_MS
+from pizza.pizza_menu import pizza_menu
+from pizza.simulation import SimulationConfig, format_report, simulate
+
+first_pizza_name = next(iter(pizza_menu.values())).name
+max_step_s = MAX_LATENCY_MS / 1000
+min_step_s = MIN_LATENCY_MS / 1000
+
+
+def test_idle_kitchen_has_no_queue():
+    """With rare orders, latency is just baking plus delivery or pick up."""
+    report = simulate(
+        SimulationConfig(n_orders=1000, rate_per_min=0.1, n_ovens=4, seed=1),
+    )
+    assert report.ovens.max_queue == 0
+    assert report.ovens.mean_wait_s == 0
+    assert 2 * min_step_s <= report.latency_percentiles_s[50] <= 2 * max_step_s
+    assert report.latency_percentiles_s[99] <= 2 * max_step_s
+
+
+def test_overloaded_kitchen_is_slower():
+    """Fewer ovens under the same load mean longer queues and latency."""
+    config = SimulationConfig(n_orders=5000, rate_per_min=60, n_ovens=4, seed=1)
+    big_kitchen = simulate(config)
+    config.n_ovens = 1
+    small_kitchen = simulate(config)
+    assert small_kitchen.ovens.mean_queue > big_kitchen.ovens.mean_queue
+    small_p95 = small_kitchen.latency_percentiles_s[95]
+    assert small_p95 > big_kitchen.latency_percentiles_s[95]
+    assert small_kitchen.ovens.utilization == pytest.approx(1, abs=0.05)
+
+
+def test_mix_and_delivery_ratio():
+    """Only pizzas from the mix are ordered and only deliveries use couriers."""
+    n_orders = 1000
+    report = simulate(
+        SimulationConfig(
+            n_orders=n_orders,
+            mix={first_pizza_name.lower(): 1},
+            delivery_ratio=0,
+            seed=1,
+        ),
+    )
+    assert report.orders_by_pizza == {first_pizza_name: n_orders}
+    assert report.couriers.n_served == 0
+
+
+def test_mix_is_simulated_per_order():
+    """Every order is for a pizza of the mix, latency is reported per pizza."""
+    first, second = (pizza_cls.name for pizza_cls in list(pizza_menu.values())[:2])
+    n_orders = 4000
+    report = simulate(
+        SimulationConfig(n_orders=n_orders, mix={first: 3, second: 1}, seed=1),
+    )
+    assert sum(report.orders_by_pizza.values()) == n_orders
+    assert report.orders_by_pizza[first] == pytest.approx(3000, rel=0.1)
+    assert report.latency_by_pizza_s.keys() == {first, second}
+    medians = [p[50] for p in report.latency_by_pizza_s.values()]
+    assert min(medians) <= report.latency_percentiles_s[50] <= max(medians)
+    assert f"  {second}: {report.orders_by_pizza[second]}, latency p50" in (
+        format_report(report)
+    )
+
+
+def test_unknown_pizza_in_mix():
+    """Mix can contain only pizzas from the menu."""
+    with pytest.raises(KeyError):
+        simulate(SimulationConfig(mix={"definitely_unknown_pizza": 1}))
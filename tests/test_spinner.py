@@ -0,0 +1,47 @@
+"""Tests for the shared progress renderer."""
+import io
+import threading
+
+from pizza.spinner import ProgressRenderer, add_spinner
+
+ANSWER = 42
+
+
+class FakeTerminal(io.StringIO):
+    """Stdout that pretends to be a TTY."""
+
+    def isatty(self) -> bool:
+        """Always a terminal."""
+        return True
+
+
+class Worker:
+    """Object with a long method."""
+
+    @add_spinner("Working", "Done")
+    def work(self) -> int:
+        """Pretend to work."""
+        return ANSWER
+
+
+def test_no_threads_without_tty(capsys):
+    """Spinner isn't drawn if stdout is not a TTY, only end message is printed."""
+    n_threads = threading.active_count()
+    assert Worker().work() == ANSWER
+    assert threading.active_count() == n_threads
+    assert capsys.readouterr().out == "Done! "
+
+
+def test_status_line_groups_tasks(monkeypatch):
+    """All active tasks are drawn in one line, grouped by message."""
+    monkeypatch.setattr("sys.stdout", FakeTerminal())
+    renderer = ProgressRenderer()
+    bake_ids = [renderer.start_task("Baking") for _ in range(3)]
+    deliver_id = renderer.start_task("Delivering")
+    status_line = renderer._status_line("|", width=80)
+    assert status_line.endswith("| Baking x3 | | Delivering")
+    assert renderer._status_line("|", width=5).endswith("| Bak")
+    for task_id in bake_ids:
+        renderer.finish_task(task_id, "Baked")
+    renderer.finish_task(deliver_id, None)
+    assert renderer._active == {}
@@ -0,0 +1,132 @@
+"""Tests for persistent storage of orders."""
+import sqlite3
+import time
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.order_book import OrderStatus
+from pizza.pizza_menu import Pepperoni, pizza_menu
+from pizza.storage import MemoryStore, SQLiteStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Factory of a store which reopens the same storage."""
+    memory_store = MemoryStore()
+    stores = []
+
+    def make() -> MemoryStore | SQLiteStore:
+        if request.param == "memory":
+            return memory_store
+        store = SQLiteStore(tmp_path / "orders.db", batch_size=4)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_open_orders_survive_restart(make_store):
+    """Restaurant restores open orders and continues their ids."""
+    store = make_store()
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=False, name="A")
+    client.make_order("Pepperoni")
+    restaurant._add_to_stock(client, Pepperoni(), OrderStatus.AWAITING_PICKUP)
+    store.close()
+
+    restarted = Restaurant(pizza_menu, store=make_store())
+    waiting = restarted.get_stock().find(client_key=client.key)
+    assert [order.order_id for order in waiting] == [2]
+    assert waiting[0].status is OrderStatus.AWAITING_PICKUP
+    assert waiting[0].pizza.is_baked
+    new_order = restarted._add_to_stock(client, Pepperoni())
+    assert new_order.order_id == waiting[0].order_id + 1
+
+
+def test_closed_orders_are_history(make_store):
+    """Picked up and delivered orders are kept as history of a client."""
+    store = make_store()
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=True, name="A")
+    client.make_orders([("Pepperoni", "L"), ("Margherita", "XL")])
+
+    history = store.history(client.key)
+    assert sorted((s.pizza_name, s.size) for s in history) == [
+        ("Margherita", "XL"),
+        ("Pepperoni", "L"),
+    ]
+    assert {s.status for s in history} == {OrderStatus.OUT_FOR_DELIVERY.value}
+    assert store.open_orders() == []
+
+
+def test_sqlite_writes_in_batches(tmp_path):
+    """Changes are committed once per batch, not once per order."""
+    n_orders, batch_size = 100, 50
+    store = SQLiteStore(tmp_path / "orders.db", batch_size=batch_size)
+    store.flush_interval_s = float("inf")
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=False)
+    for _ in range(n_orders):
+        restaurant._add_to_stock(client, Pepperoni())
+    assert store.n_commits == n_orders // batch_size
+    store.close()
+
+
+def test_sqlite_idle_store_flushes_in_background(tmp_path):
+    """Buffered changes are committed without further writes or reads."""
+    path = tmp_path / "orders.db"
+    store = SQLiteStore(path, batch_size=512, flush_interval_s=0.01)
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=False)
+    restaurant._add_to_stock(client, Pepperoni())
+    reader = sqlite3.connect(path)
+    try:
+        deadline = time.monotonic() + 5
+        while reader.execute("SELECT COUNT(*) FROM orders").fetchone() == (0,):
+            assert time.monotonic() < deadline, "buffer was not flushed"
+            time.sleep(0.01)
+    finally:
+        reader.close()
+        store.close()
+    assert store.n_commits == 1
+
+
+def test_sqlite_drops_rejected_changes(tmp_path, caplog):
+    """Change rejected by the database doesn't take its batch down."""
+    store = SQLiteStore(tmp_path / "orders.db", flush_interval_s=float("inf"))
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=False)
+    order = restaurant._add_to_stock(client, Pepperoni())
+    store.add(order)  # duplicate id
+    restaurant._add_to_stock(client, Pepperoni())
+    store.flush()
+    assert [stored.order_id for stored in store.open_orders()] == [1, 2]
+    assert (store.n_commits, store.n_dropped) == (1, 1)
+    assert "Dropped change" in caplog.text
+    store.close()
+
+
+def test_sqlite_flusher_survives_rejected_changes(tmp_path):
+    """Background thread keeps flushing after a batch failed."""
+    store = SQLiteStore(tmp_path / "orders.db", flush_interval_s=0.01)
+    restaurant = Restaurant(pizza_menu, store=store)
+    client = Client(restaurant=restaurant, is_delivery=False)
+    order = restaurant._add_to_stock(client, Pepperoni())
+    store.add(order)  # duplicate id
+    try:
+        deadline = time.monotonic() + 5
+        while store.n_commits == 0:
+            assert time.monotonic() < deadline, "buffer was not flushed"
+            time.sleep(0.01)
+        restaurant._add_to_stock(client, Pepperoni())
+        while store.n_commits == 1:
+            assert time.monotonic() < deadline, "flusher has stopped"
+            time.sleep(0.01)
+        assert store._flusher is not None
+        assert store._flusher.is_alive()
+    finally:
+        store.close()
+    assert store.n_dropped == 1
@@ -0,0 +1,106 @@
+"""Tests for the inventory of pizzas baked ahead of time."""
+import threading
+
+import pytest
+
+from pizza.business import Client, Restaurant
+from pizza.clock import VirtualClock, use_clock
+from pizza.kitchen import Kitchen
+from pizza.pizza_menu import Margherita, Pepperoni, pizza_menu
+from pizza.warm_inventory import WarmInventory
+
+
+@pytest.fixture(name="clock")
+def _virtual_clock():
+    """Use virtual clock in the test."""
+    with use_clock(VirtualClock()) as clock:
+        yield clock
+
+
+def _bake(pizza_name: str, size: str):
+    pizza = pizza_menu[pizza_name](size=size)
+    pizza.bake()
+    return pizza
+
+
+@pytest.mark.usefixtures("clock")
+def test_capacity_is_split_by_demand():
+    """Hot items get more of the capacity, cold ones aren't baked."""
+    inventory = WarmInventory(capacity=4, min_demand=2)
+    for _ in range(6):
+        inventory.take(Pepperoni())
+    for _ in range(2):
+        inventory.take(Margherita(size="XL"))
+    inventory.take(Margherita())
+    assert inventory.plan() == {("Pepperoni", "L"): 3, ("Margherita", "XL"): 1}
+    assert inventory.refill(_bake) == len(inventory) == inventory.capacity
+    assert inventory.take(Pepperoni()) == Pepperoni()
+    assert inventory.stats()["hits"] == 1
+
+
+def test_demand_decays_and_old_pizzas_are_wasted(clock):
+    """Demand halves every half-life and stale pizzas are thrown away."""
+    inventory = WarmInventory(capacity=2, max_age_s=30, half_life_s=10)
+    inventory.take(Pepperoni())
+    inventory.take(Pepperoni())
+    inventory.refill(_bake)
+    clock.sleep(10)
+    assert inventory.demand("Pepperoni", "L") == pytest.approx(1)
+    clock.sleep(20)
+    assert inventory.take(Pepperoni()) is None
+    assert inventory.stats()["wasted"] == inventory.capacity
+
+
+@pytest.mark.usefixtures("clock")
+def test_restaurant_serves_orders_from_inventory():
+    """Prebaked pizzas are taken by orders without baking."""
+    capacity = 2
+    restaurant = Restaurant(
+        pizza_menu,
+        warm_inventory=WarmInventory(capacity=capacity),
+    )
+    client = Client(restaurant, is_delivery=False)
+    client.make_order("Pepperoni")
+    assert restaurant.prebake() == capacity
+    for _ in range(capacity):
+        client.make_order("Pepperoni")
+    assert restaurant.warm_inventory.stats()["hits"] == capacity
+    assert len(client.get_stock()) == capacity + 1
+    assert all(pizza.is_baked for pizza in client.get_stock())
+
+
+@pytest.mark.usefixtures("clock")
+def test_pizza_baked_for_full_inventory_is_wasted():
+    """Refill that finds the inventory filled meanwhile counts its pizza as waste."""
+    inventory = WarmInventory(capacity=1)
+    inventory.take(Pepperoni())
+
+    def bake_while_another_refill_runs(pizza_name: str, size: str):
+        inventory.refill(_bake)
+        return _bake(pizza_name, size)
+
+    assert inventory.refill(bake_while_another_refill_runs) == 0
+    stats = inventory.stats()
+    assert (stats["size"], stats["baked"], stats["wasted"]) == (1, 2, 1)
+
+
+@pytest.mark.usefixtures("clock")
+def test_prebake_uses_ovens_of_the_kitchen(monkeypatch):
+    """Baking ahead doesn't run an oven of its own next to the kitchen."""
+    bakers = []
+
+    def bake(_, pizza):
+        bakers.append(threading.current_thread().name)
+        pizza.bake()
+        return pizza
+
+    monkeypatch.setattr(Restaurant, "_bake", bake)
+    with Kitchen(n_ovens=1) as kitchen:
+        restaurant = Restaurant(
+            pizza_menu,
+            kitchen=kitchen,
+            warm_inventory=WarmInventory(capacity=2),
+        )
+        restaurant.warm_inventory.take(Pepperoni())
+        assert restaurant.prebake() == restaurant.warm_inventory.capacity
+    assert bakers == ["oven_0"] * restaurant.warm_inventory.capacity